@@ -0,0 +1,70 @@
+from typing import List, Tuple
+
+import numpy as np
+import polars as pl
+from pydantic import BaseModel
+
+_SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'de', 'gu', 'ho', 'ji', 'be', 'fa']
+_NOISE = ['!', '?', '...', ',', ' 42', ' 2024', ' #tag', ' (x)', ' <br>', ' @user']
+
+
+class CorpusConfig(BaseModel):
+    """
+    Shape of a synthetic text-classification corpus. Each text column draws its words from a
+    Zipf-distributed vocabulary, a share ``topic_prop`` of them coming from a vocabulary slice
+    specific to the row's class so that the labels can be learned.
+    """
+
+    n_rows: int = 10_000
+    text_cols: List[str] = ['title', 'body']
+    words_per_text: List[Tuple[int, int]] = [(3, 12), (20, 120)]
+    vocabulary_size: int = 20_000
+    n_classes: int = 5
+    topic_prop: float = 0.3
+    noise_prop: float = 0.05
+    target_col: str = 'label'
+    seed: int = 0
+
+
+def make_vocabulary(size: int) -> List[str]:
+    """
+    ``size`` distinct pronounceable words, the same for a given size whatever the seed.
+    """
+    words = []
+    n_syllables = len(_SYLLABLES)
+    for i in range(size):
+        word, n = '', i + n_syllables
+        while n:
+            n, r = divmod(n, n_syllables)
+            word = _SYLLABLES[r] + word
+        words.append(word)
+    return words
+
+
+def generate_corpus(conf: CorpusConfig) -> pl.DataFrame:
+    """
+    Generates the corpus described by ``conf``, identical for a given config.
+    """
+    rng = np.random.default_rng(conf.seed)
+    vocabulary = np.array(make_vocabulary(conf.vocabulary_size), dtype=object)
+    ranks = np.arange(1, conf.vocabulary_size + 1)
+    weights = 1.0 / ranks
+    weights /= weights.sum()
+    topic_size = max(conf.vocabulary_size // (conf.n_classes * 10), 1)
+    labels = rng.integers(0, conf.n_classes, conf.n_rows)
+    columns = {}
+    for col, (min_words, max_words) in zip(conf.text_cols, conf.words_per_text):
+        lengths = rng.integers(min_words, max_words + 1, conf.n_rows)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        word_ids = rng.choice(conf.vocabulary_size, size=offsets[-1], p=weights)
+        row_of_word = np.repeat(np.arange(conf.n_rows), lengths)
+        topical = rng.random(offsets[-1]) < conf.topic_prop
+        word_ids[topical] = labels[row_of_word[topical]] * topic_size + rng.integers(0, topic_size, topical.sum())
+        words = vocabulary[word_ids % conf.vocabulary_size]
+        noisy = rng.random(offsets[-1]) < conf.noise_prop
+        words[noisy] = words[noisy] + np.array(_NOISE, dtype=object)[rng.integers(0, len(_NOISE), noisy.sum())]
+        capitalized = rng.random(offsets[-1]) < conf.noise_prop
+        words[capitalized] = [word.capitalize() for word in words[capitalized]]
+        columns[col] = [' '.join(words[offsets[i] : offsets[i + 1]]) for i in range(conf.n_rows)]
+    columns[conf.target_col] = labels.tolist()
+    return pl.DataFrame(columns)
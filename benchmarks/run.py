@@ -0,0 +1,430 @@
+"""
+Times the hot paths of ml_easy on synthetic corpora of several sizes and writes the results to
+JSON, to be compared across commits:
+
+    python -m benchmarks.run --scales 1000 10000 --output before.json
+    python -m benchmarks.run --scales 1000 10000 --compare before.json
+
+Everything runs offline; benchmarks needing NLTK data that is not installed are reported as
+skipped, and benchmarks running out of memory at a scale as failed.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from functools import cached_property
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import polars as pl
+from sklearn.linear_model import SGDClassifier
+
+from benchmarks.corpus import CorpusConfig, generate_corpus, make_vocabulary
+from ml_easy.recipes.classification.v1.config import (
+    ClassificationTransformConfig,
+    ColConfig,
+    LibraryEmbedder,
+)
+from ml_easy.recipes.enum import ScoreType, SqlReadEngine
+from ml_easy.recipes.interfaces.config import Context, Experiment
+from ml_easy.recipes.steps.ingest.datasets import CsrMatrixDataset, PolarsDataset
+from ml_easy.recipes.steps.split.splitter import DatasetSplitter
+from ml_easy.recipes.steps.train.models import ScikitModel
+from ml_easy.recipes.steps.transform.filters import (
+    EqualFilter,
+    InFilter,
+    LengthFilter,
+    NullFilter,
+    RegexFilter,
+)
+from ml_easy.recipes.steps.transform.formatter.formatter import (
+    AvsCleaner,
+    AvsLemmatizer,
+    TextCleanerConfig,
+)
+from ml_easy.recipes.steps.transform.transformer import (
+    FilterTransformer,
+    MultipleTfIdfTransformer,
+)
+from ml_easy.recipes.utils import get_score_class
+
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+CLEANER_PATTERNS = {
+    r'<[^>]+>': ' ',
+    r'[@#]\w+': ' ',
+    r'\d+': ' ',
+    r'[^\w\s]': ' ',
+    r'\s+': ' ',
+}
+# Worker processes of the parallel benchmarks
+_N_WORKERS = 4
+_PACKAGES = ['polars', 'numpy', 'scipy', 'scikit-learn', 'nltk', 'mlflow']
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+class Fixtures:
+    """
+    Inputs of the benchmarks at one scale, built once and shared by the benchmarks using them.
+    """
+
+    def __init__(self, conf: CorpusConfig):
+        self.conf = conf
+
+    @cached_property
+    def corpus(self) -> pl.DataFrame:
+        return generate_corpus(self.conf)
+
+    @cached_property
+    def X(self) -> PolarsDataset:
+        return PolarsDataset(self.corpus.select(self.conf.text_cols))
+
+    @cached_property
+    def X_duplicated(self) -> PolarsDataset:
+        # Templated texts: every row repeats one of the first tenth of the corpus
+        indices = np.random.default_rng(self.conf.seed).integers(0, max(self.conf.n_rows // 10, 1), self.conf.n_rows)
+        return PolarsDataset(self.corpus.select(self.conf.text_cols)[indices])
+
+    @cached_property
+    def sqlite_uri(self) -> str:
+        # Kept with the fixtures, the database is removed once they are released
+        self._sqlite_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self._sqlite_dir.name, 'corpus.db')
+        cols = ', '.join(f'{col} TEXT' for col in self.conf.text_cols)
+        with sqlite3.connect(path) as connection:
+            connection.execute(f'CREATE TABLE corpus ({cols}, {self.conf.target_col} INTEGER)')
+            placeholders = ', '.join('?' * (len(self.conf.text_cols) + 1))
+            connection.executemany(f'INSERT INTO corpus VALUES ({placeholders})', self.corpus.iter_rows())
+        return f'sqlite:///{path}'
+
+    @cached_property
+    def y(self) -> PolarsDataset:
+        return PolarsDataset(self.corpus.select(self.conf.target_col))
+
+    @cached_property
+    def texts(self) -> List[str]:
+        return self.corpus[self.conf.text_cols[-1]].to_list()
+
+    @cached_property
+    def cleaner(self) -> AvsCleaner:
+        return AvsCleaner(TextCleanerConfig(regex_patterns=CLEANER_PATTERNS))
+
+    def tfidf(self) -> MultipleTfIdfTransformer:
+        embedder = LibraryEmbedder(path='sklearn.feature_extraction.text.TfidfVectorizer', params={})
+        conf = ClassificationTransformConfig(
+            transformer_fn='transformer_fn', cols={col: ColConfig(embedder=embedder) for col in self.conf.text_cols}
+        )
+        context = Context(
+            recipe_root_path='.',
+            target_col=self.conf.target_col,
+            experiment=Experiment(product_name='benchmarks', name='benchmarks', tracking_uri='file:///tmp/mlruns'),
+        )
+        return MultipleTfIdfTransformer(conf, context)
+
+    @cached_property
+    def features(self) -> CsrMatrixDataset:
+        return self.tfidf().fit_transform(self.X)  # type: ignore
+
+    @cached_property
+    def model(self) -> ScikitModel:
+        model = ScikitModel(SGDClassifier(loss='log_loss', random_state=0))
+        model.fit(self.features, self.y)
+        return model
+
+    @cached_property
+    def y_pred(self) -> PolarsDataset:
+        return self.model.predict(self.features)  # type: ignore
+
+
+def bench_cleaner(f: Fixtures) -> Callable[[], Any]:
+    return lambda: [f.cleaner(text) for text in f.texts]
+
+
+def _lemmatizer() -> AvsLemmatizer:
+    lemmatizer = AvsLemmatizer()
+    try:
+        lemmatizer.warmup()
+    except LookupError as e:
+        resource = re.sub(r'\x1b\[[0-9;]*m', '', str(e).strip().splitlines()[1]).strip()
+        raise SkipBenchmark(f'NLTK data is not installed: {resource}') from None
+    return lemmatizer
+
+
+def bench_lemmatizer(f: Fixtures) -> Callable[[], Any]:
+    lemmatizer = _lemmatizer()
+    return lambda: [lemmatizer(text) for text in f.texts]
+
+
+def bench_lemmatizer_batch(f: Fixtures) -> Callable[[], Any]:
+    lemmatizer = _lemmatizer()
+    return lambda: lemmatizer.lemmatize_batch(f.texts)
+
+
+def bench_map_str(f: Fixtures) -> Callable[[], Any]:
+    udf_map = {col: f.cleaner.clean for col in f.conf.text_cols}
+    return lambda: f.X.map_str(udf_map).collect()
+
+
+def bench_map_str_parallel(f: Fixtures) -> Callable[[], Any]:
+    # The worker pool is started by the first call and reused by the next ones
+    udf_map = {col: f.cleaner.clean for col in f.conf.text_cols}
+    return lambda: f.X.map_str(udf_map, n_workers=_N_WORKERS).collect()
+
+
+def _bench_map_str_duplicated(dedupe: bool) -> Callable[[Fixtures], Callable[[], Any]]:
+    def bench(f: Fixtures) -> Callable[[], Any]:
+        udf_map = {col: f.cleaner.clean for col in f.conf.text_cols}
+        return lambda: f.X_duplicated.map_str(udf_map, dedupe=dedupe).collect()
+
+    return bench
+
+
+def bench_filter(f: Fixtures) -> Callable[[], Any]:
+    title, body = f.conf.text_cols[:2]
+    vocabulary = make_vocabulary(50)
+    filters = {
+        title: [InFilter(vocabulary[:10], neg=True), EqualFilter(vocabulary[10], neg=True), NullFilter(neg=True)],
+        body: [RegexFilter(r'\b(ka|lo)'), LengthFilter(min_length=20), EqualFilter(vocabulary[0], neg=True)],
+    }
+    transformer = FilterTransformer(filters)
+    return lambda: transformer.transform(f.X).collect()
+
+
+def bench_tfidf_fit_transform(f: Fixtures) -> Callable[[], Any]:
+    return lambda: f.tfidf().fit_transform(f.X)
+
+
+def bench_tfidf_transform(f: Fixtures) -> Callable[[], Any]:
+    transformer = f.tfidf()
+    transformer.fit(f.X)
+    return lambda: transformer.transform(f.X)
+
+
+def bench_select_csr_block(f: Fixtures) -> Callable[[], Any]:
+    # Columns of the last embedded text column, a whole block of the feature matrix
+    features = f.features
+    cols = list(range(int(features.offsets[-2]), features.shape[1]))
+    return lambda: features.select(cols)
+
+
+def bench_select_csr_assembled(f: Fixtures) -> Callable[[], Any]:
+    features = CsrMatrixDataset(f.features.service)
+    cols = list(range(int(f.features.offsets[-2]), features.shape[1]))
+    return lambda: features.select(cols)
+
+
+def bench_dataset_split(f: Fixtures) -> Callable[[], Any]:
+    return lambda: f.y.split(0.7, 0.15, seed=0)
+
+
+def bench_splitter(f: Fixtures) -> Callable[[], Any]:
+    splitter = DatasetSplitter(val_prop=0.15, test_prop=0.15, n_folds=5, seed=0)
+    return lambda: (splitter.split(f.features, f.y), splitter.folds(f.y, list(range(f.conf.n_rows))))
+
+
+def bench_model_fit(f: Fixtures) -> Callable[[], Any]:
+    return lambda: ScikitModel(SGDClassifier(loss='log_loss', random_state=0)).fit(f.features, f.y)
+
+
+def bench_model_predict(f: Fixtures) -> Callable[[], Any]:
+    model = f.model
+    return lambda: model.predict(f.features)
+
+
+def _bench_score(score_type: ScoreType) -> Callable[[Fixtures], Callable[[], Any]]:
+    def bench(f: Fixtures) -> Callable[[], Any]:
+        score = get_score_class(score_type)
+        y_true, y_pred, kwargs = f.y, f.y_pred, {}
+        if score_type == ScoreType.F1Score:
+            kwargs = {'average': 'macro'}
+        elif score_type == ScoreType.AUCScore:
+            # AUC is defined on binary labels
+            first_class = pl.col(f.conf.target_col) == 0
+            y_true = PolarsDataset(f.y.get_dataframe.select(first_class.cast(pl.Int64)))
+            y_pred = PolarsDataset(f.y_pred.get_dataframe.select((pl.all() == 0).cast(pl.Int64)))
+        return lambda: score.score(y_true, y_pred, **kwargs)
+
+    return bench
+
+
+def _bench_read_sql(engine: Optional[SqlReadEngine]) -> Callable[[Fixtures], Callable[[], Any]]:
+    def bench(f: Fixtures) -> Callable[[], Any]:
+        return lambda: PolarsDataset.read_sql('SELECT * FROM corpus', f.sqlite_uri, engine)
+
+    return bench
+
+
+def bench_hash_polars(f: Fixtures) -> Callable[[], Any]:
+    return lambda: PolarsDataset(f.corpus).hash_dataset
+
+
+def bench_hash_csr(f: Fixtures) -> Callable[[], Any]:
+    return lambda: f.features.hash_dataset
+
+
+BENCHMARKS: Dict[str, Callable[[Fixtures], Callable[[], Any]]] = {
+    'formatter.cleaner': bench_cleaner,
+    'formatter.lemmatizer': bench_lemmatizer,
+    'formatter.lemmatizer_batch': bench_lemmatizer_batch,
+    'dataset.map_str': bench_map_str,
+    'dataset.map_str_parallel': bench_map_str_parallel,
+    'dataset.map_str_duplicated': _bench_map_str_duplicated(dedupe=False),
+    'dataset.map_str_duplicated_dedupe': _bench_map_str_duplicated(dedupe=True),
+    'transformer.filter': bench_filter,
+    'transformer.tfidf_fit_transform': bench_tfidf_fit_transform,
+    'transformer.tfidf_transform': bench_tfidf_transform,
+    'dataset.select_csr_block': bench_select_csr_block,
+    'dataset.select_csr_assembled': bench_select_csr_assembled,
+    'dataset.split': bench_dataset_split,
+    'splitter.split_folds': bench_splitter,
+    'model.fit': bench_model_fit,
+    'model.predict': bench_model_predict,
+    **{f'score.{score_type.value}': _bench_score(score_type) for score_type in ScoreType},
+    'dataset.read_sql': _bench_read_sql(engine=None),
+    'dataset.read_sql_pandas': _bench_read_sql(engine=SqlReadEngine.PANDAS),
+    'dataset.hash_polars': bench_hash_polars,
+    'dataset.hash_csr': bench_hash_csr,
+}
+
+
+def run_benchmark(name: str, fixtures: Fixtures, repeat: int) -> Dict[str, Any]:
+    result: Dict[str, Any] = {'name': name, 'n_rows': fixtures.conf.n_rows}
+    try:
+        fn = BENCHMARKS[name](fixtures)
+    except SkipBenchmark as e:
+        return {**result, 'status': 'skipped', 'reason': str(e)}
+    except MemoryError as e:
+        return {**result, 'status': 'failed', 'reason': f'{e.__class__.__name__} in setup: {e}'}
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        try:
+            fn()
+        except MemoryError as e:
+            return {**result, 'status': 'failed', 'reason': f'{e.__class__.__name__}: {e}'}
+        seconds.append(time.perf_counter() - start)
+    best = min(seconds)
+    return {
+        **result,
+        'status': 'ok',
+        'seconds': seconds,
+        'min_seconds': best,
+        'median_seconds': statistics.median(seconds),
+        'rows_per_sec': fixtures.conf.n_rows / best if best > 0 else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def run(
+    scales: List[int], names: Optional[List[str]] = None, repeat: int = 3, seed: int = 0, verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Runs the benchmarks named ``names`` (all of them by default) at each scale.
+    """
+    names = names or list(BENCHMARKS)
+    results = []
+    for n_rows in scales:
+        fixtures = Fixtures(CorpusConfig(n_rows=n_rows, seed=seed))
+        for name in names:
+            result = run_benchmark(name, fixtures, repeat)
+            results.append(result)
+            if verbose:
+                timing = f"{result['min_seconds']:.4f}s" if result['status'] == 'ok' else result['reason']
+                print(f"{name:<40} {n_rows:>9} {result['status']:<8} {timing}")
+    return {
+        'metadata': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'packages': {name: _package_version(name) for name in _PACKAGES},
+            'scales': scales,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Ratio of the best time of each benchmark to the one in ``baseline``, above 1 for slowdowns.
+    """
+    before = {(r['name'], r['n_rows']): r for r in baseline['results'] if r['status'] == 'ok'}
+    rows = []
+    for result in current['results']:
+        if result['status'] != 'ok' or (old := before.get((result['name'], result['n_rows']))) is None:
+            continue
+        rows.append(
+            {
+                'name': result['name'],
+                'n_rows': result['n_rows'],
+                'baseline_seconds': old['min_seconds'],
+                'seconds': result['min_seconds'],
+                'ratio': result['min_seconds'] / old['min_seconds'] if old['min_seconds'] > 0 else np.inf,
+            }
+        )
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help='corpus sizes in rows')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='benchmarks to run, all by default')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs of each benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic corpus')
+    parser.add_argument('--output', help='results file, benchmarks/results/<commit>.json by default')
+    parser.add_argument('--compare', help='results file to compare against')
+    args = parser.parse_args(argv)
+
+    results = run(args.scales, args.only, args.repeat, args.seed)
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['metadata']['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results written to {output}')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for row in compare(results, baseline):
+            print(
+                f"{row['name']:<40} {row['n_rows']:>9} {row['baseline_seconds']:.4f}s -> {row['seconds']:.4f}s "
+                f"(x{row['ratio']:.2f})"
+            )
+
+
+if __name__ == '__main__':
+    main()
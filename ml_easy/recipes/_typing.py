@@ -1,5 +1,8 @@
 from typing import Tuple, TypeAlias
 
-from ml_easy.recipes.steps.ingest.datasets import Dataset
+import numpy as np
+
+from ml_easy.recipes.interfaces.dataset import Dataset
 
 TupleDataset: TypeAlias = Tuple[Dataset, Dataset]
+Fold: TypeAlias = Tuple[np.ndarray, np.ndarray]
@@ -43,6 +43,56 @@ class InFilterConfig(FilterConfig):
         return type
 
 
+class RangeFilterConfig(FilterConfig):
+    neg: bool = False
+    lower: Optional[Union[int, float, str]] = None
+    upper: Optional[Union[int, float, str]] = None
+    closed: bool = True
+
+    @field_validator('type')
+    @classmethod
+    def check_type(cls, type: FilterType):
+        if type != FilterType.RANGE:
+            raise ValueError('Type must be RangeFilter for RangeFilterConfig')
+        return type
+
+
+class RegexFilterConfig(FilterConfig):
+    neg: bool = False
+    pattern: str
+
+    @field_validator('type')
+    @classmethod
+    def check_type(cls, type: FilterType):
+        if type != FilterType.REGEX:
+            raise ValueError('Type must be RegexFilter for RegexFilterConfig')
+        return type
+
+
+class NullFilterConfig(FilterConfig):
+    neg: bool = False
+
+    @field_validator('type')
+    @classmethod
+    def check_type(cls, type: FilterType):
+        if type != FilterType.NULL:
+            raise ValueError('Type must be NullFilter for NullFilterConfig')
+        return type
+
+
+class LengthFilterConfig(FilterConfig):
+    neg: bool = False
+    min_length: Optional[int] = None
+    max_length: Optional[int] = None
+
+    @field_validator('type')
+    @classmethod
+    def check_type(cls, type: FilterType):
+        if type != FilterType.LENGTH:
+            raise ValueError('Type must be LengthFilter for LengthFilterConfig')
+        return type
+
+
 class ClassificationIngestConfig(BaseIngestConfig):
     pass
 
@@ -50,6 +100,7 @@ class ClassificationIngestConfig(BaseIngestConfig):
 class LibraryEmbedder(BaseModel):
     path: str
     params: Dict[str, Any]
+    compact_vocabulary: bool = False
 
     @field_validator('params', mode='before')
     def check_scikit(cls, v):
@@ -61,7 +112,18 @@ class LibraryEmbedder(BaseModel):
 class ColConfig(BaseModel):
     embedder: Optional[LibraryEmbedder] = None
     formatter: Optional[TextFormatterConfig] = None
-    filters: Optional[List[Union[EqualFilterConfig, InFilterConfig]]] = None
+    filters: Optional[
+        List[
+            Union[
+                EqualFilterConfig,
+                InFilterConfig,
+                RangeFilterConfig,
+                RegexFilterConfig,
+                NullFilterConfig,
+                LengthFilterConfig,
+            ]
+        ]
+    ] = None
 
 
 class ClassificationTransformConfig(BaseTransformConfig):
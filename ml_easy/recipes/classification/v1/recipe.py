@@ -1,28 +1,21 @@
-from typing import Dict, Type
+from typing import Dict
 
 from ml_easy.recipes.classification.v1.config import ClassificationRecipeConfig
-from ml_easy.recipes.classification.v1.steps import (
-    ClassificationEvaluateStep,
-    ClassificationIngestStep,
-    ClassificationRegisterStep,
-    ClassificationSplitStep,
-    ClassificationTrainStep,
-    ClassificationTransformStep,
-)
 from ml_easy.recipes.interfaces.recipe import BaseRecipe
-from ml_easy.recipes.interfaces.step import BaseStep
+
+_STEPS_MODULE = 'ml_easy.recipes.classification.v1.steps'
 
 
 class ClassificationRecipe(BaseRecipe[ClassificationRecipeConfig]):
-    _RECIPE_STEPS: Dict[str, Type[BaseStep]] = {
-        'ingest': ClassificationIngestStep,
-        'transform': ClassificationTransformStep,
-        'split': ClassificationSplitStep,
-        'train': ClassificationTrainStep,
-        'evaluate': ClassificationEvaluateStep,
-        'register_': ClassificationRegisterStep,
+    _RECIPE_STEPS: Dict[str, str] = {
+        'ingest': f'{_STEPS_MODULE}.ClassificationIngestStep',
+        'transform': f'{_STEPS_MODULE}.ClassificationTransformStep',
+        'split': f'{_STEPS_MODULE}.ClassificationSplitStep',
+        'train': f'{_STEPS_MODULE}.ClassificationTrainStep',
+        'evaluate': f'{_STEPS_MODULE}.ClassificationEvaluateStep',
+        'register_': f'{_STEPS_MODULE}.ClassificationRegisterStep',
     }
 
     @property
-    def recipe_steps(self) -> Dict[str, Type[BaseStep]]:
+    def recipe_steps(self) -> Dict[str, str]:
         return self._RECIPE_STEPS
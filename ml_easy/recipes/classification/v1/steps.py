@@ -1,4 +1,7 @@
-import pickle
+import hashlib
+import logging
+import os
+import shutil
 from typing import Any, List
 
 from ml_easy.recipes.classification.v1.config import (
@@ -9,13 +12,28 @@ from ml_easy.recipes.classification.v1.config import (
     ClassificationTrainConfig,
     ClassificationTransformConfig,
 )
+from ml_easy.recipes.constants import (
+    CV_CACHE_DIR,
+    FEATURES_DIR,
+    FEATURES_MATRIX_NAME,
+    INFERENCE_BUNDLE_NAME,
+    TRANSFORMER_BUNDLE_NAME,
+)
+from ml_easy.recipes.enum import FeatureStorage, MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
 from ml_easy.recipes.interfaces.config import Context
-from ml_easy.recipes.steps.cards_config import Metric, StepMessage
+from ml_easy.recipes.interfaces.dataset import Dataset
+from ml_easy.recipes.io.bundle import load_bundle, save_bundle
+from ml_easy.recipes.profiling import stage
+from ml_easy.recipes.steps.cards_config import (
+    CompressionStats,
+    FeatureMemory,
+    Metric,
+    StepMessage,
+)
 from ml_easy.recipes.steps.evaluate.evaluate import EvaluateStep
-from ml_easy.recipes.steps.ingest.datasets import Dataset
 from ml_easy.recipes.steps.ingest.ingest import IngestStep
 from ml_easy.recipes.steps.register.register_ import RegisterStep
-from ml_easy.recipes.steps.register.registry import Registry
 from ml_easy.recipes.steps.split.split import SplitStep
 from ml_easy.recipes.steps.split.splitter import DatasetSplitter
 from ml_easy.recipes.steps.train.models import Model
@@ -23,6 +41,8 @@ from ml_easy.recipes.steps.train.train import TrainStep
 from ml_easy.recipes.steps.transform.transform import TransformStep
 from ml_easy.recipes.utils import get_features_target, get_score_class
 
+_logger = logging.getLogger(__name__)
+
 
 class ClassificationIngestStep(IngestStep[ClassificationIngestConfig]):
     def __init__(self, ingest_config: ClassificationIngestConfig, context: Context):
@@ -44,23 +64,71 @@ class ClassificationTransformStep(TransformStep[ClassificationTransformConfig]):
 
         transformer: Any = self.get_step_result()
         self.validate_step_result(transformer, Transformer)
-        self.card.transformer_path = f"{self.card.step_output_path}/transformer.pkl"
+        self.card.transformer_path = os.path.join(self.card.step_output_path, TRANSFORMER_BUNDLE_NAME)
         X, y = get_features_target(message.ingest.dataset, self.context.target_col)  # type:ignore
-        self.card.tf_dataset = (transformer.fit_transform(X), y)
-        with open(self.card.transformer_path, 'wb') as f:
-            pickle.dump(transformer, f)
+        if self.context.feature_storage.kind == FeatureStorage.MEMMAP:
+            self.card.tf_dataset = (self._fit_transform_to_disk(transformer, X), y)
+        else:
+            with stage('fit_transform'):
+                self.card.tf_dataset = (transformer.fit_transform(X), y)
+        self.card.tf_outputs = transformer.get_transformer_outputs()
+        self.card.feature_memory = FeatureMemory.from_datasets([self.card.tf_dataset[0]])
+        _logger.info(
+            f'Feature matrix {self.card.feature_memory.dtypes}: {self.card.feature_memory.nbytes} bytes, '
+            f'{self.card.feature_memory.saved_nbytes} bytes saved over float64'
+        )
+        with stage('save_bundle'):
+            manifest = save_bundle(self.card.transformer_path, {'transformer': transformer}, self.context.compression)
+        self.card.transformer_compression = CompressionStats(**manifest['compression'])
         self.card.config = self.conf
         return message
 
+    def _fit_transform_to_disk(self, transformer: Any, X: Dataset) -> Dataset:
+        """
+        Fits ``transformer`` then writes its output to memory-mapped files of the step output
+        directory, transforming ``batch_rows`` rows at a time.
+        """
+        from ml_easy.recipes.steps.ingest.datasets import MemmapCsrMatrixDataset
+
+        features_dir = os.path.join(self.card.step_output_path, FEATURES_DIR)
+        # Matrices derived from the previous features outside of a step directory are stored alongside them
+        shutil.rmtree(features_dir, ignore_errors=True)
+        os.makedirs(features_dir)
+        batch_rows = self.context.feature_storage.batch_rows
+        with stage('fit'):
+            transformer.fit(X)
+        with stage('transform'):
+            X = X.collect()
+            return MemmapCsrMatrixDataset.write(
+                (transformer.transform(X.slice(offset, batch_rows)) for offset in range(0, X.shape[0], batch_rows)),
+                os.path.join(features_dir, FEATURES_MATRIX_NAME),
+            )
+
 
 class ClassificationSplitStep(SplitStep[ClassificationSplitConfig]):
     def __init__(self, split_config: ClassificationSplitConfig, context: Context):
         super().__init__(split_config, context)
 
     def _run(self, message: StepMessage) -> StepMessage:
+        from ml_easy.recipes.steps.ingest.datasets import derived_matrix_directory
+        from ml_easy.recipes.steps.train.cross_validation import (
+            ROW_DROPPING_FILTERS_MESSAGE,
+        )
+
         dataset_splitter: Any = self.get_step_result()
         self.validate_step_result(dataset_splitter, DatasetSplitter)
-        self.card.train_val_test = dataset_splitter.split(*message.transform.tf_dataset)  # type: ignore
+        X, y = message.transform.tf_dataset  # type: ignore
+        train_indices, val_indices, test_indices = dataset_splitter.split_indices(y)
+        self.card.folds = dataset_splitter.folds(y, train_indices + val_indices) or None
+        # Folds are applied to the ingested dataset by the train step, hence must index the same rows
+        if self.card.folds and X.shape[0] != y.shape[0]:
+            raise MlflowException(ROW_DROPPING_FILTERS_MESSAGE, error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE)
+        # Memory-mapped features are split into files of the step output, replaced when it runs again
+        features_dir = os.path.join(self.card.step_output_path, FEATURES_DIR)
+        shutil.rmtree(features_dir, ignore_errors=True)
+        with derived_matrix_directory(features_dir):
+            self.card.train_val_test = dataset_splitter.take(X, y, train_indices, val_indices, test_indices)
+        self.card.feature_memory = FeatureMemory.from_datasets(X for X, _ in self.card.train_val_test)
         return message
 
 
@@ -71,17 +139,54 @@ class ClassificationTrainStep(TrainStep[ClassificationTrainConfig]):
     def _run(self, message: StepMessage) -> StepMessage:
         model: Any = self.get_step_result()
         self.validate_step_result(model, Model)
+        if message.split.folds:  # type: ignore
+            with stage('cross_validation'):
+                self.card.cv_metrics = self._cross_validate(model, message)
         (X_train, y_train), (X_val, y_val), _ = message.split.train_val_test  # type: ignore
-        model.fit(X_train.collect(), y_train.collect())
+        with stage('fit'):
+            model.fit(X_train.collect(), y_train.collect())
         self.card.mod = model
         self.card.mod_outputs = model.get_model_outputs()
-        self.card.val_metric = model.score(
-            X_val.collect(),
-            y_val.collect(),
+        self.card.bundle_path = os.path.join(self.card.step_output_path, INFERENCE_BUNDLE_NAME)
+        with stage('save_bundle'):
+            manifest = save_bundle(
+                self.card.bundle_path,
+                {'transformer': load_bundle(message.transform.transformer_path)['transformer'], 'model': model},  # type: ignore
+                self.context.compression,
+            )
+        self.card.bundle_compression = CompressionStats(**manifest['compression'])
+        with stage(f'validation/{self.conf.validation_metric.name.value}'):
+            self.card.val_metric = model.score(
+                X_val.collect(),
+                y_val.collect(),
+                metric=get_score_class(self.conf.validation_metric.name),
+                **self.conf.validation_metric.params,
+            )
+        return message
+
+    def _cross_validate(self, model: Model, message: StepMessage) -> List[float]:
+        from ml_easy.recipes.steps.train.cross_validation import (
+            CrossValidator,
+            FoldTransformCache,
+        )
+
+        transformer = load_bundle(message.transform.transformer_path)['transformer']  # type: ignore
+        X, y = get_features_target(message.ingest.dataset, self.context.target_col)  # type: ignore
+        config_digest = hashlib.sha256(
+            f"{transformer.__class__.__qualname__}:{self.context.feature_dtype.value}:"
+            f"{message.transform.config.model_dump_json()}".encode()  # type: ignore
+        ).hexdigest()
+        cache = FoldTransformCache(os.path.join(self.card.step_output_path, CV_CACHE_DIR))
+        return CrossValidator(cache, n_jobs=self.conf.n_jobs).run(
+            model,
+            transformer,
+            config_digest,
+            X,
+            y,
+            message.split.folds,  # type: ignore
             metric=get_score_class(self.conf.validation_metric.name),
             **self.conf.validation_metric.params,
         )
-        return message
 
 
 class ClassificationEvaluateStep(EvaluateStep[ClassificationEvaluateConfig]):
@@ -92,13 +197,15 @@ class ClassificationEvaluateStep(EvaluateStep[ClassificationEvaluateConfig]):
         _, _, (X_test, y_test) = message.split.train_val_test  # type: ignore
         model: Model = message.train.mod  # type: ignore
         metrics_eval: List[Metric] = []
+        X_test, y_test = X_test.collect(), y_test.collect()
         for criteria in self.conf.validation_criteria:
-            score: float = model.score(
-                X_test.collect(),
-                y_test.collect(),
-                metric=get_score_class(criteria.metric.name),
-                **criteria.metric.params,
-            )
+            with stage(f'metric/{criteria.metric.name.value}'):
+                score: float = model.score(
+                    X_test,
+                    y_test,
+                    metric=get_score_class(criteria.metric.name),
+                    **criteria.metric.params,
+                )
             metrics_eval.append(Metric(name=criteria.metric, value=score))
         self.card.metrics_eval = metrics_eval
         return message
@@ -109,6 +216,8 @@ class ClassificationRegisterStep(RegisterStep[ClassificationRegisterConfig]):
         super().__init__(register_config, context)
 
     def _run(self, message: StepMessage) -> StepMessage:
+        from ml_easy.recipes.steps.register.registry import Registry
+
         registry: Any = self.get_step_result()
         self.validate_step_result(registry, Registry)
         registry.log_model(message)  # type: ignore
@@ -8,12 +8,34 @@ ENCODING = 'utf-8'
 RECIPE_CONFIG_FILE_NAME = 'recipe.yaml'
 RECIPE_PROFILE_DIR = 'profiles'
 EXECUTION_STATE_FILE_NAME = 'execution_state.json'
+TRACES_SUBDIRECTORY_NAME = 'traces'
 CUSTOM_STEPS_DIR = 'steps'
 SUFFIX_FN = '_fn'
+CV_CACHE_DIR = 'cv_cache'
+FEATURES_DIR = 'features'
+FEATURES_MATRIX_NAME = 'X'
+MEMMAP_META_FILE_NAME = 'meta.json'
+TRANSFORMER_FILE_NAME = 'transformer.pkl'
+TRANSFORMER_BUNDLE_NAME = 'transformer.bundle'
+TRANSFORMER_ARTIFACT_PATH = 'transformer'
+INFERENCE_BUNDLE_NAME = 'inference.bundle'
+INFERENCE_BUNDLE_ARTIFACT_PATH = 'bundle'
+BUNDLE_MANIFEST_FILE_NAME = 'manifest.json'
+BUNDLE_OBJECTS_FILE_NAME = 'objects.pkl'
+BUNDLE_SEGMENTS_FILE_NAME = 'segments.bin'
+BLOB_COMPLETE_MARKER = '_SUCCESS'
+BLOB_DATASET_FILE_NAME = 'dataset.json'
+BLOB_TREE_SUFFIX = '.tree.json'
+BLOB_STORE_URI_TAG = 'ml_easy.blob_store_uri'
+BLOB_REF_TAG_PREFIX = 'ml_easy.blob.'
 
 FILTER_TO_MODULE = {
     FilterType['EQUAL']: 'ml_easy.recipes.steps.transform.filters.EqualFilter',
     FilterType['IN']: 'ml_easy.recipes.steps.transform.filters.InFilter',
+    FilterType['RANGE']: 'ml_easy.recipes.steps.transform.filters.RangeFilter',
+    FilterType['REGEX']: 'ml_easy.recipes.steps.transform.filters.RegexFilter',
+    FilterType['NULL']: 'ml_easy.recipes.steps.transform.filters.NullFilter',
+    FilterType['LENGTH']: 'ml_easy.recipes.steps.transform.filters.LengthFilter',
 }
 
 SOURCE_TO_MODULE = {
@@ -4,6 +4,7 @@ from enum import Enum
 class MLFlowErrorCode(Enum):
     INTERNAL_ERROR = 1
     INVALID_PARAMETER_VALUE = 2
+    RESOURCE_EXHAUSTED = 3
 
 
 class StepStatus(Enum):
@@ -39,6 +40,33 @@ class StepExecutionStateKeys(Enum):
     KEY_STATUS = 'recipe_step_execution_status'
     KEY_LAST_UPDATED_TIMESTAMP = 'recipe_step_execution_last_updated_timestamp'
     KEY_STACK_TRACE = 'recipe_step_stack_trace'
+    KEY_METRICS = 'recipe_step_execution_metrics'
+
+
+class FeatureDtype(Enum):
+    """
+    Value type of the feature matrices built by the transform step.
+    """
+
+    FLOAT32 = 'float32'
+    FLOAT64 = 'float64'
+
+
+class FeatureStorage(Enum):
+    """
+    Where the transform step keeps the feature matrix: in memory, or in memory-mapped files of its
+    output directory.
+    """
+
+    MEMORY = 'memory'
+    MEMMAP = 'memmap'
+
+
+class CompressionCodec(Enum):
+    NONE = 'none'
+    GZIP = 'gzip'
+    LZ4 = 'lz4'
+    ZSTD = 'zstd'
 
 
 class EncodingType(Enum):
@@ -65,7 +93,23 @@ class ScoreType(Enum):
 class FilterType(Enum):
     EQUAL = 'EqualFilter'
     IN = 'InFilter'
+    RANGE = 'RangeFilter'
+    REGEX = 'RegexFilter'
+    NULL = 'NullFilter'
+    LENGTH = 'LengthFilter'
 
 
 class SourceType(Enum):
     SQL_ALCHEMY_BASED = 'sql_alchemy_based'
+
+
+class PredictionSinkType(Enum):
+    PARQUET = 'parquet'
+    SQL = 'sql'
+
+
+class SqlReadEngine(Enum):
+    ADBC = 'adbc'
+    CONNECTORX = 'connectorx'
+    SQLALCHEMY = 'sqlalchemy'
+    PANDAS = 'pandas'
@@ -47,6 +47,35 @@ class _EnvironmentVariable:
         return self.name.__format__(format_spec)
 
 
+class _BooleanEnvironmentVariable(_EnvironmentVariable):
+    """
+    Represents a boolean environment variable, set to ``true``/``1`` or ``false``/``0``.
+    """
+
+    def __init__(self, name: str, default: bool):
+        super().__init__(name, bool, default)
+
+    def get(self):
+        if (val := self.get_raw()) is None:
+            return self.default
+        lowercased = val.lower()
+        if lowercased not in ('true', 'false', '1', '0'):
+            raise ValueError(
+                f"{self.name} value must be one of ['true', 'false', '1', '0'] (case-insensitive), got {val!r}"
+            )
+        return lowercased in ('true', '1')
+
+
 #: Specifies the execution directory for recipes.
 #: (default: ``None``)
 MLFLOW_RECIPES_EXECUTION_DIRECTORY = _EnvironmentVariable('MLFLOW_RECIPES_EXECUTION_DIRECTORY', str, None)
+
+#: Specifies whether recipe runs write a Chrome trace-event file of their spans to the
+#: ``traces`` directory of the execution directory.
+#: (default: ``False``)
+MLFLOW_RECIPES_TRACE = _BooleanEnvironmentVariable('MLFLOW_RECIPES_TRACE', False)
+
+#: Specifies whether the step modules of a recipe (``steps/<step>.py``) are imported when the recipe
+#: is built rather than when each step runs.
+#: (default: ``False``)
+MLFLOW_RECIPES_PRELOAD_STEPS = _BooleanEnvironmentVariable('MLFLOW_RECIPES_PRELOAD_STEPS', False)
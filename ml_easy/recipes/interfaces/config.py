@@ -1,10 +1,21 @@
 from abc import abstractmethod
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
+from ml_easy.recipes.enum import CompressionCodec, FeatureDtype, FeatureStorage
+
 
 class BaseStepConfig(BaseModel):
-    pass
+    """
+    Settings shared by every step. ``memory_budget_mb`` caps the resident memory of the process
+    while the step runs: the step fails with an error at its next stage once it is exceeded rather
+    than being killed by the kernel. ``trace_allocations`` reports the lines holding the most memory at the
+    end of the step, at the cost of slowing allocations down while it runs.
+    """
+
+    memory_budget_mb: Optional[int] = None
+    trace_allocations: bool = False
 
 
 class BaseStepsConfig(BaseModel):
@@ -17,10 +28,30 @@ class Experiment(BaseModel):
     tracking_uri: str
 
 
+class CompressionConfig(BaseModel):
+    codec: CompressionCodec = CompressionCodec.NONE
+    level: Optional[int] = None
+    # Compressed segments can no longer be memory-mapped and are decompressed in memory on load.
+    compress_segments: bool = False
+
+
+class FeatureStorageConfig(BaseModel):
+    """
+    With ``memmap`` storage, the transform step writes the feature matrix ``batch_rows`` rows at a
+    time to memory-mapped files of its output directory, so that it does not have to fit in memory.
+    """
+
+    kind: FeatureStorage = FeatureStorage.MEMORY
+    batch_rows: int = 10_000
+
+
 class Context(BaseModel):
     recipe_root_path: str
     target_col: str
     experiment: Experiment
+    feature_dtype: FeatureDtype = FeatureDtype.FLOAT32
+    compression: CompressionConfig = CompressionConfig()
+    feature_storage: FeatureStorageConfig = FeatureStorageConfig()
 
 
 class BaseRecipeConfig(BaseModel):
@@ -33,5 +64,58 @@ class BaseRecipeConfig(BaseModel):
         pass
 
 
+class StageMetrics(BaseModel):
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+
+
+class AllocationSite(BaseModel):
+    location: str
+    size_bytes: int
+    count: int
+
+
+class StepMemoryMetrics(BaseModel):
+    """
+    Memory use of a step run. ``peak_rss_delta_bytes`` is how much the resident memory of the
+    process grew over the step at its peak; ``payload_nbytes`` is the in-memory size of the
+    datasets the card holds, by field.
+    """
+
+    rss_start_bytes: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None
+    peak_rss_delta_bytes: Optional[int] = None
+    payload_nbytes: Dict[str, int] = {}
+    traced_peak_bytes: Optional[int] = None
+    top_allocations: List[AllocationSite] = []
+
+
+class StepExecutionMetrics(BaseModel):
+    """
+    Timings and data volumes of a step run. CPU time is the one of the whole process, so that it
+    includes the threads the step starts. Stages are keyed by their ``/``-separated nesting path.
+    """
+
+    wall_seconds: float
+    cpu_seconds: float
+    input_rows: Optional[int] = None
+    input_cols: Optional[int] = None
+    output_rows: Optional[int] = None
+    output_cols: Optional[int] = None
+    output_nnz: Optional[int] = None
+    rows_per_sec: Optional[float] = None
+    stages: Dict[str, StageMetrics] = {}
+    counters: Dict[str, float] = {}
+    memory: Optional[StepMemoryMetrics] = None
+
+
 class BaseCard(BaseModel):
     step_output_path: str
+    execution_metrics: Optional[StepExecutionMetrics] = None
+
+    def datasets(self) -> List[Any]:
+        """
+        The feature datasets the step produced, used to measure its output.
+        """
+        return []
@@ -0,0 +1,216 @@
+from abc import ABC, abstractmethod
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Self,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import numpy as np
+
+from ml_easy.recipes.enum import MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.steps.steps_config import SourceConfig
+from ml_easy.recipes.steps.transform.filters import Filter
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from mlflow.data.dataset import Dataset as MLflowDataset  # type: ignore
+    from polars._typing import ConcatMethod
+    from scipy.sparse import csr_matrix  # type: ignore
+
+    from ml_easy.recipes.steps.transform.filter_plan import FilterPlan
+
+V = TypeVar('V')
+
+
+class Dataset(ABC, Generic[V]):
+
+    def __init__(self, service: V):
+        self.service = service
+
+    @abstractmethod
+    def __iter__(self) -> Iterable:
+        pass
+
+    def __getitem__(self, indices):
+        return self._getitem(indices)
+
+    @abstractmethod
+    def _getitem(self, indices):
+        pass
+
+    @property
+    @abstractmethod
+    def shape(self) -> Tuple[int, ...]:
+        pass
+
+    @abstractmethod
+    def to_pandas(self) -> 'pd.DataFrame':
+        pass
+
+    @abstractmethod
+    def to_numpy(self) -> np.ndarray[Any, Any]:
+        pass
+
+    @abstractmethod
+    def to_csr(self) -> 'csr_matrix':
+        pass
+
+    @classmethod
+    @abstractmethod
+    def from_numpy(
+        cls,
+        data: np.ndarray[Any, Any],
+    ) -> Self:
+        pass
+
+    @abstractmethod
+    def select(self, *args: Any, **kwargs: Any) -> Self:
+        pass
+
+    @property
+    @abstractmethod
+    def columns(self) -> List[str]:
+        pass
+
+    @property
+    @abstractmethod
+    def dtypes(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def collect(self, streaming: bool = False) -> Self:
+        pass
+
+    @abstractmethod
+    def filter(self, filters: Union['FilterPlan', Mapping[str, Sequence[Filter]]]) -> Self:
+        """
+        Keeps the rows satisfying every filter of every column, given as filters or as a compiled ``FilterPlan``.
+        """
+
+    @abstractmethod
+    def drop_nulls(
+        self,
+        subset: Union[str, List[str], None] = None,
+    ) -> Self:
+        pass
+
+    @classmethod
+    @abstractmethod
+    def concat(
+        cls, items: Iterable[Self], *, how: 'ConcatMethod' = 'vertical', rechunk: bool = False, parallel: bool = True
+    ) -> Self:
+        pass
+
+    @abstractmethod
+    def concatenate(
+        self, items: Iterable[Self], *, how: 'ConcatMethod' = 'vertical', rechunk: bool = False, parallel: bool = True
+    ) -> Self:
+        pass
+
+    @abstractmethod
+    def slice(self, offset: int, length: int | None = None) -> Self:
+        pass
+
+    @abstractmethod
+    def iter_batches(self, batch_size: int, columns: Optional[Sequence[str]] = None) -> Iterator[Self]:
+        """
+        Consecutive blocks of ``batch_size`` rows, restricted to ``columns`` when given, for
+        processing the dataset in bounded memory. Batches are views of the dataset wherever its
+        storage allows it.
+        """
+
+    @abstractmethod
+    def map_str(self, udf_map: Dict[str, Callable[[str], str]], dedupe: bool = False, n_workers: int = 1) -> Self:
+        """
+        Maps each column of ``udf_map`` through its function. With ``dedupe`` the function is
+        only called once per distinct value of the column, for columns with repeated values. With
+        more than one worker the values are mapped in a pool of ``n_workers`` processes, which
+        requires picklable functions.
+        """
+
+    @abstractmethod
+    def map_str_batches(
+        self,
+        udf_map: Dict[str, Callable[[Sequence[str]], Sequence[str]]],
+        batch_size: Optional[int] = 1024,
+        dedupe: bool = False,
+        n_workers: int = 1,
+    ) -> Self:
+        """
+        Maps each column of ``udf_map`` through its function, called on lists of ``batch_size``
+        values (all the values of the column when None) so that it can vectorize over them.
+        """
+
+    def split(
+        self, train_prop: float, val_prop: float, seed: Optional[int] = None
+    ) -> Tuple[List[int], List[int], List[int]]:
+        total_samples = self.shape[0]
+        train_size = int(train_prop * total_samples)
+        val_size = int(val_prop * total_samples)
+
+        indices = np.arange(total_samples)
+        if seed is None:
+            np.random.shuffle(indices)
+        else:
+            np.random.default_rng(seed).shuffle(indices)
+
+        train_indices = indices[:train_size]
+        val_indices = indices[train_size : train_size + val_size]
+        test_indices = indices[train_size + val_size :]
+
+        return train_indices.tolist(), val_indices.tolist(), test_indices.tolist()
+
+    def kfold(
+        self, n_folds: int, indices: Optional[List[int]] = None, seed: Optional[int] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Partitions the rows referenced by ``indices`` (all rows by default) into ``n_folds``
+        folds. Each fold is a ``(train_indices, val_indices)`` pair, the validation indices
+        being views over a single shuffled index array.
+        """
+        if n_folds < 2:
+            raise MlflowException(
+                f'n_folds should be at least 2, got {n_folds}',
+                error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+            )
+        permutation = np.arange(self.shape[0]) if indices is None else np.asarray(indices, dtype=np.int64).copy()
+        if seed is None:
+            np.random.shuffle(permutation)
+        else:
+            np.random.default_rng(seed).shuffle(permutation)
+        bounds = np.linspace(0, len(permutation), n_folds + 1).astype(np.int64)
+        folds = []
+        for k in range(n_folds):
+            val_indices = permutation[bounds[k] : bounds[k + 1]]
+            train_indices = np.concatenate([permutation[: bounds[k]], permutation[bounds[k + 1] :]])
+            folds.append((train_indices, val_indices))
+        return folds
+
+    @property
+    @abstractmethod
+    def hash_dataset(self) -> str:
+        pass
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """
+        In-memory size of the data held by the dataset.
+        """
+
+    @abstractmethod
+    def get_mlflow_dataset(self, conf: SourceConfig) -> 'MLflowDataset':
+        pass
@@ -1,18 +1,23 @@
 import abc
 import logging
-from typing import Any, Dict, Generic, List, Type, TypeVar
+import os
+import threading
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar
 
 from ml_easy.recipes.enum import MLFlowErrorCode
+from ml_easy.recipes.env_vars import MLFLOW_RECIPES_PRELOAD_STEPS
 from ml_easy.recipes.exceptions import MlflowException
 from ml_easy.recipes.interfaces.config import BaseRecipeConfig, BaseStepConfig
 from ml_easy.recipes.interfaces.step import BaseStep
-from ml_easy.recipes.io.RecipeYAMLoader import RecipeYAMLoader, YamlLoader
+from ml_easy.recipes.io.RecipeYAMLoader import RecipeYAMLoader, YamlLoader, digest_input
 from ml_easy.recipes.steps.cards_config import StepMessage
 from ml_easy.recipes.steps.steps_config import RecipePathsConfig
+from ml_easy.recipes.tracing import trace_run
 from ml_easy.recipes.utils import (
     get_class_from_string,
     get_or_create_execution_directory,
     get_recipe_name,
+    load_step_module,
 )
 
 _logger = logging.getLogger(__name__)
@@ -39,19 +44,34 @@ class BaseRecipe(abc.ABC, Generic[U]):
         """
         self._conf: U = conf
         self.steps: List[BaseStep] = self._resolve_recipe_steps()
+        if MLFLOW_RECIPES_PRELOAD_STEPS.get():
+            self.preload_step_modules()
 
     def _resolve_recipe_steps(self) -> List[BaseStep]:
         steps: List[BaseStep] = []
         for step_name in self._conf.get_steps.model_fields.keys():
-            step_class: Type[BaseStep] = self.recipe_steps[step_name]
+            # Step classes are imported only once the recipe is built, with their dependencies
+            step_class: Type[BaseStep] = RecipeFactory.load_class(self.recipe_steps[step_name])
             step_config: BaseStepConfig = getattr(self._conf.get_steps, step_name)
             steps.append(step_class(step_config, self._conf.context))
         return steps
 
+    def preload_step_modules(self) -> None:
+        """
+        Imports the step modules of the recipe ahead of its run, so that their top-level imports are
+        paid once. The modules are cached and only executed again once their file changes.
+        """
+        for step in self.steps:
+            file_path = step.get_module_name_for_step_function()
+            if os.path.exists(file_path):
+                load_step_module(file_path)
+
     @property
     @abc.abstractmethod
-    def recipe_steps(self) -> Dict[str, Type[BaseStep]]:
-        pass
+    def recipe_steps(self) -> Dict[str, str]:
+        """
+        Fully qualified class name of the step run for each step of the recipe configuration.
+        """
 
     def run(self) -> StepMessage:
         """
@@ -61,9 +81,10 @@ class BaseRecipe(abc.ABC, Generic[U]):
             None
         """
         message = StepMessage()
-        get_or_create_execution_directory(self.steps)
-        for step in self.steps:
-            message = step.run(message)
+        execution_directory = get_or_create_execution_directory(self.steps)
+        with trace_run(execution_directory, self.__class__.__name__):
+            for step in self.steps:
+                message = step.run(message)
         return message
 
 
@@ -79,6 +100,10 @@ class RecipeFactory:
 
     """
 
+    # Validated configurations, keyed by recipe root and profile, with the digests of the inputs they were rendered from
+    _config_cache: Dict[Tuple[str, Optional[str]], Tuple[Dict[Tuple[str, str], Optional[str]], Any]] = {}
+    _config_cache_lock = threading.Lock()
+
     @classmethod
     def create_recipe(cls, recipe_paths_config: RecipePathsConfig) -> BaseRecipe:
         """
@@ -116,10 +141,35 @@ class RecipeFactory:
 
     @classmethod
     def read_config(cls, recipe_paths_config: RecipePathsConfig) -> Any:
-        reader: YamlLoader = RecipeYAMLoader(recipe_paths_config.recipe_root_path, recipe_paths_config.profile)
+        """
+        Renders and validates the recipe configuration. The validated configuration is cached until
+        the content of any file (recipe, profile, included templates, ``from_json`` files) or any
+        environment variable read while rendering it changes; each call returns its own copy.
+        """
+        key = (os.path.abspath(recipe_paths_config.recipe_root_path), recipe_paths_config.profile)
+        with cls._config_cache_lock:
+            cached = cls._config_cache.get(key)
+        if cached is not None:
+            inputs, cached_config = cached
+            if all(digest_input(kind, name) == digest for (kind, name), digest in inputs.items()):
+                _logger.debug(f"Using the cached configuration of recipe {key[0]} with profile {key[1]}")
+                return cached_config.model_copy(deep=True)
+        reader = RecipeYAMLoader(recipe_paths_config.recipe_root_path, recipe_paths_config.profile)
+        config = cls._validate_config(reader)
+        with cls._config_cache_lock:
+            cls._config_cache[key] = (reader.inputs, config)
+        return config.model_copy(deep=True)
+
+    @classmethod
+    def _validate_config(cls, reader: YamlLoader) -> Any:
         config: Dict[str, Any] = reader.as_dict()
         recipe: str = config['recipe']
         recipe_path: str = recipe.replace('/', '.').replace('@', '.')
         conf_class_name: str = f"ml_easy.recipes.{recipe_path}.ConfigImpl"
         conf_class_module = cls.load_class(conf_class_name)
         return conf_class_module.model_validate(config)
+
+    @classmethod
+    def clear_config_cache(cls) -> None:
+        with cls._config_cache_lock:
+            cls._config_cache.clear()
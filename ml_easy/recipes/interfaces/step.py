@@ -13,8 +13,15 @@ from ml_easy.recipes.constants import (
 )
 from ml_easy.recipes.enum import MLFlowErrorCode, StepExecutionStateKeys, StepStatus
 from ml_easy.recipes.exceptions import MlflowException
-from ml_easy.recipes.interfaces.config import BaseCard, BaseStepConfig, Context
+from ml_easy.recipes.interfaces.config import (
+    BaseCard,
+    BaseStepConfig,
+    Context,
+    StepExecutionMetrics,
+)
+from ml_easy.recipes.profiling import MemoryMonitor, StepRecorder, record_step
 from ml_easy.recipes.steps.cards_config import StepMessage
+from ml_easy.recipes.tracing import span
 from ml_easy.recipes.utils import (
     get_fully_qualified_module_name_for_step,
     get_step_fn,
@@ -34,7 +41,13 @@ class StepExecutionState:
     the time of the last status update.
     """
 
-    def __init__(self, status: StepStatus, last_updated_timestamp: float, stack_trace: Optional[str]):
+    def __init__(
+        self,
+        status: StepStatus,
+        last_updated_timestamp: float,
+        stack_trace: Optional[str],
+        metrics: Optional[StepExecutionMetrics] = None,
+    ):
         """
         Args:
             status: The execution status of the step.
@@ -42,10 +55,12 @@ class StepExecutionState:
                 in seconds since the UNIX epoch.
             stack_trace: The stack trace of the last execution. None if the step execution
                 succeeds.
+            metrics: Timings and data volumes of the last execution. None while the step runs.
         """
         self.status = status
         self.last_updated_timestamp = last_updated_timestamp
         self.stack_trace = stack_trace
+        self.metrics = metrics
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -55,6 +70,7 @@ class StepExecutionState:
             StepExecutionStateKeys.KEY_STATUS.name: self.status.value,
             StepExecutionStateKeys.KEY_LAST_UPDATED_TIMESTAMP.name: self.last_updated_timestamp,
             StepExecutionStateKeys.KEY_STACK_TRACE.name: self.stack_trace,
+            StepExecutionStateKeys.KEY_METRICS.name: self.metrics.model_dump() if self.metrics else None,
         }
 
     @classmethod
@@ -62,10 +78,12 @@ class StepExecutionState:
         """
         Creates a ``StepExecutionState`` instance from the specified execution state dictionary.
         """
+        metrics = state_dict.get(StepExecutionStateKeys.KEY_METRICS.name)
         return cls(
-            status=StepStatus[state_dict[StepExecutionStateKeys.KEY_STATUS]],
-            last_updated_timestamp=state_dict[StepExecutionStateKeys.KEY_LAST_UPDATED_TIMESTAMP],
-            stack_trace=state_dict[StepExecutionStateKeys.KEY_STACK_TRACE],
+            status=StepStatus(state_dict[StepExecutionStateKeys.KEY_STATUS.name]),
+            last_updated_timestamp=state_dict[StepExecutionStateKeys.KEY_LAST_UPDATED_TIMESTAMP.name],
+            stack_trace=state_dict[StepExecutionStateKeys.KEY_STACK_TRACE.name],
+            metrics=StepExecutionMetrics.model_validate(metrics) if metrics else None,
         )
 
 
@@ -105,17 +123,33 @@ class BaseStep(Generic[U, V], ABC):
     def run(self, message: StepMessage) -> StepMessage:
 
         _logger.info(f"Running step {self.name}...")
+        recorder = StepRecorder()
+        memory = MemoryMonitor(self.name, self.conf.memory_budget_mb, self.conf.trace_allocations)
         try:
             self._update_status(status=StepStatus.RUNNING, output_directory=self.card.step_output_path)
             self.validate_previous_step(message)
-            message = self._run(message)
+            with span(self.name, 'step'), memory, record_step() as recorder:
+                message = self._run(message)
+            self.card.execution_metrics = self._execution_metrics(recorder, memory, message)
             self.update_message(message)
-            self._update_status(status=StepStatus.SUCCEEDED, output_directory=self.card.step_output_path)
+            _logger.info(
+                f"Step {self.name} ran in {self.card.execution_metrics.wall_seconds:.2f}s "
+                f"({self.card.execution_metrics.cpu_seconds:.2f}s CPU), "
+                f"peak RSS delta {self.card.execution_metrics.memory.peak_rss_delta_bytes} bytes"  # type: ignore
+            )
+            self._update_status(
+                status=StepStatus.SUCCEEDED,
+                output_directory=self.card.step_output_path,
+                metrics=self.card.execution_metrics,
+            )
             return message
         except Exception:
             stack_trace = traceback.format_exc()
             self._update_status(
-                status=StepStatus.FAILED, output_directory=self.card.step_output_path, stack_trace=stack_trace
+                status=StepStatus.FAILED,
+                output_directory=self.card.step_output_path,
+                stack_trace=stack_trace,
+                metrics=recorder.to_metrics(memory=memory.to_metrics()),
             )
             raise
 
@@ -123,9 +157,24 @@ class BaseStep(Generic[U, V], ABC):
     def _run(self, message: StepMessage) -> StepMessage:
         pass
 
+    def _execution_metrics(
+        self, recorder: StepRecorder, memory: MemoryMonitor, message: StepMessage
+    ) -> StepExecutionMetrics:
+        previous_card = getattr(message, self.previous_step_name) if self.previous_step_name else None
+        inputs = previous_card.datasets() if previous_card is not None else []
+        return recorder.to_metrics(inputs=inputs, outputs=self.card.datasets(), memory=memory.to_metrics(self.card))
+
     @classmethod
-    def _update_status(cls, status: StepStatus, output_directory: str, stack_trace: Optional[str] = None) -> None:
-        execution_state = StepExecutionState(status=status, last_updated_timestamp=time.time(), stack_trace=stack_trace)
+    def _update_status(
+        cls,
+        status: StepStatus,
+        output_directory: str,
+        stack_trace: Optional[str] = None,
+        metrics: Optional[StepExecutionMetrics] = None,
+    ) -> None:
+        execution_state = StepExecutionState(
+            status=status, last_updated_timestamp=time.time(), stack_trace=stack_trace, metrics=metrics
+        )
         with open(os.path.join(output_directory, EXECUTION_STATE_FILE_NAME), 'w') as f:
             json.dump(execution_state.to_dict(), f)
 
@@ -1,9 +1,10 @@
+import hashlib
 import json
 import logging
 import os
 import posixpath
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import yaml
 
@@ -15,6 +16,30 @@ from ml_easy.recipes.constants import (
 
 _logger = logging.getLogger(__name__)
 
+FILE_INPUT = 'file'
+ENV_INPUT = 'env'
+
+
+def digest_file(path: str) -> Optional[str]:
+    """
+    SHA-256 of the content of ``path``, None if it does not exist.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def digest_input(kind: str, name: str) -> Optional[str]:
+    """
+    Current digest of an input of the rendered configuration: a file path or an environment variable.
+    """
+    if kind == FILE_INPUT:
+        return digest_file(name)
+    value = os.environ.get(name)
+    return hashlib.sha256(value.encode()).hexdigest() if value is not None else None
+
 
 class YamlLoader(ABC):
 
@@ -31,6 +56,15 @@ class RecipeYAMLoader(YamlLoader):
     def __init__(self, recipe_root_path: str, profile: Optional[str] = None):
         self._recipe_root_path = recipe_root_path
         self._profile = profile
+        # Digest of every file and environment variable read by the last ``read``, keyed by (kind, name)
+        self.inputs: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def _track(self, kind: str, name: str, content: Optional[bytes] = None) -> None:
+        # Files are digested from the content actually read, so that a concurrent edit invalidates the cache
+        if content is not None:
+            self.inputs[(kind, name)] = hashlib.sha256(content).hexdigest()
+        else:
+            self.inputs[(kind, name)] = digest_input(kind, name)
 
     class UniqueKeyLoader(yaml.CSafeLoader):
         def construct_mapping(self, node, deep=False):
@@ -50,19 +84,32 @@ class RecipeYAMLoader(YamlLoader):
 
         template_path = os.path.join(self._recipe_root_path, template_name)
         context_path = os.path.join(self._recipe_root_path, context_name)
+        track = self._track
+
+        class TrackingLoader(FileSystemLoader):
+            def get_source(self, environment, template):
+                source, filename, uptodate = super().get_source(environment, template)
+                track(FILE_INPUT, os.path.abspath(filename), source.encode(ENCODING))
+                return source, filename, uptodate
 
         j2_env = SandboxedEnvironment(
-            loader=FileSystemLoader(self._recipe_root_path, encoding=ENCODING),
+            loader=TrackingLoader(self._recipe_root_path, encoding=ENCODING),
             undefined=StrictUndefined,
             line_comment_prefix='#',
         )
 
         def from_json(input_var):
-            with open(input_var, encoding=ENCODING) as f:
-                return json.load(f)
+            with open(input_var, 'rb') as f:
+                content = f.read()
+            self._track(FILE_INPUT, os.path.abspath(input_var), content)
+            return json.loads(content.decode(ENCODING))
+
+        def env(key):
+            self._track(ENV_INPUT, key)
+            return os.environ.get(key)
 
         j2_env.filters['from_json'] = from_json
-        j2_env.filters['env'] = lambda key: os.environ.get(key)
+        j2_env.filters['env'] = env
         # Compute final source of context file (e.g. my-profile.yml), applying Jinja filters
         # like from_json as needed to load context information from files, then load into a dict
         context = j2_env.get_template(context_name).render({})
@@ -73,12 +120,16 @@ class RecipeYAMLoader(YamlLoader):
         return source
 
     def read(self) -> str:
+        self.inputs = {}
         try:
             if self._profile:
                 return self.render_and_merge_yaml()
             else:
                 recipe_file_name = os.path.join(self._recipe_root_path, RECIPE_CONFIG_FILE_NAME)
-                return open(recipe_file_name, 'r').read()
+                with open(recipe_file_name, 'rb') as f:
+                    content = f.read()
+                self._track(FILE_INPUT, os.path.abspath(recipe_file_name), content)
+                return content.decode(ENCODING)
         except Exception as e:
             _logger.error('Failed to get recipe config', exc_info=e)
             raise
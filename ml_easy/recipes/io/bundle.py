@@ -0,0 +1,123 @@
+import json
+import mmap
+import os
+import pickle
+import time
+from typing import Any, Dict, List, Optional
+
+from ml_easy.recipes.constants import (
+    BUNDLE_MANIFEST_FILE_NAME,
+    BUNDLE_OBJECTS_FILE_NAME,
+    BUNDLE_SEGMENTS_FILE_NAME,
+)
+from ml_easy.recipes.enum import CompressionCodec, MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.config import CompressionConfig
+from ml_easy.recipes.io.compression import CountingWriter, open_reader, open_writer
+
+BUNDLE_FORMAT_VERSION = 2
+# Version 1 bundles are the uncompressed ones, which version 2 readers still load.
+_SUPPORTED_FORMAT_VERSIONS = (1, 2)
+# Segments start on cache-line boundaries so that the arrays mapped over them are aligned.
+_SEGMENT_ALIGNMENT = 64
+# Buffers smaller than this stay inside the pickle stream rather than getting their own segment.
+_MIN_SEGMENT_NBYTES = 1 << 16
+
+
+def save_bundle(path: str, objects: Dict[str, Any], compression: Optional[CompressionConfig] = None) -> Dict[str, Any]:
+    """
+    Writes ``objects`` as a bundle directory. The objects are pickled with protocol 5; the large
+    contiguous buffers they hold (numpy arrays such as idf vectors, model coefficients, sparse
+    matrix buffers) are written out-of-band, one aligned segment each, into a single segments file
+    described by a JSON manifest.
+
+    The pickle stream is compressed as it is written with the ``compression`` codec. Segments stay
+    raw so that they can be memory-mapped, unless ``compress_segments`` is set.
+
+    Returns:
+        The manifest of the bundle, whose ``compression`` entry holds the raw and stored sizes and
+        the time spent writing.
+    """
+    compression = compression or CompressionConfig()
+    os.makedirs(path, exist_ok=True)
+    buffers: List[pickle.PickleBuffer] = []
+
+    def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+        if buffer.raw().nbytes < _MIN_SEGMENT_NBYTES:
+            return True
+        buffers.append(buffer)
+        return False
+
+    start = time.perf_counter()
+    objects_path = os.path.join(path, BUNDLE_OBJECTS_FILE_NAME)
+    with open_writer(objects_path, compression.codec, compression.level) as f:
+        writer = CountingWriter(f)
+        pickle.dump(objects, writer, protocol=5, buffer_callback=buffer_callback)  # type: ignore
+    segments = []
+    offset = 0
+    segments_path = os.path.join(path, BUNDLE_SEGMENTS_FILE_NAME)
+    segments_codec = compression.codec if compression.compress_segments else CompressionCodec.NONE
+    with open_writer(segments_path, segments_codec, compression.level) as f:
+        for buffer in buffers:
+            raw = buffer.raw()
+            padding = -offset % _SEGMENT_ALIGNMENT
+            f.write(b'\0' * padding)
+            offset += padding
+            f.write(raw)
+            segments.append({'offset': offset, 'nbytes': raw.nbytes})
+            offset += raw.nbytes
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'objects': list(objects),
+        'pickle_nbytes': writer.nbytes,
+        'segments': segments,
+        'compression': {
+            'codec': compression.codec.value,
+            'level': compression.level,
+            'compress_segments': compression.compress_segments,
+            'raw_nbytes': writer.nbytes + offset,
+            'stored_nbytes': os.path.getsize(objects_path) + os.path.getsize(segments_path),
+            'seconds': time.perf_counter() - start,
+        },
+    }
+    with open(os.path.join(path, BUNDLE_MANIFEST_FILE_NAME), 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def load_bundle(path: str) -> Dict[str, Any]:
+    """
+    Loads the objects of a bundle directory written by ``save_bundle``. The segments file is
+    memory-mapped read-only and the out-of-band buffers are handed to the unpickler as views over
+    the mapping: arrays are not copied, pages are read on first access and are shared by every
+    process of the host mapping the same bundle. Compressed files are decompressed on the fly,
+    compressed segments into memory.
+    """
+    manifest_path = os.path.join(path, BUNDLE_MANIFEST_FILE_NAME)
+    if not os.path.exists(manifest_path):
+        raise MlflowException(f'{path} is not a bundle directory', error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest['format_version'] not in _SUPPORTED_FORMAT_VERSIONS:
+        raise MlflowException(
+            f"Unsupported bundle format version {manifest['format_version']}",
+            error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+        )
+    buffers: List[memoryview] = []
+    if manifest['segments']:
+        segments_path = os.path.join(path, BUNDLE_SEGMENTS_FILE_NAME)
+        compression = manifest.get('compression', {})
+        # Raw segments may start with a codec's magic bytes, hence the manifest rather than detect_codec
+        if compression.get('compress_segments') and compression.get('codec') != CompressionCodec.NONE.value:
+            with open_reader(segments_path) as f:
+                mapping = memoryview(f.read())
+        else:
+            with open(segments_path, 'rb') as f:
+                mapping = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        buffers = [mapping[s['offset'] : s['offset'] + s['nbytes']] for s in manifest['segments']]
+    with open_reader(os.path.join(path, BUNDLE_OBJECTS_FILE_NAME)) as f:
+        return pickle.load(f, buffers=buffers)
+
+
+def is_bundle(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, BUNDLE_MANIFEST_FILE_NAME))
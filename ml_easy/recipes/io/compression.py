@@ -0,0 +1,84 @@
+import gzip
+import io
+from typing import IO, Any, Optional
+
+from ml_easy.recipes.enum import CompressionCodec, MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
+
+_MAGIC = {
+    CompressionCodec.GZIP: b'\x1f\x8b',
+    CompressionCodec.LZ4: b'\x04\x22\x4d\x18',
+    CompressionCodec.ZSTD: b'\x28\xb5\x2f\xfd',
+}
+_MODULES = {CompressionCodec.LZ4: 'lz4', CompressionCodec.ZSTD: 'zstandard'}
+
+
+def _import_codec(codec: CompressionCodec) -> Any:
+    try:
+        if codec == CompressionCodec.LZ4:
+            import lz4.frame  # type: ignore
+
+            return lz4.frame
+        import zstandard  # type: ignore
+
+        return zstandard
+    except ImportError as e:
+        raise MlflowException(
+            f'{codec.value} compression requires the {_MODULES[codec]} package, install it with '
+            f'`pip install {_MODULES[codec]}`',
+            error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+        ) from e
+
+
+class CountingWriter:
+    """
+    Write-only file object forwarding to ``stream`` while counting the bytes written through it.
+    """
+
+    def __init__(self, stream: IO[bytes]):
+        self._stream = stream
+        self.nbytes = 0
+
+    def write(self, data: Any) -> int:
+        self.nbytes += memoryview(data).nbytes
+        return self._stream.write(data)
+
+
+def open_writer(path: str, codec: CompressionCodec, level: Optional[int] = None) -> IO[bytes]:
+    """
+    Opens ``path`` for writing through a streaming compressor, so that data is compressed as it
+    is written rather than buffered whole first. ``level`` defaults to the codec's own default.
+    """
+    if codec == CompressionCodec.NONE:
+        return open(path, 'wb')
+    if codec == CompressionCodec.GZIP:
+        return gzip.open(path, 'wb', compresslevel=9 if level is None else level)  # type: ignore
+    module = _import_codec(codec)
+    if codec == CompressionCodec.LZ4:
+        return module.open(path, 'wb', compression_level=level or 0)
+    compressor = module.ZstdCompressor(level=3 if level is None else level)
+    return compressor.stream_writer(open(path, 'wb'), closefd=True)
+
+
+def detect_codec(path: str) -> CompressionCodec:
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    for codec, magic in _MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return CompressionCodec.NONE
+
+
+def open_reader(path: str) -> IO[bytes]:
+    """
+    Opens ``path`` for reading, decompressing it on the fly with the codec its header names.
+    """
+    codec = detect_codec(path)
+    if codec == CompressionCodec.NONE:
+        return open(path, 'rb')
+    if codec == CompressionCodec.GZIP:
+        return gzip.open(path, 'rb')  # type: ignore
+    module = _import_codec(codec)
+    if codec == CompressionCodec.LZ4:
+        return module.open(path, 'rb')
+    return io.BufferedReader(module.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
@@ -0,0 +1,196 @@
+import atexit
+import hashlib
+import math
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ml_easy.recipes.enum import MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
+
+# Tasks per worker when the caller does not size the chunks, to even out the load
+_CHUNKS_PER_WORKER = 4
+# Functions kept unpickled and warmed up by each worker, most recently used last
+_WORKER_UDF_CACHE_SIZE = 8
+
+_worker_udfs: Dict[str, Callable[..., Any]] = {}
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow as pa  # type: ignore
+
+        return pa
+    except ImportError as e:
+        raise MlflowException(
+            'Process-parallel string mapping requires the pyarrow package, install it with `pip install pyarrow`',
+            error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+        ) from e
+
+
+def _pickle_udf(udf: Callable[..., Any], name: str) -> bytes:
+    _import_pyarrow()
+    try:
+        return pickle.dumps(udf)
+    except Exception as e:
+        raise MlflowException(
+            f'The function mapping {name} cannot be sent to worker processes: {e!r}. Functions run in parallel must '
+            'be picklable, i.e. module-level functions or instances of module-level classes rather than lambdas '
+            'or nested functions.',
+            error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+        ) from None
+
+
+def check_parallel_udf(udf: Callable[..., Any], name: str = 'strings') -> None:
+    """
+    Raises an ``MlflowException`` if ``udf`` cannot be run by ``map_strings_parallel``, for callers
+    deferring the mapping (e.g. to the collection of a lazy frame) to fail when it is planned.
+    """
+    _pickle_udf(udf, name)
+
+
+def _write_shared(array: Any) -> Tuple[str, int]:
+    """
+    Writes ``array`` as an Arrow IPC stream into a new shared memory block, returning its name and
+    the size of the stream.
+    """
+    pa = _import_pyarrow()
+    batch = pa.record_batch([array], names=['values'])
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    stream = sink.getvalue()
+    shm = SharedMemory(create=True, size=max(stream.size, 1))
+    try:
+        shm.buf[: stream.size] = memoryview(stream).cast('B')
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return shm.name, stream.size
+
+
+def _read_shared(name: str, size: int) -> Any:
+    """
+    Reads the Arrow array written by ``_write_shared``, copied out of the shared memory block so
+    that the block can be released right away.
+    """
+    pa = _import_pyarrow()
+    shm = SharedMemory(name=name)
+    try:
+        stream = pa.py_buffer(bytes(shm.buf[:size]))
+    finally:
+        shm.close()
+    return pa.ipc.open_stream(stream).read_all().column(0).combine_chunks()
+
+
+def _worker_udf(key: str, payload: bytes) -> Callable[..., Any]:
+    udf = _worker_udfs.pop(key, None)
+    if udf is None:
+        udf = pickle.loads(payload)
+        # Expensive resources (models, corpora) are loaded once per worker rather than per chunk
+        warmup = getattr(udf, 'warmup', None)
+        if callable(warmup):
+            warmup()
+        if len(_worker_udfs) >= _WORKER_UDF_CACHE_SIZE:
+            del _worker_udfs[next(iter(_worker_udfs))]
+    _worker_udfs[key] = udf
+    return udf
+
+
+def _map_chunk(key: str, payload: bytes, batched: bool, name: str, size: int) -> Tuple[str, int]:
+    pa = _import_pyarrow()
+    values = _read_shared(name, size).to_pylist()
+    udf = _worker_udf(key, payload)
+    mapped = udf(values) if batched else [udf(value) for value in values]
+    return _write_shared(pa.array(mapped, type=pa.large_string()))
+
+
+def _get_pool(n_workers: int) -> ProcessPoolExecutor:
+    # One pool per size, whatever the function: functions travel with the tasks and are cached by the workers
+    with _pools_lock:
+        pool = _pools.get(n_workers)
+        if pool is None:
+            pool = _pools[n_workers] = ProcessPoolExecutor(
+                max_workers=n_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return pool
+
+
+def _discard_pool(n_workers: int, pool: ProcessPoolExecutor) -> None:
+    # A worker died (e.g. killed for its memory): the pool cannot run tasks any more, the next call starts a new one
+    with _pools_lock:
+        if _pools.get(n_workers) is pool:
+            del _pools[n_workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+
+def map_strings_parallel(
+    array: Any,
+    udf: Callable[..., Any],
+    n_workers: int,
+    batched: bool = False,
+    chunk_size: Optional[int] = None,
+    name: str = 'strings',
+) -> Any:
+    """
+    Maps the string Arrow ``array`` through ``udf`` in ``n_workers`` spawned processes. The array is
+    cut into chunks of ``chunk_size`` values, sent to the workers as Arrow IPC streams in shared
+    memory and the mapped chunks are concatenated back in order. ``udf`` is called on each value,
+    or with ``batched`` on the list of values of a chunk; it must be picklable, and its ``warmup``
+    method, if any, runs once in each worker. Calls with the same number of workers share one
+    pool, whose workers keep the last functions they ran.
+    """
+    pa = _import_pyarrow()
+    payload = _pickle_udf(udf, name)
+    if not len(array):
+        return pa.array([], type=pa.large_string())
+    key = hashlib.sha256(payload).hexdigest()
+    chunk_size = chunk_size or math.ceil(len(array) / (n_workers * _CHUNKS_PER_WORKER))
+    pool = _get_pool(n_workers)
+    inputs: List[Tuple[str, int]] = []
+    futures: List[Future] = []
+    try:
+        for offset in range(0, len(array), chunk_size):
+            inputs.append(_write_shared(array.slice(offset, chunk_size).cast(pa.large_string())))
+            futures.append(pool.submit(_map_chunk, key, payload, batched, *inputs[-1]))
+        outputs = [future.result() for future in futures]
+        return pa.concat_arrays([_read_shared(block_name, size) for block_name, size in outputs])
+    except BrokenProcessPool:
+        _discard_pool(n_workers, pool)
+        raise
+    finally:
+        # On failure the chunks still running are waited for, so that their output blocks are freed too
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        for future in futures:
+            if not future.cancelled() and future.exception() is None:
+                _unlink(future.result()[0])
+        for block_name, _ in inputs:
+            _unlink(block_name)
+
+
+def _unlink(name: str) -> None:
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
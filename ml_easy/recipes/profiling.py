@@ -0,0 +1,343 @@
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from pydantic import BaseModel
+
+from ml_easy.recipes.enum import MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.config import (
+    AllocationSite,
+    StageMetrics,
+    StepExecutionMetrics,
+    StepMemoryMetrics,
+)
+from ml_easy.recipes.interfaces.dataset import Dataset
+from ml_easy.recipes.tracing import span
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore
+
+_MB = 1 << 20
+_N_TOP_ALLOCATIONS = 10
+
+
+class StepRecorder:
+    """
+    Collects the wall and CPU time of a step run, the time spent in each of its ``stage`` blocks
+    and the counters reported with ``add_counter``.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, StageMetrics] = defaultdict(StageMetrics)
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def add_stage(self, path: str, wall_seconds: float, cpu_seconds: float) -> None:
+        metrics = self.stages[path]
+        metrics.calls += 1
+        metrics.wall_seconds += wall_seconds
+        metrics.cpu_seconds += cpu_seconds
+
+    def to_metrics(
+        self,
+        inputs: Iterable[Dataset] = (),
+        outputs: Iterable[Dataset] = (),
+        memory: Optional[StepMemoryMetrics] = None,
+    ) -> StepExecutionMetrics:
+        input_rows, input_cols, _ = dataset_sizes(inputs)
+        output_rows, output_cols, output_nnz = dataset_sizes(outputs)
+        rows = output_rows if output_rows is not None else input_rows
+        return StepExecutionMetrics(
+            wall_seconds=self.wall_seconds,
+            cpu_seconds=self.cpu_seconds,
+            input_rows=input_rows,
+            input_cols=input_cols,
+            output_rows=output_rows,
+            output_cols=output_cols,
+            output_nnz=output_nnz,
+            rows_per_sec=rows / self.wall_seconds if rows is not None and self.wall_seconds > 0 else None,
+            stages=dict(self.stages),
+            counters=dict(self.counters),
+            memory=memory,
+        )
+
+
+_recorder: ContextVar[Optional[StepRecorder]] = ContextVar('ml_easy_step_recorder', default=None)
+_stage_path: ContextVar[str] = ContextVar('ml_easy_stage_path', default='')
+_monitor: ContextVar[Optional['MemoryMonitor']] = ContextVar('ml_easy_memory_monitor', default=None)
+
+
+@contextmanager
+def record_step() -> Iterator[StepRecorder]:
+    """
+    Makes a new ``StepRecorder`` the target of the ``stage`` blocks and counters of the current
+    context, and times the block.
+    """
+    recorder = StepRecorder()
+    recorder_token = _recorder.set(recorder)
+    path_token = _stage_path.set('')
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield recorder
+    finally:
+        recorder.wall_seconds = time.perf_counter() - wall
+        recorder.cpu_seconds = time.process_time() - cpu
+        _stage_path.reset(path_token)
+        _recorder.reset(recorder_token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times the block as a stage of the step being recorded, nested under the enclosing stages, and
+    as a span of the traced run. Does nothing outside of a recorded step or traced run. Entering
+    and leaving it raises the budget error of the enclosing ``MemoryMonitor`` once exceeded.
+    """
+    check_memory_budget()
+    recorder = _recorder.get()
+    if recorder is None:
+        with span(name, 'stage'):
+            yield
+        check_memory_budget()
+        return
+    parent = _stage_path.get()
+    path = f'{parent}/{name}' if parent else name
+    token = _stage_path.set(path)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        with span(name, 'stage'):
+            yield
+    finally:
+        recorder.add_stage(path, time.perf_counter() - wall, time.process_time() - cpu)
+        _stage_path.reset(token)
+    check_memory_budget()
+
+
+def check_memory_budget() -> None:
+    """
+    Raises the budget error of the ``MemoryMonitor`` of the current context once its budget is
+    exceeded, for long loops that enter no ``stage``.
+    """
+    monitor = _monitor.get()
+    if monitor is not None:
+        monitor.check()
+
+
+def add_counter(name: str, value: float) -> None:
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.counters[name] += value
+
+
+def bound_counter() -> Callable[[str, float], None]:
+    """
+    ``add_counter`` bound to the step being recorded, for callbacks run later or from threads
+    outside of its context (e.g. Polars UDFs executed when a lazy frame is collected).
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return lambda name, value: None
+
+    def _add(name: str, value: float) -> None:
+        recorder.counters[name] += value
+
+    return _add
+
+
+def _is_lazy(ds: Any) -> bool:
+    import polars as pl
+
+    from ml_easy.recipes.steps.ingest.datasets import PolarsDataset
+
+    return isinstance(ds, PolarsDataset) and isinstance(ds.service, pl.LazyFrame)
+
+
+def dataset_sizes(datasets: Iterable[Dataset]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """
+    Total rows, widest column count and total non-zeros of ``datasets``. Rows of lazy Polars
+    datasets are left unknown rather than collecting them; non-zeros are only known when every
+    dataset is sparse.
+    """
+    from ml_easy.recipes.steps.ingest.datasets import CsrMatrixDataset
+
+    rows: Optional[int] = 0
+    cols: Optional[int] = None
+    nnz: Optional[int] = 0
+    n_datasets = 0
+    for ds in datasets:
+        n_datasets += 1
+        if _is_lazy(ds):
+            rows, n_cols = None, len(ds.columns)
+        else:
+            n_rows, n_cols = ds.shape[0], ds.shape[1]
+            rows = rows + n_rows if rows is not None else None
+        cols = max(cols or 0, n_cols)
+        nnz = nnz + ds.nnz if nnz is not None and isinstance(ds, CsrMatrixDataset) else None
+    if not n_datasets:
+        return None, None, None
+    return rows, cols, nnz
+
+
+def current_rss() -> Optional[int]:
+    """
+    Resident memory of the process in bytes, None where it cannot be read.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    """
+    High-water mark of the resident memory of the process in bytes.
+    """
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return maxrss if os.uname().sysname == 'Darwin' else maxrss * 1024
+
+
+def payload_nbytes(card: BaseModel) -> Dict[str, int]:
+    """
+    In-memory size of the datasets held by each field of ``card``. Lazy Polars datasets are
+    skipped rather than collected.
+    """
+
+    def _nbytes(value: Any) -> Optional[int]:
+        if _is_lazy(value):
+            return None
+        if isinstance(value, Dataset):
+            return value.nbytes
+        if isinstance(value, (tuple, list)):
+            sizes = [size for item in value if (size := _nbytes(item)) is not None]
+            return sum(sizes) if sizes else None
+        return None
+
+    return {name: size for name, value in card if (size := _nbytes(value)) is not None}
+
+
+class MemoryMonitor:
+    """
+    Measures the resident memory of the process over a block, sampling it from a background
+    thread. With a budget, the block fails with an ``MlflowException`` once the resident memory
+    exceeds it: the sampler only flags the breach, which is raised by the next ``stage`` entered
+    or left in the block (or ``check_memory_budget``), and at the latest when the block ends. With
+    ``trace_allocations``, the lines holding the most memory at the end of the block are reported
+    through ``tracemalloc``.
+    """
+
+    def __init__(
+        self, name: str, budget_mb: Optional[int] = None, trace_allocations: bool = False, interval: float = 0.05
+    ):
+        self.name = name
+        self.budget_mb = budget_mb
+        self.trace_allocations = trace_allocations
+        self.interval = interval
+        self.exceeded_bytes: Optional[int] = None
+        self._rss_start: Optional[int] = None
+        self._peak_start: Optional[int] = None
+        self._sampled_peak: Optional[int] = None
+        self._started_tracing = False
+        self._raised = False
+        self._token: Optional[Token] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._metrics: Optional[StepMemoryMetrics] = None
+
+    def __enter__(self) -> 'MemoryMonitor':
+        self._rss_start = current_rss()
+        self._peak_start = peak_rss()
+        self._sampled_peak = self._rss_start
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _monitor.set(self)
+        self._thread = threading.Thread(target=self._watch, name=f'memory-monitor-{self.name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def _watch(self) -> None:
+        budget = self.budget_mb * _MB if self.budget_mb is not None else None
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            if rss is None:
+                rss = peak_rss()
+                if rss is None:
+                    return
+            else:
+                self._sampled_peak = max(self._sampled_peak or 0, rss)
+            if budget is not None and rss > budget and self.exceeded_bytes is None:
+                self.exceeded_bytes = rss
+
+    def check(self) -> None:
+        """
+        Raises the budget error if the sampler has seen the resident memory exceed the budget.
+        """
+        if self.exceeded_bytes is not None and not self._raised:
+            self._raised = True
+            raise MlflowException(
+                f'Step {self.name} exceeded its memory budget of {self.budget_mb} MB: the resident memory of '
+                f'the process reached {self.exceeded_bytes / _MB:.0f} MB',
+                error_code=MLFlowErrorCode.RESOURCE_EXHAUSTED,
+            )
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._token is not None:
+            _monitor.reset(self._token)
+            self._token = None
+        self._metrics = self._collect()
+        self.check()
+        return False
+
+    def _collect(self) -> StepMemoryMetrics:
+        peak_end = peak_rss()
+        if peak_end is not None and self._peak_start is not None and peak_end > self._peak_start:
+            # The block raised the high-water mark of the process, which is then its exact peak.
+            peak: Optional[int] = peak_end
+        else:
+            peak = max(filter(None, (self._sampled_peak, current_rss())), default=None)
+        traced_peak, top_allocations = None, []
+        if self.trace_allocations and tracemalloc.is_tracing():
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+                ]
+            )
+            top_allocations = [
+                AllocationSite(location=str(stat.traceback), size_bytes=stat.size, count=stat.count)
+                for stat in snapshot.statistics('lineno')[:_N_TOP_ALLOCATIONS]
+            ]
+            if self._started_tracing:
+                tracemalloc.stop()
+        return StepMemoryMetrics(
+            rss_start_bytes=self._rss_start,
+            peak_rss_bytes=peak,
+            peak_rss_delta_bytes=peak - self._rss_start if peak is not None and self._rss_start is not None else None,
+            traced_peak_bytes=traced_peak,
+            top_allocations=top_allocations,
+        )
+
+    def to_metrics(self, card: Optional[BaseModel] = None) -> Optional[StepMemoryMetrics]:
+        """
+        Memory use over the block, with the payload sizes of ``card``. None until the block ends.
+        """
+        if self._metrics is None or card is None:
+            return self._metrics
+        return self._metrics.model_copy(update={'payload_nbytes': payload_nbytes(card)})
@@ -0,0 +1,26 @@
+import argparse
+import logging
+
+from ml_easy.recipes.interfaces.recipe import RecipeFactory
+from ml_easy.recipes.steps.steps_config import RecipePathsConfig
+
+_logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run a batch scoring recipe (recipe: scoring/v1).')
+    parser.add_argument('--recipe-root-path', required=True, help='Directory holding recipe.yaml and steps/.')
+    parser.add_argument('--profile', default=None, help='Profile from {recipe_root_path}/profiles to render.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    recipe = RecipeFactory.create_recipe(
+        RecipePathsConfig(recipe_root_path=args.recipe_root_path, profile=args.profile)
+    )
+    card = recipe.run().predict
+    if card is not None:
+        _logger.info(f'{card.n_rows} rows scored at {card.rows_per_sec:.1f} rows/sec into {card.output_uri}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+from ml_easy.recipes.scoring.v1.config import ScoringRecipeConfig as ConfigImpl
+from ml_easy.recipes.scoring.v1.recipe import ScoringRecipe as RecipeImpl
+
+__all__ = ['RecipeImpl', 'ConfigImpl']
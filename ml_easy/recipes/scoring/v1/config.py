@@ -0,0 +1,18 @@
+from ml_easy.recipes.interfaces.config import BaseRecipeConfig, BaseStepsConfig
+from ml_easy.recipes.steps.steps_config import BasePredictConfig
+
+
+class ScoringPredictConfig(BasePredictConfig):
+    pass
+
+
+class ScoringStepsConfig(BaseStepsConfig):
+    predict: ScoringPredictConfig
+
+
+class ScoringRecipeConfig(BaseRecipeConfig):
+    steps: ScoringStepsConfig
+
+    @property
+    def get_steps(self) -> BaseStepsConfig:
+        return self.steps
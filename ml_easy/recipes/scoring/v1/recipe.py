@@ -0,0 +1,14 @@
+from typing import Dict
+
+from ml_easy.recipes.interfaces.recipe import BaseRecipe
+from ml_easy.recipes.scoring.v1.config import ScoringRecipeConfig
+
+
+class ScoringRecipe(BaseRecipe[ScoringRecipeConfig]):
+    _RECIPE_STEPS: Dict[str, str] = {
+        'predict': 'ml_easy.recipes.scoring.v1.steps.ScoringPredictStep',
+    }
+
+    @property
+    def recipe_steps(self) -> Dict[str, str]:
+        return self._RECIPE_STEPS
@@ -0,0 +1,23 @@
+from typing import Any
+
+from ml_easy.recipes.interfaces.config import Context
+from ml_easy.recipes.scoring.v1.config import ScoringPredictConfig
+from ml_easy.recipes.steps.cards_config import StepMessage
+from ml_easy.recipes.steps.predict.predict import PredictStep
+
+
+class ScoringPredictStep(PredictStep[ScoringPredictConfig]):
+    def __init__(self, predict_config: ScoringPredictConfig, context: Context):
+        super().__init__(predict_config, context)
+
+    def _run(self, message: StepMessage) -> StepMessage:
+        from ml_easy.recipes.steps.predict.scorer import BatchScorer
+
+        scorer: Any = self.get_step_result()
+        self.validate_step_result(scorer, BatchScorer)
+        writer = scorer.score()
+        self.card.output_uri = writer.uri
+        self.card.n_rows = scorer.n_rows
+        self.card.elapsed_seconds = scorer.elapsed_seconds
+        self.card.rows_per_sec = scorer.rows_per_sec
+        return message
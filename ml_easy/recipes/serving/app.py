@@ -0,0 +1,106 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+import polars as pl
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from ml_easy.recipes.enum import MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.serving.batcher import MicroBatcher, ServingStats
+from ml_easy.recipes.serving.config import ServingConfig
+from ml_easy.recipes.steps.ingest.datasets import PolarsDataset
+from ml_easy.recipes.steps.register.loader import MlflowRunLoader
+from ml_easy.recipes.steps.train.models import Model
+from ml_easy.recipes.steps.transform.transformer import Transformer
+
+_logger = logging.getLogger(__name__)
+
+
+class InferencePipeline:
+    """
+    The INFER transformer and the model of a training run, applied to a batch of records.
+    """
+
+    def __init__(self, transformer: Transformer, model: Model):
+        self.transformer = transformer
+        self.model = model
+
+    @classmethod
+    def load(cls, config: ServingConfig) -> 'InferencePipeline':
+        if config.run_id is not None:
+            loader = MlflowRunLoader(config.tracking_uri, config.run_id)
+        else:
+            loader = MlflowRunLoader.from_registered_model(
+                config.tracking_uri, config.registered_model_name, config.registered_model_version  # type: ignore
+            )
+        _logger.info(f'Loading transformer and model of run {loader.run_id}')
+        return cls(loader.load_transformer(), loader.load_model(config.artifact_path))
+
+    def warmup(self) -> None:
+        self.transformer.warmup()
+
+    def __call__(self, records: List[Dict[str, Any]]) -> List[Any]:
+        X = self.transformer.transform(PolarsDataset(pl.DataFrame(records)))
+        if X.shape[0] != len(records):
+            raise MlflowException(
+                f'The inference transformer changed the number of rows ({len(records)} -> {X.shape[0]})',
+                error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+            )
+        return self.model.predict(X).to_numpy().reshape(-1).tolist()
+
+
+def create_app(config: ServingConfig) -> Starlette:
+    """
+    Creates the ASGI inference application. The transformer and model are loaded and warmed up once
+    at startup; ``POST /predict`` takes one JSON record and returns its prediction, ``GET /metrics``
+    reports latency percentiles and the batch-size histogram.
+
+    .. code-block:: python
+        :caption: Example
+
+        app = create_app(ServingConfig(tracking_uri=..., run_id=..., artifact_path='model'))
+        # uvicorn.run(app, host='0.0.0.0', port=8000)
+    """
+    stats = ServingStats(window=config.latency_window)
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        pipeline = InferencePipeline.load(config)
+        pipeline.warmup()
+        batcher = MicroBatcher(pipeline, config.max_batch_size, config.max_wait_ms, stats)
+        await batcher.start()
+        app.state.batcher = batcher
+        yield
+        await batcher.stop()
+
+    async def predict(request: Request) -> JSONResponse:
+        try:
+            record = await request.json()
+        except ValueError:
+            return JSONResponse({'error': 'The request body is not valid JSON'}, status_code=400)
+        if not isinstance(record, dict):
+            return JSONResponse({'error': 'The request body should be a single JSON record'}, status_code=400)
+        try:
+            prediction = await request.app.state.batcher.submit(record)
+        except Exception as e:
+            return JSONResponse({'error': str(e)}, status_code=500)
+        return JSONResponse({'prediction': prediction})
+
+    async def metrics(request: Request) -> JSONResponse:
+        return JSONResponse(stats.snapshot())
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({'status': 'ok'})
+
+    return Starlette(
+        routes=[
+            Route('/predict', predict, methods=['POST']),
+            Route('/metrics', metrics, methods=['GET']),
+            Route('/health', health, methods=['GET']),
+        ],
+        lifespan=lifespan,
+    )
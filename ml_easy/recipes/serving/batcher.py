@@ -0,0 +1,141 @@
+import asyncio
+import collections
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_logger = logging.getLogger(__name__)
+
+
+class ServingStats:
+    """
+    Latencies of the last ``window`` requests and a histogram of the executed batch sizes,
+    bucketed by powers of two.
+    """
+
+    def __init__(self, window: int):
+        self._latencies: Deque[float] = collections.deque(maxlen=window)
+        self._batch_sizes: Dict[int, int] = collections.Counter()
+        self._n_requests = 0
+        self._n_batches = 0
+
+    def record_latency(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+        self._n_requests += 1
+
+    def record_batch(self, size: int) -> None:
+        self._batch_sizes[1 << (size - 1).bit_length()] += 1
+        self._n_batches += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies_ms = np.fromiter(self._latencies, dtype=np.float64) * 1000
+        percentiles = (
+            dict(zip(['p50', 'p90', 'p99', 'p999'], np.percentile(latencies_ms, [50, 90, 99, 99.9]).tolist()))
+            if len(latencies_ms)
+            else {}
+        )
+        return {
+            'requests': self._n_requests,
+            'batches': self._n_batches,
+            'latency_ms': {**percentiles, 'max': float(latencies_ms.max()) if len(latencies_ms) else None},
+            'batch_size_histogram': {
+                f'{bound // 2 + 1}-{bound}' if bound > 1 else '1': count
+                for bound, count in sorted(self._batch_sizes.items())
+            },
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-record requests into batches. A batch is dispatched once it holds
+    ``max_batch_size`` records or ``max_wait_ms`` after its first record arrived, whichever comes
+    first, and runs on a dedicated thread while the next batch fills up.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Dict[str, Any]]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        stats: ServingStats,
+    ):
+        self._predict_batch = predict_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._stats = stats
+        self._queue: asyncio.Queue[Tuple[Dict[str, Any], asyncio.Future, float]] = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='micro-batcher')
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, record: Dict[str, Any]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Dict[str, Any], asyncio.Future, float]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self._max_wait
+        while len(batch) < self._max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self._stats.record_batch(len(batch))
+            try:
+                predictions = await loop.run_in_executor(self._executor, self._predict_batch, [r for r, _, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    if not batch[0][1].done():
+                        batch[0][1].set_exception(e)
+                    continue
+                # One malformed record should not fail the requests it was batched with.
+                _logger.warning(f'Batch prediction failed ({e!r}), retrying its {len(batch)} records one by one')
+                for item in batch:
+                    await self._predict_one(item)
+                continue
+            now = time.perf_counter()
+            for (_, future, submitted), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+                self._stats.record_latency(now - submitted)
+
+    async def _predict_one(self, item: Tuple[Dict[str, Any], asyncio.Future, float]) -> None:
+        record, future, submitted = item
+        loop = asyncio.get_running_loop()
+        try:
+            predictions = await loop.run_in_executor(self._executor, self._predict_batch, [record])
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(predictions[0])
+        self._stats.record_latency(time.perf_counter() - submitted)
@@ -0,0 +1,20 @@
+from typing import Optional
+
+from pydantic import BaseModel, model_validator
+
+
+class ServingConfig(BaseModel):
+    tracking_uri: str
+    artifact_path: str
+    run_id: Optional[str] = None
+    registered_model_name: Optional[str] = None
+    registered_model_version: Optional[str] = None
+    max_batch_size: int = 32
+    max_wait_ms: float = 5.0
+    latency_window: int = 10000
+
+    @model_validator(mode='after')
+    def check_model_reference(self):
+        if (self.run_id is None) == (self.registered_model_name is None):
+            raise ValueError('Exactly one of run_id and registered_model_name should be set')
+        return self
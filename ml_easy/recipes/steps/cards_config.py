@@ -1,30 +1,86 @@
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from pydantic import BaseModel, ConfigDict
 
-from ml_easy.recipes._typing import TupleDataset
-from ml_easy.recipes.interfaces.config import BaseCard
-from ml_easy.recipes.steps.ingest.datasets import Dataset
+from ml_easy.recipes._typing import Fold, TupleDataset
+from ml_easy.recipes.interfaces.config import BaseCard, StepExecutionMetrics
+from ml_easy.recipes.interfaces.dataset import Dataset
 from ml_easy.recipes.steps.steps_config import BaseTransformConfig, Score
 from ml_easy.recipes.steps.train.models import Model
 
 
+class FeatureMemory(BaseModel):
+    """
+    Memory held by feature matrices, against the same matrices stored with float64 values and
+    int64 indices.
+    """
+
+    dtypes: List[str]
+    nbytes: int
+    float64_nbytes: int
+
+    @property
+    def saved_nbytes(self) -> int:
+        return self.float64_nbytes - self.nbytes
+
+    @classmethod
+    def from_datasets(cls, datasets: Iterable[Dataset]) -> 'FeatureMemory':
+        from ml_easy.recipes.steps.ingest.datasets import CsrMatrixDataset
+
+        dtypes, nbytes, float64_nbytes = set(), 0, 0
+        for ds in datasets:
+            dtypes.update(ds.dtypes)
+            nbytes += ds.nbytes
+            if isinstance(ds, CsrMatrixDataset):
+                float64_nbytes += 16 * ds.nnz + 8 * (ds.shape[0] + 1)
+            else:
+                float64_nbytes += ds.nbytes
+        return cls(dtypes=sorted(dtypes), nbytes=nbytes, float64_nbytes=float64_nbytes)
+
+
+class CompressionStats(BaseModel):
+    codec: str
+    level: Optional[int] = None
+    compress_segments: bool = False
+    raw_nbytes: int
+    stored_nbytes: int
+    seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_nbytes / self.stored_nbytes if self.stored_nbytes else 1.0
+
+
 class IngestCard(BaseCard):
     dataset: Optional[Dataset] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    def datasets(self) -> List[Dataset]:
+        return [self.dataset] if self.dataset is not None else []
+
 
 class TransformCard(BaseCard):
     tf_dataset: Optional[TupleDataset] = None
     config: Optional[BaseTransformConfig] = None
     transformer_path: Optional[str] = None
+    tf_outputs: Optional[Dict[str, Any]] = None
+    feature_memory: Optional[FeatureMemory] = None
+    transformer_compression: Optional[CompressionStats] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    def datasets(self) -> List[Dataset]:
+        return [self.tf_dataset[0]] if self.tf_dataset is not None else []
+
 
 class SplitCard(BaseCard):
     train_val_test: Optional[Tuple[TupleDataset, TupleDataset, TupleDataset]] = None
+    folds: Optional[List[Fold]] = None
+    feature_memory: Optional[FeatureMemory] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    def datasets(self) -> List[Dataset]:
+        return [X for X, _ in self.train_val_test] if self.train_val_test is not None else []
+
 
 class Metric(BaseModel):
     name: Score
@@ -35,6 +91,9 @@ class TrainCard(BaseCard):
     mod: Optional[Model] = None
     mod_outputs: Optional[Dict[str, Any]] = None
     val_metric: Optional[float] = None
+    cv_metrics: Optional[List[float]] = None
+    bundle_path: Optional[str] = None
+    bundle_compression: Optional[CompressionStats] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
@@ -46,6 +105,13 @@ class RegisterCard(BaseCard):
     pass
 
 
+class PredictCard(BaseCard):
+    output_uri: Optional[str] = None
+    n_rows: Optional[int] = None
+    elapsed_seconds: Optional[float] = None
+    rows_per_sec: Optional[float] = None
+
+
 class StepMessage(BaseModel):
     ingest: Optional[IngestCard] = None
     transform: Optional[TransformCard] = None
@@ -53,3 +119,14 @@ class StepMessage(BaseModel):
     train: Optional[TrainCard] = None
     evaluate: Optional[EvaluateCard] = None
     register_: Optional[RegisterCard] = None
+    predict: Optional[PredictCard] = None
+
+    def execution_metrics(self) -> Dict[str, StepExecutionMetrics]:
+        """
+        Timings and data volumes of the steps that ran, by step name.
+        """
+        return {
+            name: card.execution_metrics
+            for name, card in self
+            if card is not None and card.execution_metrics is not None
+        }
@@ -1,15 +1,6 @@
 from abc import abstractmethod
 
-from sklearn.metrics import (  # type: ignore
-    accuracy_score,
-    f1_score,
-    mean_absolute_error,
-    mean_squared_error,
-    r2_score,
-    roc_auc_score,
-)
-
-from ml_easy.recipes.steps.ingest.datasets import Dataset
+from ml_easy.recipes.interfaces.dataset import Dataset
 
 
 class Score:
@@ -22,6 +13,8 @@ class Score:
 class AccuracyScore(Score):
     @classmethod
     def score(cls, y_true: Dataset, y_pred: Dataset, **kwargs) -> float:
+        from sklearn.metrics import accuracy_score  # type: ignore
+
         y_true_np = y_true.to_numpy().flatten()
         y_pred_np = y_pred.to_numpy().flatten()
         return accuracy_score(y_true_np, y_pred_np, **kwargs)
@@ -30,6 +23,8 @@ class AccuracyScore(Score):
 class F1Score(Score):
     @classmethod
     def score(cls, y_true: Dataset, y_pred: Dataset, **kwargs) -> float:
+        from sklearn.metrics import f1_score  # type: ignore
+
         y_true_np = y_true.to_numpy().flatten()
         y_pred_np = y_pred.to_numpy().flatten()
         return f1_score(y_true_np, y_pred_np, **kwargs)
@@ -38,6 +33,8 @@ class F1Score(Score):
 class AUCScore(Score):
     @classmethod
     def score(cls, y_true: Dataset, y_pred: Dataset, **kwargs) -> float:
+        from sklearn.metrics import roc_auc_score  # type: ignore
+
         y_true_np = y_true.to_numpy().flatten()
         y_pred_np = y_pred.to_numpy().flatten()
         return roc_auc_score(y_true_np, y_pred_np, **kwargs)
@@ -46,6 +43,8 @@ class AUCScore(Score):
 class MAEScore(Score):
     @classmethod
     def score(cls, y_true: Dataset, y_pred: Dataset, **kwargs) -> float:
+        from sklearn.metrics import mean_absolute_error  # type: ignore
+
         y_true_np = y_true.to_numpy().flatten()
         y_pred_np = y_pred.to_numpy().flatten()
         return mean_absolute_error(y_true_np, y_pred_np)
@@ -54,6 +53,8 @@ class MAEScore(Score):
 class MSEScore(Score):
     @classmethod
     def score(cls, y_true: Dataset, y_pred: Dataset, **kwargs) -> float:
+        from sklearn.metrics import mean_squared_error  # type: ignore
+
         y_true_np = y_true.to_numpy().flatten()
         y_pred_np = y_pred.to_numpy().flatten()
         return mean_squared_error(y_true_np, y_pred_np, **kwargs)
@@ -62,6 +63,8 @@ class MSEScore(Score):
 class R2Score(Score):
     @classmethod
     def score(cls, y_true: Dataset, y_pred: Dataset, **kwargs) -> float:
+        from sklearn.metrics import r2_score  # type: ignore
+
         y_true_np = y_true.to_numpy().flatten()
         y_pred_np = y_pred.to_numpy().flatten()
         return r2_score(y_true_np, y_pred_np, **kwargs)
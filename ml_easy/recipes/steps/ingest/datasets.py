@@ -1,156 +1,159 @@
 import copy
 import hashlib
+import json
 import logging
-from abc import ABC, abstractmethod
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from importlib.util import find_spec
 from pathlib import Path
 from typing import (
     IO,
+    TYPE_CHECKING,
     Any,
     Callable,
     Dict,
-    Generic,
     Iterable,
+    Iterator,
     List,
+    Mapping,
     Optional,
     Self,
+    Sequence,
     Tuple,
-    TypeVar,
     Union,
 )
 
 import numpy as np
 import pandas as pd
 import polars as pl
-from mlflow.data import DatasetSource  # type: ignore
-from mlflow.data.dataset import Dataset as MLflowDataset  # type: ignore
-from mlflow.types.utils import _infer_schema  # type: ignore
 from polars._typing import ConcatMethod, IntoExpr, SchemaDict
 from scipy.sparse import csr_matrix, hstack, vstack  # type: ignore
-from sqlalchemy import create_engine
 
-from ml_easy.recipes.enum import MLFlowErrorCode
+from ml_easy.recipes.constants import MEMMAP_META_FILE_NAME
+from ml_easy.recipes.enum import MLFlowErrorCode, SqlReadEngine
 from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.dataset import Dataset
+from ml_easy.recipes.profiling import bound_counter
 from ml_easy.recipes.steps.steps_config import SourceConfig
-from ml_easy.recipes.steps.transform.filters import EqualFilter, InFilter
+from ml_easy.recipes.steps.transform.filter_plan import FilterPlan
+from ml_easy.recipes.steps.transform.filters import Filter
 
-_logger = logging.getLogger(__name__)
-
-V = TypeVar('V')
-
-
-class Dataset(ABC, Generic[V]):
-
-    def __init__(self, service: V):
-        self.service = service
-
-    @abstractmethod
-    def __iter__(self) -> Iterable:
-        pass
-
-    def __getitem__(self, indices):
-        return self._getitem(indices)
-
-    @abstractmethod
-    def _getitem(self, indices):
-        pass
-
-    @property
-    @abstractmethod
-    def shape(self) -> Tuple[int, ...]:
-        pass
-
-    @abstractmethod
-    def to_pandas(self) -> pd.DataFrame:
-        pass
-
-    @abstractmethod
-    def to_numpy(self) -> np.ndarray[Any, Any]:
-        pass
-
-    @abstractmethod
-    def to_csr(self) -> csr_matrix:
-        pass
-
-    @classmethod
-    @abstractmethod
-    def from_numpy(
-        cls,
-        data: np.ndarray[Any, Any],
-    ) -> Self:
-        pass
-
-    @abstractmethod
-    def select(self, *args: Any, **kwargs: Any) -> Self:
-        pass
-
-    @property
-    @abstractmethod
-    def columns(self) -> List[str]:
-        pass
-
-    @property
-    @abstractmethod
-    def dtypes(self) -> List[str]:
-        pass
-
-    @abstractmethod
-    def collect(self) -> Self:
-        pass
-
-    @abstractmethod
-    def filter(self, filters: Dict[str, List[Union[EqualFilter[str], InFilter[str]]]]) -> Self:
-        pass
-
-    @abstractmethod
-    def drop_nulls(
-        self,
-        subset: Union[str, List[str], None] = None,
-    ) -> Self:
-        pass
-
-    @classmethod
-    @abstractmethod
-    def concat(
-        cls, items: Iterable[Self], *, how: ConcatMethod = 'vertical', rechunk: bool = False, parallel: bool = True
-    ) -> Self:
-        pass
+if TYPE_CHECKING:
+    from mlflow.data import DatasetSource  # type: ignore
+    from mlflow.data.dataset import Dataset as MLflowDataset  # type: ignore
 
-    @abstractmethod
-    def concatenate(
-        self, items: Iterable[Self], *, how: ConcatMethod = 'vertical', rechunk: bool = False, parallel: bool = True
-    ) -> Self:
-        pass
+_logger = logging.getLogger(__name__)
 
-    @abstractmethod
-    def slice(self, offset: int, length: int | None = None) -> Self:
-        pass
+# Rows hashed at once, bounding the memory used to digest a dataset
+_HASH_BATCH_ROWS = 1 << 16
+# Rows the MLflow schema of a dataset is inferred from
+_SCHEMA_SAMPLE_ROWS = 1_000
 
-    @abstractmethod
-    def map_str(self, udf_map: Dict[str, Callable[[str], str]]) -> Self:
-        pass
 
-    def split(self, train_prop: float, val_prop: float) -> Tuple[List[int], List[int], List[int]]:
-        total_samples = self.shape[0]
-        train_size = int(train_prop * total_samples)
-        val_size = int(val_prop * total_samples)
+def _check_batch_size(batch_size: int) -> None:
+    if batch_size < 1:
+        raise MlflowException(
+            f'batch_size should be at least 1, got {batch_size}', error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE
+        )
 
-        indices = np.arange(total_samples)
-        np.random.shuffle(indices)
 
-        train_indices = indices[:train_size]
-        val_indices = indices[train_size : train_size + val_size]
-        test_indices = indices[train_size + val_size :]
+def _check_rows(start: int, stop: int, n_rows: int) -> None:
+    if not 0 <= start <= stop <= n_rows:
+        raise MlflowException(
+            f'Rows {start} to {stop} are out of the bounds of a dataset of {n_rows} rows',
+            error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+        )
 
-        return train_indices.tolist(), val_indices.tolist(), test_indices.tolist()
 
-    @property
-    @abstractmethod
-    def hash_dataset(self) -> str:
-        pass
+def _default_sql_engine(uri: str) -> SqlReadEngine:
+    """
+    First engine reading ``uri`` into Arrow whose driver is installed, SQLAlchemy otherwise.
+    """
+    scheme = uri.split(':', 1)[0]
+    if find_spec(f'adbc_driver_{scheme}') is not None:
+        return SqlReadEngine.ADBC
+    if find_spec('connectorx') is not None:
+        return SqlReadEngine.CONNECTORX
+    return SqlReadEngine.SQLALCHEMY
+
+
+class _Batched:
+    """
+    Element-wise function applied to lists of values, picklable whenever the function is so that
+    it can be sent to worker processes.
+    """
+
+    def __init__(self, udf: Callable[[str], str]):
+        self.udf = udf
+
+    def __call__(self, texts: Sequence[str]) -> List[str]:
+        return [self.udf(text) for text in texts]
+
+    def warmup(self) -> None:
+        warmup = getattr(self.udf, 'warmup', None)
+        if callable(warmup):
+            warmup()
+
+
+def _map_series(
+    batch_udf: Callable[[Sequence[str]], Sequence[str]],
+    col: str,
+    count: Callable[[str, float], None],
+    batch_size: Optional[int] = None,
+    dedupe: bool = False,
+    n_workers: int = 1,
+) -> Callable[[pl.Series], pl.Series]:
+    """
+    Maps the non-null values of a string column through ``batch_udf``, ``batch_size`` values at a
+    time (all at once by default, or evenly spread over the workers). With ``dedupe`` only the
+    distinct values are mapped and the results broadcast back. With more than one worker the
+    batches are mapped in a pool of processes, see ``map_strings_parallel``. Counts the rows, the
+    distinct values, the time spent in ``batch_udf`` and with ``dedupe`` an estimate of the time
+    saved over mapping every row.
+    """
+    if n_workers > 1:
+        from ml_easy.recipes.parallel import check_parallel_udf, map_strings_parallel
+
+        check_parallel_udf(batch_udf, f'column {col}')
+
+    def _map(series: pl.Series) -> pl.Series:
+        values = series.drop_nulls()
+        n_rows = values.len()
+        if dedupe:
+            values = values.unique()
+        n_values = values.len()
+        start = time.perf_counter()
+        if n_workers > 1:
+            mapped = map_strings_parallel(
+                values.to_arrow(), batch_udf, n_workers, batched=True, chunk_size=batch_size, name=f'column {col}'
+            )
+            mapped_series = pl.Series(series.name, mapped).cast(pl.Utf8)
+        else:
+            items = values.to_list()
+            size = batch_size or max(n_values, 1)
+            outputs: List[str] = []
+            for offset in range(0, n_values, size):
+                outputs.extend(batch_udf(items[offset : offset + size]))
+            mapped_series = pl.Series(series.name, outputs, dtype=pl.Utf8)
+        seconds = time.perf_counter() - start
+        count(f'map_str/{col}/rows', n_rows)
+        count(f'map_str/{col}/udf_seconds', seconds)
+        if dedupe:
+            count(f'map_str/{col}/unique_values', n_values)
+            if n_values:
+                count(f'map_str/{col}/saved_seconds', seconds / n_values * (n_rows - n_values))
+            return series.replace_strict(values, mapped_series, default=None, return_dtype=pl.Utf8)
+        if not series.null_count():
+            return mapped_series
+        return pl.Series(series.name, [None] * series.len(), dtype=pl.Utf8).scatter(
+            series.is_not_null().arg_true(), mapped_series
+        )
 
-    @abstractmethod
-    def get_mlflow_dataset(self, conf: SourceConfig) -> MLflowDataset:
-        pass
+    return _map
 
 
 class PolarsDataset(Dataset[pl.DataFrame | pl.LazyFrame]):
@@ -225,16 +228,73 @@ class PolarsDataset(Dataset[pl.DataFrame | pl.LazyFrame]):
         )
 
     @classmethod
-    def from_sql_database(cls, table_name: str, credentials: Dict[str, str]) -> Self:
+    def get_sql_connection_string(cls, credentials: Dict[str, str]) -> str:
+        username = credentials['username']
+        password = credentials['password']
+        hostname = credentials['hostname']
+        database_name = credentials['database_name']
+        port = credentials['port']
+        return f'postgresql+psycopg2://{username}:{password}@{hostname}:{port}/{database_name}'
+
+    @classmethod
+    def get_sql_uri(cls, credentials: Dict[str, str]) -> str:
+        """
+        Driver-less form of ``get_sql_connection_string``, understood by ADBC, ConnectorX and SQLAlchemy.
+        """
         username = credentials['username']
         password = credentials['password']
         hostname = credentials['hostname']
         database_name = credentials['database_name']
         port = credentials['port']
-        connection_string = f'postgresql+psycopg2://{username}:{password}@{hostname}:{port}/{database_name}'
-        engine = create_engine(connection_string)
+        return f'postgresql://{username}:{password}@{hostname}:{port}/{database_name}'
+
+    @classmethod
+    def from_sql_database(
+        cls, table_name: str, credentials: Dict[str, str], engine: Optional[SqlReadEngine] = None
+    ) -> Self:
+        return cls.read_sql(f"SELECT * FROM {table_name}", cls.get_sql_uri(credentials), engine)
+
+    @classmethod
+    def read_sql(cls, query: str, uri: str, engine: Optional[SqlReadEngine] = None) -> Self:
+        """
+        Reads the results of ``query`` on the database at ``uri``. The ADBC and ConnectorX engines
+        fetch them as Arrow record batches that Polars wraps without converting them; SQLAlchemy
+        builds the frame from the fetched rows and pandas reads them into a pandas frame first,
+        copied into Polars. By default the first of ADBC and ConnectorX whose driver is installed
+        is used, SQLAlchemy otherwise.
+        """
+        engine = engine or _default_sql_engine(uri)
+        if engine in (SqlReadEngine.ADBC, SqlReadEngine.CONNECTORX):
+            return cls(pl.read_database_uri(query, uri, engine=engine.value))
+        from sqlalchemy import create_engine
+
+        sql_engine = create_engine(uri)
+        try:
+            if engine == SqlReadEngine.PANDAS:
+                return cls.from_pandas(pd.read_sql(query, sql_engine))
+            with sql_engine.connect() as connection:
+                return cls(pl.read_database(query, connection))
+        finally:
+            sql_engine.dispose()
+
+    @classmethod
+    def iter_sql_database(cls, table_name: str, credentials: Dict[str, str], batch_size: int) -> Iterator[Self]:
+        """
+        Streams the table in batches of ``batch_size`` rows through a server-side cursor, so that
+        only one batch is held in memory at a time.
+        """
+        from sqlalchemy import create_engine
+
+        engine = create_engine(cls.get_sql_connection_string(credentials))
         query = f"SELECT * FROM {table_name}"
-        return cls.from_pandas(pd.read_sql(query, engine))
+        with engine.connect() as connection:
+            for batch in pl.read_database(
+                query,
+                connection.execution_options(stream_results=True),
+                iter_batches=True,
+                batch_size=batch_size,
+            ):
+                yield cls(batch)
 
     @classmethod
     def concat(
@@ -263,48 +323,71 @@ class PolarsDataset(Dataset[pl.DataFrame | pl.LazyFrame]):
         )
         return [str(dtype) for dtype in dtypes]
 
-    def collect(self) -> Self:
+    def collect(self, streaming: bool = False) -> Self:
+        """
+        Materializes a lazy frame, with Polars' streaming engine when ``streaming`` is set so that
+        the query runs in batches rather than on whole intermediate frames.
+        """
+        if streaming and isinstance(self.service, pl.LazyFrame):
+            return self.__class__(self.service.collect(engine='streaming'))
         return self.__class__(self.get_dataframe)
 
+    def lazy(self) -> Self:
+        return self if isinstance(self.service, pl.LazyFrame) else self.__class__(self.service.lazy())
+
     def drop_nulls(
         self,
         subset: Union[str, List[str], None] = None,
     ) -> Self:
         return self.__class__(self.service.drop_nulls(subset))
 
-    def filter(self, filters: Dict[str, List[Union[EqualFilter[str], InFilter[str]]]]) -> Self:
-        from ml_easy.recipes.utils import is_instance_for_generic
-
-        def _get_expr_filter(col_filter: Union[EqualFilter[str], InFilter[str]]):
-
-            if is_instance_for_generic(col_filter, EqualFilter[str]):
-                return (
-                    ~(pl.col(col) == col_filter.value) if col_filter.neg else pl.col(col) == col_filter.value
-                )  # type:ignore
-            elif is_instance_for_generic(col_filter, InFilter[str]):
-                return (
-                    ~(pl.col(col).is_in(col_filter.values)) if col_filter.neg else pl.col(col).is_in(col_filter.values)
-                )  # type:ignore
-            else:
-                raise MlflowException(
-                    message=f'Unsupported filter type {col_filter.__class__.__name__}',
-                    error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
-                )
-
-        predicates_expr = []
-        for col in filters:
-            col_filters = filters[col]
-            for filter in col_filters:  # type: ignore
-                predicates_expr.append(_get_expr_filter(filter))
-
-        return self.__class__(self.service.filter(predicates_expr))
+    def filter(self, filters: Union[FilterPlan, Mapping[str, Sequence[Filter]]]) -> Self:
+        plan = filters if isinstance(filters, FilterPlan) else FilterPlan.compile(filters)
+        service = self.service
+        for predicates in plan.to_polars():
+            service = service.filter(predicates)
+        return self.__class__(service)
 
     def slice(self, offset: int, length: int | None = None) -> Self:
         return self.__class__(self.service.slice(offset, length))
 
-    def map_str(self, udf_map: Dict[str, Callable[[str], str]]) -> Self:
+    def iter_batches(self, batch_size: int, columns: Optional[Sequence[str]] = None) -> Iterator[Self]:
+        """
+        Zero-copy slices of ``batch_size`` rows. A lazy frame not collected yet is collected once,
+        with only ``columns`` when given.
+        """
+        _check_batch_size(batch_size)
+        if columns is not None and self._get_dataframe is None and isinstance(self.service, pl.LazyFrame):
+            df = self.service.select(columns).collect()
+        else:
+            df = self.get_dataframe if columns is None else self.get_dataframe.select(columns)
+        for offset in range(0, df.height, batch_size):
+            yield self.__class__(df.slice(offset, batch_size))
+
+    def map_str(self, udf_map: Dict[str, Callable[[str], str]], dedupe: bool = False, n_workers: int = 1) -> Self:
+        if dedupe or n_workers > 1:
+            return self.map_str_batches(
+                {col: _Batched(udf) for col, udf in udf_map.items()},
+                batch_size=None,
+                dedupe=dedupe,
+                n_workers=n_workers,
+            )
         maps = [pl.col(col).map_elements(udf_map[col], return_dtype=pl.Utf8) for col in udf_map]
-        return self.__class__(service=self.service.with_columns_seq(maps))
+        return self.__class__(service=self.service.with_columns(maps))
+
+    def map_str_batches(
+        self,
+        udf_map: Dict[str, Callable[[Sequence[str]], Sequence[str]]],
+        batch_size: Optional[int] = 1024,
+        dedupe: bool = False,
+        n_workers: int = 1,
+    ) -> Self:
+        count = bound_counter()
+        maps = [
+            pl.col(col).map_batches(_map_series(udf, col, count, batch_size, dedupe, n_workers), return_dtype=pl.Utf8)
+            for col, udf in udf_map.items()
+        ]
+        return self.__class__(service=self.service.with_columns(maps))
 
     def to_csr(self) -> csr_matrix:
         return csr_matrix(self.to_numpy())
@@ -314,13 +397,22 @@ class PolarsDataset(Dataset[pl.DataFrame | pl.LazyFrame]):
 
     @property
     def hash_dataset(self) -> str:
-        row_hashes = self.get_dataframe.hash_rows(seed=42)
+        # Each 64-bit row hash is digested as 64 little-endian bytes, written for a batch of rows at once
         hasher = hashlib.sha256()
-        for row_hash in row_hashes:
-            hasher.update(row_hash.to_bytes(64, 'little'))
+        for batch in self.iter_batches(_HASH_BATCH_ROWS):
+            row_hashes = np.zeros((batch.shape[0], 8), dtype='<u8')
+            row_hashes[:, 0] = batch.get_dataframe.hash_rows(seed=42).to_numpy()
+            hasher.update(row_hashes.data)
         return hasher.digest().hex()
 
-    def get_mlflow_dataset(self, conf: SourceConfig) -> MLflowDataset:
+    @property
+    def nbytes(self) -> int:
+        return int(self.get_dataframe.estimated_size())
+
+    def get_mlflow_dataset(self, conf: SourceConfig) -> 'MLflowDataset':
+        from mlflow.data.dataset import Dataset as MLflowDataset  # type: ignore
+        from mlflow.types.utils import _infer_schema  # type: ignore
+
         from ml_easy.recipes.utils import resolve_dataset_source
 
         class PolarsMLFlowDataset(MLflowDataset):
@@ -358,16 +450,45 @@ class PolarsDataset(Dataset[pl.DataFrame | pl.LazyFrame]):
 
             @property
             def schema(self) -> Optional[Any]:
-                return _infer_schema(self.dataset.to_pandas())
+                return _infer_schema(self.dataset.slice(0, _SCHEMA_SAMPLE_ROWS).to_pandas())
 
         return PolarsMLFlowDataset(self)
 
 
 class CsrMatrixDataset(Dataset[csr_matrix]):
+    """
+    Sparse feature matrix. Index arrays are kept int32 whenever the matrix allows it, as scipy
+    promotes them to int64 on stacking and fancy indexing; value dtypes are never changed
+    implicitly, mixing them is an error.
+    """
 
     def __init__(self, service: csr_matrix):
         super().__init__(service)
 
+    @classmethod
+    def _compact_indices(cls, matrix: csr_matrix) -> csr_matrix:
+        if matrix.indices.dtype == np.int32 and matrix.indptr.dtype == np.int32:
+            return matrix
+        if max(matrix.nnz, *matrix.shape) > np.iinfo(np.int32).max:
+            return matrix
+        return csr_matrix(
+            (matrix.data, matrix.indices.astype(np.int32), matrix.indptr.astype(np.int32)), shape=matrix.shape
+        )
+
+    def astype(self, dtype: Any) -> Self:
+        """
+        Casts the values to ``dtype``, without copying them if they already have it.
+        """
+        return self.__class__(self._compact_indices(self.service.astype(dtype, copy=False)))
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.service.dtype
+
+    @property
+    def nnz(self) -> int:
+        return self.service.nnz
+
     def __iter__(self) -> Iterable:
         coo = self.service.tocoo()
         for i, j, v in zip(coo.row, coo.col, coo.data):
@@ -392,7 +513,7 @@ class CsrMatrixDataset(Dataset[csr_matrix]):
 
     def select(self, cols: List[int]) -> Self:
         sub_matrix = self.service[:, cols]
-        return self.__class__(sub_matrix)
+        return self.__class__(self._compact_indices(sub_matrix))
 
     @property
     def columns(self) -> List[str]:
@@ -402,10 +523,10 @@ class CsrMatrixDataset(Dataset[csr_matrix]):
     def dtypes(self) -> List[str]:
         return [str(self.service.dtype)]
 
-    def collect(self) -> Self:
+    def collect(self, streaming: bool = False) -> Self:
         return self
 
-    def filter(self, filters: Dict[str, List[Union['EqualFilter[str]', 'InFilter[str]']]]) -> Self:
+    def filter(self, filters: Union[FilterPlan, Mapping[str, Sequence[Filter]]]) -> Self:
         raise NotImplementedError('Filtering not implemented for CSR matrices.')
 
     def drop_nulls(self, subset: Union[str, List[str], None] = None) -> Self:
@@ -416,41 +537,97 @@ class CsrMatrixDataset(Dataset[csr_matrix]):
         cls, items: Iterable[Self], *, how: str = 'vertical', rechunk: bool = False, parallel: bool = True
     ) -> Self:
         matrices = [item.service for item in items]
+        dtypes = {matrix.dtype for matrix in matrices}
+        if len(dtypes) > 1:
+            raise MlflowException(
+                f'Cannot concatenate CSR matrices of different dtypes {sorted(str(dtype) for dtype in dtypes)}, '
+                'cast them to the feature dtype of the recipe first.',
+                error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+            )
         if how == 'vertical':
-            concatenated = vstack(matrices)
+            concatenated = vstack(matrices, format='csr')
         elif how == 'horizontal':
-            concatenated = hstack(matrices)
+            concatenated = hstack(matrices, format='csr')
         else:
             raise ValueError(f"Invalid how argument: {how}")
-        return cls(service=concatenated)
+        return cls(service=cls._compact_indices(concatenated))
 
     def concatenate(
         self, items: Iterable[Self], *, how: str = 'vertical', rechunk: bool = False, parallel: bool = True
     ) -> Self:
         return self.__class__.concat([self] + list(items), how=how, rechunk=rechunk, parallel=parallel)
 
+    def _rows(self, start: int, stop: int) -> Self:
+        # Rows start to stop are views of the values and column indices between their indptr bounds,
+        # assigned rather than passed to the constructor, which copies views much smaller than their base
+        _check_rows(start, stop, self.shape[0])
+        matrix = self.service
+        begin, end = matrix.indptr[start], matrix.indptr[stop]
+        rows = csr_matrix((stop - start, matrix.shape[1]), dtype=matrix.dtype)
+        rows.data, rows.indices = matrix.data[begin:end], matrix.indices[begin:end]
+        rows.indptr = matrix.indptr[start : stop + 1] - begin
+        return self.__class__(self._compact_indices(rows))
+
     def slice(self, offset: int, length: Union[int, None] = None) -> Self:
+        """
+        Rows from ``offset`` on, ``length`` of them (all the remaining ones when None), with the
+        semantics of ``polars.DataFrame.slice``: negative offsets count from the end and negative
+        lengths stop that many rows before it.
+        """
+        n_rows = self.shape[0]
+        start = offset + n_rows if offset < 0 else offset
         if length is None:
-            length = self.service.shape[0] - offset
-        sub_matrix = self.service[offset : offset + length, :]
-        return self.__class__(sub_matrix)
+            stop = n_rows
+        else:
+            stop = n_rows + length if length < 0 else start + length
+        start, stop = min(max(start, 0), n_rows), min(max(stop, 0), n_rows)
+        return self._rows(start, max(start, stop))
+
+    def iter_batches(self, batch_size: int, columns: Optional[Sequence[str]] = None) -> Iterator[Self]:
+        """
+        Consecutive blocks of ``batch_size`` rows, cut from the row pointers. ``columns`` are
+        column names, i.e. positions as strings.
+        """
+        _check_batch_size(batch_size)
+        cols = None if columns is None else [int(col) for col in columns]
+        for offset in range(0, self.shape[0], batch_size):
+            batch = self._rows(offset, min(offset + batch_size, self.shape[0]))
+            yield batch if cols is None else batch.select(cols)
+
+    def map_str(self, udf_map: Dict[str, Callable[[str], str]], dedupe: bool = False, n_workers: int = 1) -> Self:
+        raise NotImplementedError('String mapping not implemented for CSR matrices.')
 
-    def map_str(self, udf_map: Dict[str, Callable[[str], str]]) -> Self:
+    def map_str_batches(
+        self,
+        udf_map: Dict[str, Callable[[Sequence[str]], Sequence[str]]],
+        batch_size: Optional[int] = 1024,
+        dedupe: bool = False,
+        n_workers: int = 1,
+    ) -> Self:
         raise NotImplementedError('String mapping not implemented for CSR matrices.')
 
     def to_csr(self) -> csr_matrix:
         return copy.deepcopy(self.service)
 
     def _getitem(self, indices):
-        return self.__class__(self.service.__getitem__(indices))
+        return self.__class__(self._compact_indices(self.service.__getitem__(indices)))
 
     @property
     def hash_dataset(self) -> str:
+        # The values of consecutive row blocks, digested in order, are the values of the matrix
         m = hashlib.sha256()
-        m.update(self.service.data.tobytes())
+        for batch in self.iter_batches(_HASH_BATCH_ROWS):
+            m.update(np.ascontiguousarray(batch.service.data).data)
         return m.hexdigest()
 
-    def get_mlflow_dataset(self, conf: SourceConfig) -> MLflowDataset:
+    @property
+    def nbytes(self) -> int:
+        return self.service.data.nbytes + self.service.indices.nbytes + self.service.indptr.nbytes
+
+    def get_mlflow_dataset(self, conf: SourceConfig) -> 'MLflowDataset':
+        from mlflow.data.dataset import Dataset as MLflowDataset  # type: ignore
+        from mlflow.types.utils import _infer_schema  # type: ignore
+
         from ml_easy.recipes.utils import resolve_dataset_source
 
         class CsrMatrixMLFlowDataset(MLflowDataset):
@@ -469,7 +646,7 @@ class CsrMatrixDataset(Dataset[csr_matrix]):
                 base_dict.update(
                     {
                         'shape': str(self.dataset.shape),
-                        'nnz': str(self.dataset.service.nnz),
+                        'nnz': str(self.dataset.nnz),
                         'dtype': str(self.dataset.service.dtype),
                         'schema': str(self.schema),
                         'profile': str(self.profile),
@@ -481,13 +658,390 @@ class CsrMatrixDataset(Dataset[csr_matrix]):
             def profile(self) -> Optional[Any]:
                 return {
                     'shape': self.dataset.shape,
-                    'nnz': self.dataset.service.nnz,
-                    'density': self.dataset.service.nnz / (self.dataset.shape[0] * self.dataset.shape[1]),
+                    'nnz': self.dataset.nnz,
+                    'density': self.dataset.nnz / (self.dataset.shape[0] * self.dataset.shape[1]),
                     'dtype': str(self.dataset.service.dtype),
                 }
 
             @property
             def schema(self) -> Optional[Any]:
-                return _infer_schema(self.dataset.to_numpy())
+                # The schema of an array only depends on its dtype and number of columns
+                return _infer_schema(self.dataset.slice(0, 1).to_numpy())
 
         return CsrMatrixMLFlowDataset(self)
+
+
+_INT32_MAX = np.iinfo(np.int32).max
+# Values copied at once when rewriting a memory-mapped array
+_MEMMAP_CHUNK = 1 << 22
+
+
+def _map_array(path: str, dtype: Any, length: int, offset: int = 0) -> np.ndarray:
+    # Empty files cannot be memory-mapped
+    if not length:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset * np.dtype(dtype).itemsize, shape=(length,))
+
+
+def _rewrite_array(path: str, dtype: Any, new_dtype: Any, length: int) -> None:
+    tmp_path = f'{path}.tmp'
+    source = _map_array(path, dtype, length)
+    with open(tmp_path, 'wb') as f:
+        for offset in range(0, length, _MEMMAP_CHUNK):
+            source[offset : offset + _MEMMAP_CHUNK].astype(new_dtype).tofile(f)
+    del source
+    os.replace(tmp_path, path)
+
+
+class CsrMatrixWriter:
+    """
+    Writes a CSR matrix to the directory ``path`` a block of rows at a time, as the raw ``data``,
+    ``indices`` and ``indptr`` arrays and a ``meta.json`` file, so that the matrix never has to be
+    held in memory. Index arrays are int32 whenever the matrix allows it, as scipy would otherwise
+    copy them to downcast them.
+    """
+
+    _ARRAYS = ('data', 'indices', 'indptr')
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.n_rows = 0
+        self.nnz = 0
+        self.n_cols: Optional[int] = None
+        self.dtype: Optional[np.dtype] = None
+        self._files = {name: open(os.path.join(path, f'{name}.bin'), 'wb') for name in self._ARRAYS}
+        # Offsets are written as int64 until the number of non-zeros is known
+        np.zeros(1, dtype=np.int64).tofile(self._files['indptr'])
+
+    def __enter__(self) -> 'CsrMatrixWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        for f in self._files.values():
+            f.close()
+
+    def append(self, block: Union[csr_matrix, Dataset]) -> None:
+        if isinstance(block, CsrMatrixDataset):
+            matrix = block.service
+        else:
+            matrix = block.to_csr() if isinstance(block, Dataset) else csr_matrix(block)
+        if self.n_cols is None:
+            self.n_cols, self.dtype = matrix.shape[1], matrix.dtype
+        elif matrix.shape[1] != self.n_cols or matrix.dtype != self.dtype:
+            raise MlflowException(
+                f'Cannot append a {matrix.shape[1]}-column {matrix.dtype} block to a {self.n_cols}-column '
+                f'{self.dtype} CSR matrix',
+                error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+            )
+        indptr = matrix.indptr.astype(np.int64)
+        begin, end = int(indptr[0]), int(indptr[-1])
+        np.ascontiguousarray(matrix.data[begin:end]).tofile(self._files['data'])
+        index_dtype = np.int32 if self.n_cols <= _INT32_MAX else np.int64
+        matrix.indices[begin:end].astype(index_dtype, copy=False).tofile(self._files['indices'])
+        (indptr[1:] - begin + self.nnz).tofile(self._files['indptr'])
+        self.n_rows += matrix.shape[0]
+        self.nnz += end - begin
+
+    def close(self) -> 'MemmapCsrMatrixDataset':
+        for f in self._files.values():
+            f.close()
+        n_cols = self.n_cols or 0
+        index_dtype = np.int32 if max(self.n_rows, n_cols, self.nnz) <= _INT32_MAX else np.int64
+        indptr_path = os.path.join(self.path, 'indptr.bin')
+        if index_dtype == np.int32:
+            _rewrite_array(indptr_path, np.int64, np.int32, self.n_rows + 1)
+        elif n_cols <= _INT32_MAX:
+            _rewrite_array(os.path.join(self.path, 'indices.bin'), np.int32, np.int64, self.nnz)
+        meta = {
+            'shape': [self.n_rows, n_cols],
+            'nnz': self.nnz,
+            'dtype': str(self.dtype or np.dtype(np.float64)),
+            'index_dtype': np.dtype(index_dtype).name,
+        }
+        with open(os.path.join(self.path, MEMMAP_META_FILE_NAME), 'w') as f:
+            json.dump(meta, f)
+        return MemmapCsrMatrixDataset.open(self.path)
+
+
+def _digest(ds: CsrMatrixDataset) -> bytes:
+    matrix = ds.service
+    hasher = hashlib.sha256(f'{matrix.shape}:{matrix.dtype}'.encode())
+    for array in (matrix.data, matrix.indices, matrix.indptr):
+        hasher.update(np.ascontiguousarray(array).data)
+    return hasher.digest()
+
+
+_derived_directory: ContextVar[Optional[str]] = ContextVar('ml_easy_derived_matrix_directory', default=None)
+
+
+@contextmanager
+def derived_matrix_directory(path: str) -> Iterator[None]:
+    """
+    Writes the matrices derived from memory-mapped ones in the block to ``path``, typically a
+    directory of the output of the step deriving them, rather than next to their source.
+    """
+    token = _derived_directory.set(path)
+    try:
+        yield
+    finally:
+        _derived_directory.reset(token)
+
+
+class MemmapCsrMatrixDataset(CsrMatrixDataset):
+    """
+    CSR matrix whose arrays are memory-mapped from the files written by ``CsrMatrixWriter``, so that
+    only the pages in use are held in memory and processes opening the same files share them.
+    Row slices are views of the files; selecting rows (e.g. splitting) and stacking matrices
+    vertically write new matrices, a batch at a time, to the ``derived_matrix_directory`` of the
+    block or else next to the source one. They are named by a digest of their rows, so deriving
+    the same matrix again replaces it. Other operations return in-memory ``CsrMatrixDataset``
+    instances.
+    """
+
+    #: Rows selected or stacked at once when writing derived matrices
+    batch_rows = 10_000
+
+    def __init__(self, service: csr_matrix, path: str, row_offset: int = 0):
+        super().__init__(service)
+        self.path = path
+        self.row_offset = row_offset
+
+    @classmethod
+    def open(cls, path: str, rows: Optional[Tuple[int, int]] = None) -> Self:
+        """
+        Maps the matrix written to ``path``, or only its rows ``rows[0]`` to ``rows[1]``.
+        """
+        with open(os.path.join(path, MEMMAP_META_FILE_NAME)) as f:
+            meta = json.load(f)
+        n_rows, n_cols = meta['shape']
+        start, stop = rows or (0, n_rows)
+        indptr = _map_array(os.path.join(path, 'indptr.bin'), meta['index_dtype'], stop - start + 1, start)
+        begin, end = int(indptr[0]), int(indptr[-1])
+        if begin:
+            indptr = indptr - indptr.dtype.type(begin)
+        # Each range is mapped on its own, as scipy copies arrays that are small views of larger ones
+        matrix = csr_matrix(
+            (
+                _map_array(os.path.join(path, 'data.bin'), meta['dtype'], end - begin, begin),
+                _map_array(os.path.join(path, 'indices.bin'), meta['index_dtype'], end - begin, begin),
+                indptr,
+            ),
+            shape=(stop - start, n_cols),
+            copy=False,
+        )
+        return cls(matrix, path, start)
+
+    @classmethod
+    def write(cls, matrices: Iterable[Union[csr_matrix, Dataset]], path: str) -> Self:
+        """
+        Writes the vertical stack of ``matrices`` to ``path``, one at a time.
+        """
+        with CsrMatrixWriter(path) as writer:
+            for matrix in matrices:
+                writer.append(matrix)
+        return writer.close()  # type: ignore
+
+    def __reduce__(self):
+        # Pickled as a reference to the files, which the unpickling process maps again
+        return self.__class__.open, (self.path, (self.row_offset, self.row_offset + self.shape[0]))
+
+    def _identity(self) -> bytes:
+        return f'{os.path.abspath(self.path)}:{self.row_offset}:{self.shape[0]}'.encode()
+
+    def _derived_path(self, *parts: bytes) -> str:
+        hasher = hashlib.sha256(self._identity())
+        for part in parts:
+            hasher.update(part)
+        directory = _derived_directory.get() or os.path.dirname(self.path)
+        return os.path.join(directory, f'{os.path.basename(self.path)}-{hasher.hexdigest()[:16]}')
+
+    @classmethod
+    def _write_derived(cls, matrices: Iterable[Union[csr_matrix, Dataset]], path: str) -> Self:
+        # Written aside then moved in place: datasets still mapping a previous write of path keep its unlinked files
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f'.{os.path.basename(path)}-', dir=parent)
+        try:
+            cls.write(matrices, staging)
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(staging, path)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return cls.open(path)
+
+    def _rows(self, start: int, stop: int) -> Self:
+        _check_rows(start, stop, self.shape[0])
+        return self.open(self.path, (self.row_offset + start, self.row_offset + stop))
+
+    def _getitem(self, indices):
+        if isinstance(indices, slice) and indices.step in (None, 1):
+            start, stop, _ = indices.indices(self.shape[0])
+            return self._rows(start, max(start, stop))
+        if isinstance(indices, (list, np.ndarray, pl.Series)):
+            rows = np.asarray(indices)
+            if rows.ndim == 1 and (rows.dtype.kind in 'iu' or not len(rows)):
+                return self._write_derived(
+                    (
+                        self.service[rows[offset : offset + self.batch_rows]]
+                        for offset in range(0, len(rows), self.batch_rows)
+                    ),
+                    self._derived_path(b'take', rows.astype(np.int64).tobytes()),
+                )
+        return CsrMatrixDataset(self._compact_indices(self.service[indices]))
+
+    @classmethod
+    def concat(
+        cls, items: Iterable[CsrMatrixDataset], *, how: str = 'vertical', rechunk: bool = False, parallel: bool = True
+    ) -> CsrMatrixDataset:
+        items = list(items)
+        if how != 'vertical':
+            return CsrMatrixDataset.concat(items, how=how)
+        dtypes = {item.dtype for item in items}
+        if len(dtypes) > 1:
+            raise MlflowException(
+                f'Cannot concatenate CSR matrices of different dtypes {sorted(str(dtype) for dtype in dtypes)}, '
+                'cast them to the feature dtype of the recipe first.',
+                error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+            )
+        source = next(item for item in items if isinstance(item, MemmapCsrMatrixDataset))
+        parts = [item._identity() if isinstance(item, MemmapCsrMatrixDataset) else _digest(item) for item in items]
+        return cls._write_derived(
+            (batch for item in items for batch in item.iter_batches(cls.batch_rows)),
+            source._derived_path(b'concat', *parts),
+        )
+
+    def astype(self, dtype: Any) -> CsrMatrixDataset:
+        if np.dtype(dtype) == self.dtype:
+            return self
+        return CsrMatrixDataset(self._compact_indices(self.service.astype(dtype)))
+
+    def select(self, cols: List[int]) -> CsrMatrixDataset:
+        return CsrMatrixDataset(self._compact_indices(self.service[:, cols]))
+
+
+class BlockCsrMatrixDataset(CsrMatrixDataset):
+    """
+    CSR matrix kept as the horizontal sequence of its column blocks (e.g. one per embedded text
+    column), only assembled into a single matrix, once, when ``service`` is read. Selecting whole
+    blocks of columns, row slices and row selections, stacking and casting work block by block
+    without assembling it.
+    """
+
+    def __init__(self, blocks: Sequence[Union[csr_matrix, CsrMatrixDataset]]):
+        matrices = [
+            (
+                block.service
+                if isinstance(block, CsrMatrixDataset)
+                else block if isinstance(block, csr_matrix) else csr_matrix(block)
+            )
+            for block in blocks
+        ]
+        if not matrices:
+            raise MlflowException(
+                'A block CSR matrix needs at least one block', error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE
+            )
+        n_rows = {matrix.shape[0] for matrix in matrices}
+        dtypes = {matrix.dtype for matrix in matrices}
+        if len(n_rows) > 1 or len(dtypes) > 1:
+            raise MlflowException(
+                f'Cannot stack CSR blocks with different numbers of rows {sorted(n_rows)} or dtypes '
+                f'{sorted(str(dtype) for dtype in dtypes)}',
+                error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+            )
+        self.blocks: List[csr_matrix] = [self._compact_indices(matrix) for matrix in matrices]
+        self.offsets = np.cumsum([0] + [matrix.shape[1] for matrix in self.blocks])
+        super().__init__(None)  # type: ignore
+
+    @property  # type: ignore[override]
+    def service(self) -> csr_matrix:
+        if self._assembled is None:
+            # scipy stacks CSR matrices horizontally directly from their buffers
+            self._assembled = self._compact_indices(hstack(self.blocks, format='csr'))
+        return self._assembled
+
+    @service.setter
+    def service(self, value: Optional[csr_matrix]) -> None:
+        self._assembled = value
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The assembled matrix is a copy of the blocks
+        return {**self.__dict__, '_assembled': None}
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.blocks[0].shape[0], int(self.offsets[-1])
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.blocks[0].dtype
+
+    @property
+    def nnz(self) -> int:
+        return sum(block.nnz for block in self.blocks)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.data.nbytes + block.indices.nbytes + block.indptr.nbytes for block in self.blocks)
+
+    @property
+    def hash_dataset(self) -> str:
+        # Batches of rows are assembled one at a time, unless the whole matrix already is
+        if self._assembled is not None:
+            return CsrMatrixDataset(self._assembled).hash_dataset
+        return super().hash_dataset
+
+    def astype(self, dtype: Any) -> Self:
+        return self.__class__([block.astype(dtype, copy=False) for block in self.blocks])
+
+    def select(self, cols: List[int]) -> Self:
+        """
+        Columns ``cols``, the blocks they fully cover in order being reused as is and the others
+        sliced block by block.
+        """
+        indices = np.asarray(cols, dtype=np.int64).reshape(-1)
+        indices = np.where(indices < 0, indices + self.shape[1], indices)
+        if len(indices) and (indices.min() < 0 or indices.max() >= self.shape[1]):
+            raise IndexError(f'Column index out of range for a matrix of {self.shape[1]} columns')
+        owners = np.searchsorted(self.offsets, indices, side='right') - 1
+        pieces = []
+        for run in np.split(np.arange(len(indices)), np.flatnonzero(np.diff(owners)) + 1):
+            if not len(run):
+                continue
+            block = self.blocks[owners[run[0]]]
+            local = indices[run] - self.offsets[owners[run[0]]]
+            if len(local) == block.shape[1] and np.array_equal(local, np.arange(block.shape[1])):
+                pieces.append(block)
+            else:
+                pieces.append(block[:, local])
+        if not pieces:
+            return self.__class__([self.blocks[0][:, :0]])
+        return self.__class__(pieces)
+
+    def _rows(self, start: int, stop: int) -> Self:
+        _check_rows(start, stop, self.shape[0])
+        return self.__class__([block[start:stop, :] for block in self.blocks])
+
+    def _getitem(self, indices):
+        if isinstance(indices, tuple):
+            return CsrMatrixDataset(self._compact_indices(self.service[indices]))
+        return self.__class__([block[indices] for block in self.blocks])
+
+    @classmethod
+    def concat(
+        cls, items: Iterable[CsrMatrixDataset], *, how: str = 'vertical', rechunk: bool = False, parallel: bool = True
+    ) -> CsrMatrixDataset:
+        items = list(items)
+        if how == 'horizontal':
+            return cls([block for item in items for block in (item.blocks if isinstance(item, cls) else [item])])
+        widths = {tuple(np.diff(item.offsets)) if isinstance(item, cls) else None for item in items}
+        if how == 'vertical' and len(widths) == 1 and None not in widths:
+            dtypes = {item.dtype for item in items}
+            if len(dtypes) > 1:
+                raise MlflowException(
+                    f'Cannot concatenate CSR matrices of different dtypes {sorted(str(dtype) for dtype in dtypes)}, '
+                    'cast them to the feature dtype of the recipe first.',
+                    error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+                )
+            return cls([vstack([item.blocks[i] for item in items], format='csr') for i in range(len(items[0].blocks))])
+        return CsrMatrixDataset.concat(items, how=how)
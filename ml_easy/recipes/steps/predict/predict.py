@@ -0,0 +1,37 @@
+import logging
+from typing import Generic, Optional, Type, TypeVar
+
+from ml_easy.recipes.interfaces.config import Context
+from ml_easy.recipes.interfaces.step import BaseStep
+from ml_easy.recipes.steps.cards_config import PredictCard
+from ml_easy.recipes.steps.steps_config import BasePredictConfig
+
+_logger = logging.getLogger(__name__)
+
+
+U = TypeVar('U', bound='BasePredictConfig')
+
+
+class PredictStep(BaseStep[U, PredictCard], Generic[U]):
+
+    def __init__(self, predict_config: U, context: Context):
+        super().__init__(predict_config, context)
+
+    @property
+    def name(self) -> str:
+        """
+        Returns back the name of the step for the current class instance. This is used
+        downstream by the execution engine to create step-specific directory structures.
+        """
+        return 'predict'
+
+    @classmethod
+    def card_type(cls) -> Type[PredictCard]:
+        """
+        Returns the type of card to be created for the step.
+        """
+        return PredictCard
+
+    @property
+    def previous_step_name(self) -> Optional[str]:
+        return None
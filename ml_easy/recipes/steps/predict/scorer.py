@@ -0,0 +1,214 @@
+import logging
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+import polars as pl
+
+from ml_easy.recipes.enum import MLFlowErrorCode, PredictionSinkType
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.config import Context
+from ml_easy.recipes.steps.ingest.datasets import PolarsDataset
+from ml_easy.recipes.steps.steps_config import BasePredictConfig, PredictionSinkConfig
+from ml_easy.recipes.steps.train.models import Model
+from ml_easy.recipes.steps.transform.transformer import Transformer
+
+_logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class _StageFailure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+class PredictionWriter(ABC):
+    @abstractmethod
+    def write(self, predictions: pl.DataFrame) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    @property
+    @abstractmethod
+    def uri(self) -> str:
+        pass
+
+
+class ParquetPredictionWriter(PredictionWriter):
+    """
+    Writes each batch of predictions as one part file of a Parquet dataset directory.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._n_parts = 0
+        os.makedirs(self._path, exist_ok=True)
+
+    def write(self, predictions: pl.DataFrame) -> None:
+        predictions.write_parquet(os.path.join(self._path, f'part-{self._n_parts:05d}.parquet'))
+        self._n_parts += 1
+
+    @property
+    def uri(self) -> str:
+        return self._path
+
+
+class SqlPredictionWriter(PredictionWriter):
+    """
+    Appends each batch of predictions to a SQL table with a single bulk insert.
+    """
+
+    def __init__(self, table_name: str, credentials: Any):
+        from sqlalchemy import create_engine
+
+        self._table_name = table_name
+        self._engine = create_engine(PolarsDataset.get_sql_connection_string(credentials))
+
+    def write(self, predictions: pl.DataFrame) -> None:
+        predictions.write_database(self._table_name, connection=self._engine, if_table_exists='append')
+
+    def close(self) -> None:
+        self._engine.dispose()
+
+    @property
+    def uri(self) -> str:
+        return f'{self._engine.url.render_as_string(hide_password=True)}/{self._table_name}'
+
+
+class BatchScorer:
+    """
+    Scores a SQL table with a trained transformer and model. The table is streamed in chunks
+    through a bounded pipeline of threads (read -> featurize -> predict -> write), so that
+    database reads, featurization and prediction of consecutive chunks overlap while at most
+    ``queue_size`` chunks wait between two stages.
+    """
+
+    def __init__(self, conf: BasePredictConfig, context: Context):
+        self.conf = conf
+        self.context = context
+        self.n_rows = 0
+        self.elapsed_seconds = 0.0
+
+    def load(self) -> Tuple[Transformer, Model]:
+        from ml_easy.recipes.steps.register.loader import MlflowRunLoader
+
+        loader = MlflowRunLoader(self.context.experiment.tracking_uri, self.conf.run_id)
+        return loader.load_transformer(), loader.load_model(self.conf.artifact_path)
+
+    def get_writer(self, sink: PredictionSinkConfig) -> PredictionWriter:
+        if sink.type == PredictionSinkType.PARQUET:
+            return ParquetPredictionWriter(sink.path)  # type: ignore
+        elif sink.type == PredictionSinkType.SQL:
+            return SqlPredictionWriter(sink.table_name, sink.credentials.model_dump())  # type: ignore
+        raise MlflowException(
+            f'Unsupported prediction sink {sink.type}', error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE
+        )
+
+    def read_chunks(self) -> Iterator[PolarsDataset]:
+        return PolarsDataset.iter_sql_database(
+            self.conf.table_name, self.conf.credentials.model_dump(), batch_size=self.conf.chunk_size
+        )
+
+    def score(self) -> PredictionWriter:
+        transformer, model = self.load()
+        writer = self.get_writer(self.conf.sink)
+        stop = threading.Event()
+
+        def featurize(chunk: PolarsDataset) -> Tuple[PolarsDataset, Any]:
+            X = transformer.transform(chunk)
+            if X.shape[0] != chunk.shape[0]:
+                raise MlflowException(
+                    f'The inference transformer changed the number of rows ({chunk.shape[0]} -> {X.shape[0]}), '
+                    'predictions cannot be matched with their input rows.',
+                    error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+                )
+            return chunk, X
+
+        def predict(item: Tuple[PolarsDataset, Any]) -> pl.DataFrame:
+            chunk, X = item
+            yhat = model.predict(X).to_numpy().reshape(-1)
+            return chunk.get_dataframe.select(self.conf.id_cols).with_columns(pl.Series(self.context.target_col, yhat))
+
+        read_q: queue.Queue = queue.Queue(maxsize=self.conf.queue_size)
+        featurized_q: queue.Queue = queue.Queue(maxsize=self.conf.queue_size)
+        predicted_q: queue.Queue = queue.Queue(maxsize=self.conf.queue_size)
+        threads = [
+            threading.Thread(target=self._produce, args=(self.read_chunks(), read_q, stop), daemon=True),
+            threading.Thread(target=self._pipe, args=(featurize, read_q, featurized_q, stop), daemon=True),
+            threading.Thread(target=self._pipe, args=(predict, featurized_q, predicted_q, stop), daemon=True),
+        ]
+        n_rows = 0
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while (item := predicted_q.get()) is not _END:
+                if isinstance(item, _StageFailure):
+                    raise item.exc
+                writer.write(item)
+                n_rows += item.height
+        finally:
+            stop.set()
+            writer.close()
+            for thread in threads:
+                thread.join()
+        self.elapsed_seconds = time.perf_counter() - start
+        self.n_rows = n_rows
+        _logger.info(
+            f'Scored {n_rows} rows in {self.elapsed_seconds:.2f}s ({self.rows_per_sec:.1f} rows/sec) into {writer.uri}'
+        )
+        return writer
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.n_rows / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @classmethod
+    def _put(cls, q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @classmethod
+    def _get(cls, q: queue.Queue, stop: threading.Event) -> Optional[Any]:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    @classmethod
+    def _produce(cls, items: Iterable[Any], out_q: queue.Queue, stop: threading.Event) -> None:
+        try:
+            for item in items:
+                if not cls._put(out_q, item, stop):
+                    return
+            cls._put(out_q, _END, stop)
+        except BaseException as e:
+            cls._put(out_q, _StageFailure(e), stop)
+
+    @classmethod
+    def _pipe(cls, fn: Callable[[Any], Any], in_q: queue.Queue, out_q: queue.Queue, stop: threading.Event) -> None:
+        while (item := cls._get(in_q, stop)) is not _END:
+            if isinstance(item, _StageFailure):
+                cls._put(out_q, item, stop)
+                return
+            try:
+                result = fn(item)
+            except BaseException as e:
+                cls._put(out_q, _StageFailure(e), stop)
+                return
+            if not cls._put(out_q, result, stop):
+                return
+        cls._put(out_q, _END, stop)
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import posixpath
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from mlflow.data.dataset import Dataset as MLflowDataset  # type: ignore
+from mlflow.entities import Dataset as DatasetEntity  # type: ignore
+from mlflow.store.artifact.artifact_repository_registry import (  # type: ignore
+    get_artifact_repository,
+)
+
+from ml_easy.recipes.constants import (
+    BLOB_COMPLETE_MARKER,
+    BLOB_DATASET_FILE_NAME,
+    BLOB_TREE_SUFFIX,
+)
+
+_CHUNK_SIZE = 1 << 20
+
+
+def digest_file(local_path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(local_path, 'rb') as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed artifact store on top of any MLflow artifact repository (local directory,
+    S3, GCS, ...). A file is stored once under the digest of its name and content,
+    ``<digest[:2]>/<digest>/<name>``, next to a completion marker written last; storing a file
+    that is already there only costs hashing it. A directory is stored as its files plus a tree
+    listing them, so that storing a directory again only uploads the files that changed. Runs
+    reference stored blobs by their path relative to the store.
+
+    Dataset descriptions (schema and profile, which are costly to compute) are stored the same
+    way, keyed by the dataset digest, name and source.
+    """
+
+    def __init__(self, uri: str):
+        self.uri = uri
+        self._repo = get_artifact_repository(uri)
+        self._known: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _blob_dir(cls, digest: str) -> str:
+        return posixpath.join(digest[:2], digest)
+
+    @classmethod
+    def _blob_digest(cls, name: str, content_digest: str) -> str:
+        return hashlib.sha256(f'{name}\n{content_digest}'.encode()).hexdigest()
+
+    def exists(self, digest: str) -> bool:
+        with self._lock:
+            if self._known.get(digest):
+                return True
+        names = {posixpath.basename(f.path) for f in self._repo.list_artifacts(self._blob_dir(digest))}
+        found = BLOB_COMPLETE_MARKER in names
+        with self._lock:
+            self._known[digest] = found
+        return found
+
+    def put(self, local_path: str) -> str:
+        """
+        Stores a file or directory, skipping the files already there.
+
+        Returns:
+            The path of the blob relative to the store.
+        """
+        if os.path.isdir(local_path):
+            return self._put_tree(local_path)
+        name = os.path.basename(local_path)
+        return self._put(local_path, self._blob_digest(name, digest_file(local_path)))
+
+    def _put(self, local_path: str, digest: str) -> str:
+        blob_dir = self._blob_dir(digest)
+        if not self.exists(digest):
+            self._repo.log_artifact(local_path, blob_dir)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                marker = os.path.join(tmp_dir, BLOB_COMPLETE_MARKER)
+                open(marker, 'w').close()
+                self._repo.log_artifact(marker, blob_dir)
+            with self._lock:
+                self._known[digest] = True
+        return posixpath.join(blob_dir, os.path.basename(local_path))
+
+    def _put_tree(self, local_path: str) -> str:
+        tree = {}
+        for root, _, files in os.walk(local_path):
+            for name in files:
+                path = os.path.join(root, name)
+                tree[os.path.relpath(path, local_path).replace(os.sep, '/')] = self.put(path)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tree_path = os.path.join(tmp_dir, os.path.basename(os.path.normpath(local_path)) + BLOB_TREE_SUFFIX)
+            with open(tree_path, 'w') as f:
+                json.dump(tree, f, sort_keys=True)
+            return self.put(tree_path)
+
+    def get(self, blob_path: str, dst_path: Optional[str] = None) -> str:
+        """
+        Downloads a blob by its relative path, rebuilding directories from their tree, and returns
+        the local path of the copy.
+        """
+        dst_path = dst_path or tempfile.mkdtemp()
+        if not blob_path.endswith(BLOB_TREE_SUFFIX):
+            return self._repo.download_artifacts(blob_path, dst_path)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(self._repo.download_artifacts(blob_path, tmp_dir)) as f:
+                tree = json.load(f)
+        local_path = os.path.join(dst_path, posixpath.basename(blob_path)[: -len(BLOB_TREE_SUFFIX)])
+        os.makedirs(local_path, exist_ok=True)
+        for rel_path, file_blob_path in tree.items():
+            target = os.path.join(local_path, *rel_path.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=local_path) as tmp_dir:
+                os.replace(self._repo.download_artifacts(file_blob_path, tmp_dir), target)
+        return local_path
+
+    def describe_dataset(self, dataset: MLflowDataset) -> DatasetEntity:
+        """
+        Returns the MLflow entity of ``dataset``, computed and stored on first use, read back from
+        the store afterwards.
+        """
+        fields = [dataset.name, dataset.digest, dataset.source._get_source_type(), dataset.source.to_json()]
+        digest = self._blob_digest(BLOB_DATASET_FILE_NAME, json.dumps(fields))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if self.exists(digest):
+                with open(self.get(posixpath.join(self._blob_dir(digest), BLOB_DATASET_FILE_NAME), tmp_dir)) as f:
+                    return DatasetEntity.from_dictionary(json.load(f))
+            entity = dataset._to_mlflow_entity()
+            local_path = os.path.join(tmp_dir, BLOB_DATASET_FILE_NAME)
+            with open(local_path, 'w') as f:
+                json.dump(entity.to_dictionary(), f)
+            self._put(local_path, digest)
+        return entity
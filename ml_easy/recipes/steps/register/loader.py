@@ -0,0 +1,133 @@
+import errno
+import functools
+import os
+import pickle
+import posixpath
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, Optional, Self
+
+import mlflow  # type:ignore
+from mlflow.tracking import MlflowClient  # type:ignore
+
+from ml_easy.recipes.constants import (
+    BLOB_REF_TAG_PREFIX,
+    BLOB_STORE_URI_TAG,
+    INFERENCE_BUNDLE_ARTIFACT_PATH,
+    INFERENCE_BUNDLE_NAME,
+    TRANSFORMER_ARTIFACT_PATH,
+    TRANSFORMER_FILE_NAME,
+)
+from ml_easy.recipes.io.bundle import is_bundle, load_bundle
+from ml_easy.recipes.steps.register.blob_store import BlobStore
+from ml_easy.recipes.steps.train.models import Model, ScikitModel
+from ml_easy.recipes.steps.transform.transformer import (
+    MLPipelineTransformer,
+    Transformer,
+)
+
+
+def fetch_bundle(local_path: str, download: Callable[..., str]) -> str:
+    """
+    Downloads a bundle into the cache path ``local_path`` unless it is already there. ``download``
+    writes into a private staging directory, given as ``dst_path``, and returns the local path of
+    the copy, which is then renamed to ``local_path`` in a single atomic step: concurrent loaders
+    never see a partial bundle, and those losing the race drop their copy for the winner's.
+    """
+    if is_bundle(local_path):
+        return local_path
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=f'.{os.path.basename(local_path)}-', dir=os.path.dirname(local_path))
+    try:
+        downloaded = download(dst_path=staging_dir)
+        try:
+            os.rename(downloaded, local_path)
+        except OSError as e:
+            # Renaming a directory onto a non-empty one fails, the bundle is then the winner's
+            if e.errno not in (errno.EEXIST, errno.ENOTEMPTY) or not is_bundle(local_path):
+                raise
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return local_path
+
+
+class MlflowRunLoader:
+    """
+    Loads back the transformer and the model logged by ``MlflowRegistry`` for a training run,
+    ready for inference.
+
+    Runs logging an inference bundle are loaded from it: the bundle is downloaded once per host
+    into ``cache_dir`` and memory-mapped, so that the inference workers of a host share its pages.
+    Bundles kept in a blob store are cached by digest, so runs registering the same bundle share
+    one local copy. Older runs fall back to the pickled transformer and the MLflow sklearn model.
+    """
+
+    def __init__(self, tracking_uri: str, run_id: str, cache_dir: Optional[str] = None):
+        self.tracking_uri = tracking_uri
+        self.run_id = run_id
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'ml_easy_bundles')
+        self._bundle: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_registered_model(
+        cls, tracking_uri: str, name: str, version: Optional[str] = None, cache_dir: Optional[str] = None
+    ) -> Self:
+        client = MlflowClient(tracking_uri=tracking_uri)
+        if version is None:
+            version = max(int(mv.version) for mv in client.search_model_versions(f"name='{name}'"))
+        return cls(tracking_uri, client.get_model_version(name, str(version)).run_id, cache_dir=cache_dir)
+
+    def _download_bundle(self) -> Optional[str]:
+        client = MlflowClient(tracking_uri=self.tracking_uri)
+        tags = client.get_run(self.run_id).data.tags
+        blob_path = tags.get(BLOB_REF_TAG_PREFIX + INFERENCE_BUNDLE_ARTIFACT_PATH)
+        if blob_path is not None:
+            local_path = os.path.join(self.cache_dir, *posixpath.dirname(blob_path).split('/'), INFERENCE_BUNDLE_NAME)
+            if is_bundle(local_path):
+                return local_path
+            blob_store = BlobStore(tags[BLOB_STORE_URI_TAG])
+            download = functools.partial(blob_store.get, blob_path)
+        else:
+            local_path = os.path.join(self.cache_dir, self.run_id, INFERENCE_BUNDLE_NAME)
+            if is_bundle(local_path):
+                return local_path
+            artifact_path = posixpath.join(INFERENCE_BUNDLE_ARTIFACT_PATH, INFERENCE_BUNDLE_NAME)
+            if not client.list_artifacts(self.run_id, artifact_path):
+                return None
+            download = functools.partial(
+                mlflow.artifacts.download_artifacts,
+                run_id=self.run_id,
+                artifact_path=artifact_path,
+                tracking_uri=self.tracking_uri,
+            )
+        return fetch_bundle(local_path, download)
+
+    def load_bundle(self) -> Optional[Dict[str, Any]]:
+        if self._bundle is None:
+            local_path = self._download_bundle()
+            if local_path is not None:
+                self._bundle = load_bundle(local_path)
+        return self._bundle
+
+    def load_transformer(self) -> Transformer:
+        bundle = self.load_bundle()
+        if bundle is not None:
+            transformer: Transformer = bundle['transformer']
+        else:
+            local_path = mlflow.artifacts.download_artifacts(
+                run_id=self.run_id,
+                artifact_path=posixpath.join(TRANSFORMER_ARTIFACT_PATH, TRANSFORMER_FILE_NAME),
+                tracking_uri=self.tracking_uri,
+            )
+            with open(local_path, 'rb') as f:
+                transformer = pickle.load(f)
+        if isinstance(transformer, MLPipelineTransformer):
+            transformer.set_mode(MLPipelineTransformer.Mode.INFER)
+        return transformer
+
+    def load_model(self, artifact_path: str) -> Model:
+        bundle = self.load_bundle()
+        if bundle is not None:
+            return bundle['model']
+        mlflow.set_tracking_uri(self.tracking_uri)
+        return ScikitModel(mlflow.sklearn.load_model(f'runs:/{self.run_id}/{artifact_path}'))
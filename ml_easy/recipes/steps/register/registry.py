@@ -1,16 +1,39 @@
-from abc import abstractmethod
+import concurrent.futures
+import logging
+import os
+import posixpath
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
 
 import mlflow  # type:ignore
+import numpy as np
 from mlflow.data.code_dataset_source import CodeDatasetSource  # type: ignore
+from mlflow.entities import DatasetInput, Metric, Param, RunTag  # type:ignore
 from mlflow.models import infer_signature  # type:ignore
+from mlflow.tracking import MlflowClient  # type:ignore
 
-from ml_easy.recipes.interfaces.config import Context
+from ml_easy.recipes.constants import (
+    BLOB_REF_TAG_PREFIX,
+    BLOB_STORE_URI_TAG,
+    INFERENCE_BUNDLE_ARTIFACT_PATH,
+    TRANSFORMER_ARTIFACT_PATH,
+)
+from ml_easy.recipes.enum import MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.config import BaseStepConfig, Context
+from ml_easy.recipes.interfaces.dataset import Dataset
 from ml_easy.recipes.steps.cards_config import StepMessage
+from ml_easy.recipes.steps.register.blob_store import BlobStore
 from ml_easy.recipes.steps.steps_config import BaseRegisterConfig
 from ml_easy.recipes.steps.train.models import ScikitModel
+from ml_easy.recipes.tracing import span, traced
 
+_logger = logging.getLogger(__name__)
 
-class Registry:
+
+class Registry(ABC):
     def __init__(self):
         pass
 
@@ -26,40 +49,151 @@ class Registry:
     def log_dataset(self, message: StepMessage) -> None:
         pass
 
+    @abstractmethod
+    def log_bundle(self, message: StepMessage) -> None:
+        pass
+
 
 class MlflowRegistry(Registry):
+    """
+    Logs a training run to MLflow. Artifacts and dataset inputs are logged through an
+    ``MlflowClient`` against the run id; with ``async_logging`` they are uploaded by a pool of
+    background threads while the model is logged, and the run only ends once every upload is done
+    or ``logging_timeout`` has elapsed. Params, metrics and tags are sent in a single ``log_batch``.
+
+    With a ``blob_store_uri``, the transformer and the inference bundle are stored once in a
+    content-addressed ``BlobStore`` and the run only references them through tags, and dataset
+    descriptions are computed once per dataset digest.
+    """
 
     def __init__(self, conf: BaseRegisterConfig, context: Context):
         super().__init__()
         self.context = context
         self.conf = conf
+        self._client: Optional[MlflowClient] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: List[Future] = []
+        self._run_id: Optional[str] = None
+        self._blob_store = BlobStore(conf.blob_store_uri) if conf.blob_store_uri else None
+
+    @property
+    def client(self) -> MlflowClient:
+        if self._client is None:
+            self._client = MlflowClient(tracking_uri=self.context.experiment.tracking_uri)
+        return self._client
+
+    def _submit(self, fn: Callable[..., None], *args: Any) -> None:
+        if self._executor is None:
+            fn(*args)
+        else:
+            self._futures.append(self._executor.submit(fn, *args))
+
+    @traced('MlflowRegistry.log_path', 'registry')
+    def _log_path(self, local_path: str, artifact_path: str) -> None:
+        if self._blob_store is not None:
+            blob_path = self._blob_store.put(local_path)
+            self.client.log_batch(
+                self._run_id,  # type:ignore
+                tags=[
+                    RunTag(BLOB_STORE_URI_TAG, self._blob_store.uri),
+                    RunTag(BLOB_REF_TAG_PREFIX + artifact_path, blob_path),
+                ],
+            )
+        elif os.path.isdir(local_path):
+            self.client.log_artifacts(
+                self._run_id, local_path, posixpath.join(artifact_path, os.path.basename(local_path))  # type:ignore
+            )
+        else:
+            self.client.log_artifact(self._run_id, local_path, artifact_path)  # type:ignore
+
+    @traced('MlflowRegistry.log_input', 'registry')
+    def _log_input(self, dataset: Dataset) -> None:
+        mlflow_dataset = dataset.get_mlflow_dataset(self.conf.source)  # type: ignore
+        entity = (
+            self._blob_store.describe_dataset(mlflow_dataset)
+            if self._blob_store is not None
+            else mlflow_dataset._to_mlflow_entity()
+        )
+        self.client.log_inputs(self._run_id, [DatasetInput(dataset=entity, tags=[])])  # type: ignore
 
     def log_embedder(self, message: StepMessage) -> None:
-        mlflow.log_artifact(message.transform.transformer_path, 'transformer')  # type:ignore
+        self._submit(self._log_path, message.transform.transformer_path, TRANSFORMER_ARTIFACT_PATH)  # type:ignore
+
+    def log_bundle(self, message: StepMessage) -> None:
+        if message.train.bundle_path is not None:  # type:ignore
+            self._submit(self._log_path, message.train.bundle_path, INFERENCE_BUNDLE_ARTIFACT_PATH)  # type:ignore
 
     def log_dataset(self, message: StepMessage) -> None:
         (X, y) = message.transform.tf_dataset  # type: ignore
-        mlflow.log_input(X.get_mlflow_dataset(self.conf.source))  # type: ignore
-        mlflow.log_input(y.get_mlflow_dataset(self.conf.source))  # type: ignore
+        self._submit(self._log_input, X)
+        self._submit(self._log_input, y)
+
+    def log_run_data(self, message: StepMessage) -> None:
+        timestamp = int(time.time() * 1000)
+        metrics = {m.name.name.value: m.value for m in message.evaluate.metrics_eval}  # type:ignore
+        if message.train.cv_metrics:  # type:ignore
+            metrics['cv_val_metric_mean'] = float(np.mean(message.train.cv_metrics))  # type:ignore
+            metrics['cv_val_metric_std'] = float(np.std(message.train.cv_metrics))  # type:ignore
+        self._submit(
+            self.client.log_batch,
+            self._run_id,
+            [Metric(key, value, timestamp, 0) for key, value in metrics.items()],
+            [
+                Param(key, str(value))
+                for key, value in dict(message.transform.config).items()  # type:ignore
+                if key not in BaseStepConfig.model_fields
+            ],
+            [RunTag('product_name', self.context.experiment.product_name)],
+        )
 
+    @traced('MlflowRegistry.wait', 'registry')
+    def wait(self) -> None:
+        """
+        Waits for the pending background uploads and raises the first error one of them hit.
+        """
+        if self._executor is None:
+            return
+        futures, self._futures = self._futures, []
+        try:
+            _, not_done = concurrent.futures.wait(futures, timeout=self.conf.logging_timeout)
+            if not_done:
+                raise MlflowException(
+                    f'{len(not_done)} of {len(futures)} MLflow logging calls did not complete within '
+                    f'{self.conf.logging_timeout}s',
+                    error_code=MLFlowErrorCode.INTERNAL_ERROR,
+                )
+            for future in futures:
+                future.result()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @traced('MlflowRegistry.log_model', 'registry')
     def log_model(self, message: StepMessage) -> None:
         mlflow.set_tracking_uri(self.context.experiment.tracking_uri)  # type:ignore
         mlflow.set_experiment(self.context.experiment.name)  # type:ignore
-        with mlflow.start_run():
-            self.log_embedder(message)
-            self.log_dataset(message)
-            if isinstance(message.train.mod, ScikitModel):  # type:ignore
-                _, _, (X_test, y_test) = message.split.train_val_test  # type: ignore
-                signature = infer_signature(
-                    X_test[:3, :].to_numpy(), message.train.mod.predict(X_test[:3, :]).to_numpy().reshape(-1)  # type: ignore
-                )  # type:ignore
-                mlflow.sklearn.log_model(
-                    message.train.mod.service,  # type:ignore
-                    self.conf.artifact_path,  # type:ignore
-                    signature=signature,
-                    registered_model_name=self.conf.registered_model_name,  # type:ignore
-                )
-                mlflow.log_params(dict(message.transform.config))  # type:ignore
-                mlflow.log_metrics({m.name.name.value: m.value for m in message.evaluate.metrics_eval})  # type:ignore
-                mlflow.set_tag('product_name', self.context.experiment.product_name)
+        if self.conf.async_logging:
+            self._executor = ThreadPoolExecutor(max_workers=self.conf.max_workers, thread_name_prefix='mlflow-logging')
+        with mlflow.start_run() as run:
+            self._run_id = run.info.run_id
+            try:
+                self.log_embedder(message)
+                self.log_bundle(message)
+                self.log_dataset(message)
+                if isinstance(message.train.mod, ScikitModel):  # type:ignore
+                    _, _, (X_test, y_test) = message.split.train_val_test  # type: ignore
+                    sample = X_test.slice(0, 3)  # type: ignore
+                    signature = infer_signature(
+                        sample.to_numpy(), message.train.mod.predict(sample).to_numpy().reshape(-1)  # type: ignore
+                    )  # type:ignore
+                    self.log_run_data(message)
+                    with span('mlflow.sklearn.log_model', 'registry'):
+                        mlflow.sklearn.log_model(
+                            message.train.mod.service,  # type:ignore
+                            self.conf.artifact_path,  # type:ignore
+                            signature=signature,
+                            registered_model_name=self.conf.registered_model_name,  # type:ignore
+                        )
+            finally:
+                self.wait()
         mlflow.end_run()
@@ -1,18 +1,41 @@
-from typing import Tuple
+from typing import List, Optional, Tuple
 
-from ml_easy.recipes._typing import TupleDataset
-from ml_easy.recipes.steps.ingest.datasets import Dataset
+from ml_easy.recipes._typing import Fold, TupleDataset
+from ml_easy.recipes.interfaces.dataset import Dataset
 
 
 class DatasetSplitter:
-    def __init__(self, val_prop: float, test_prop: float):
+    def __init__(self, val_prop: float, test_prop: float, n_folds: Optional[int] = None, seed: Optional[int] = None):
         self._val_prop = val_prop
         self._test_prop = test_prop
         self._train_prop = 1 - self._val_prop - self._test_prop
+        self._n_folds = n_folds
+        self._seed = seed
+
+    @property
+    def n_folds(self) -> Optional[int]:
+        return self._n_folds
+
+    def split_indices(self, y: Dataset) -> Tuple[List[int], List[int], List[int]]:
+        return y.split(self._train_prop, self._val_prop, seed=self._seed)
 
     def split(self, X: Dataset, y: Dataset) -> Tuple[TupleDataset, TupleDataset, TupleDataset]:
-        train_indices, val_indices, test_indices = y.split(self._train_prop, self._val_prop)
+        return self.take(X, y, *self.split_indices(y))
+
+    @classmethod
+    def take(
+        cls, X: Dataset, y: Dataset, train_indices: List[int], val_indices: List[int], test_indices: List[int]
+    ) -> Tuple[TupleDataset, TupleDataset, TupleDataset]:
         X_train, y_train = X[train_indices], y[train_indices]
         X_val, y_val = X[val_indices], y[val_indices]
         X_test, y_test = X[test_indices], y[test_indices]
         return (X_train, y_train), (X_val, y_val), (X_test, y_test)
+
+    def folds(self, y: Dataset, indices: List[int]) -> List[Fold]:
+        """
+        Cross-validation folds over ``indices`` (typically the train and validation rows, so that
+        the test rows stay held out). Requires ``n_folds`` to be set.
+        """
+        if self._n_folds is None:
+            return []
+        return y.kfold(self._n_folds, indices=indices, seed=self._seed)
@@ -1,9 +1,9 @@
 from abc import abstractmethod
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, model_validator
 
-from ml_easy.recipes.enum import ScoreType, SourceType
+from ml_easy.recipes.enum import PredictionSinkType, ScoreType, SourceType
 from ml_easy.recipes.interfaces.config import BaseStepConfig
 
 
@@ -29,6 +29,8 @@ class BaseIngestConfig(BaseStepConfig):
 class BaseSplitConfig(BaseStepConfig):
     split_fn: str
     split_ratios: List[float]
+    n_folds: Optional[int] = None
+    seed: Optional[int] = None
 
 
 class BaseTransformConfig(BaseStepConfig):
@@ -44,6 +46,7 @@ class BaseTrainConfig(BaseStepConfig):
     estimator_fn: str
     loss: str
     validation_metric: Score
+    n_jobs: Optional[int] = None
 
 
 class EvaluateCriteria(BaseStepConfig):
@@ -92,3 +95,34 @@ class BaseRegisterConfig(BaseStepConfig):
     artifact_path: str
     registered_model_name: Optional[str]
     source: SqlAlchemyBasedSourceConfig
+    async_logging: bool = False
+    max_workers: int = 4
+    logging_timeout: Optional[float] = 600.0
+    blob_store_uri: Optional[str] = None
+
+
+class PredictionSinkConfig(BaseModel):
+    type: PredictionSinkType
+    path: Optional[str] = None
+    table_name: Optional[str] = None
+    credentials: Optional[SQLCredentialsConfig] = None
+
+    @model_validator(mode='after')
+    def check_destination(self):
+        if self.type == PredictionSinkType.PARQUET and self.path is None:
+            raise ValueError(f'path is required for a {PredictionSinkType.PARQUET.value} sink')
+        if self.type == PredictionSinkType.SQL and (self.table_name is None or self.credentials is None):
+            raise ValueError(f'table_name and credentials are required for a {PredictionSinkType.SQL.value} sink')
+        return self
+
+
+class BasePredictConfig(BaseStepConfig):
+    predict_fn: str
+    run_id: str
+    artifact_path: str
+    table_name: str
+    credentials: SQLCredentialsConfig
+    sink: PredictionSinkConfig
+    id_cols: List[str] = []
+    chunk_size: int = 10000
+    queue_size: int = 2
@@ -0,0 +1,157 @@
+import copy
+import hashlib
+import logging
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from ml_easy.recipes._typing import Fold
+from ml_easy.recipes.enum import MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.dataset import Dataset
+from ml_easy.recipes.steps.evaluate.score import Score
+from ml_easy.recipes.steps.train.models import Model
+from ml_easy.recipes.steps.transform.transformer import (
+    MLPipelineTransformer,
+    Transformer,
+)
+
+_logger = logging.getLogger(__name__)
+
+# Dataset shared by the cross-validation worker processes, set once per worker by `_init_worker`.
+_WORKER_DATASET: Optional[Tuple[Dataset, Dataset]] = None
+
+ROW_DROPPING_FILTERS_MESSAGE = (
+    'Filters dropping rows are not supported with n_folds: cross-validation folds index the rows of the '
+    'ingested dataset, which the filtered features no longer line up with'
+)
+
+
+class FoldTransformCache:
+    """
+    On-disk cache of transformers fitted on a cross-validation fold. Entries are keyed by the
+    digest of the dataset, of the transformer configuration and of the fold train indices, so a
+    fold seen again with the same data and configuration reuses its fitted vocabulary/IDF.
+    """
+
+    def __init__(self, cache_dir: str):
+        self._cache_dir = cache_dir
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+    @classmethod
+    def key(cls, dataset_digest: str, config_digest: str, train_indices: np.ndarray) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(dataset_digest.encode())
+        hasher.update(config_digest.encode())
+        hasher.update(np.ascontiguousarray(train_indices, dtype=np.int64).tobytes())
+        return hasher.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f'{key}.pkl')
+
+    def get(self, key: str) -> Optional[Transformer]:
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    @classmethod
+    def write(cls, path: str, transformer: Transformer) -> None:
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(transformer, f)
+        os.replace(tmp_path, path)
+
+
+def _init_worker(X: Dataset, y: Dataset) -> None:
+    global _WORKER_DATASET
+    _WORKER_DATASET = (X, y)
+
+
+def _run_fold(
+    model: Model,
+    transformer: Transformer,
+    fitted: bool,
+    fold: Fold,
+    metric: Type[Score],
+    metric_params: Dict[str, Any],
+    cache_path: str,
+) -> float:
+    X, y = _WORKER_DATASET  # type: ignore
+    train_indices, val_indices = fold
+    X_train = X[train_indices]
+    if fitted:
+        X_train_tf = transformer.transform(X_train)
+    else:
+        X_train_tf = transformer.fit_transform(X_train)
+        FoldTransformCache.write(cache_path, transformer)
+    model.fit(X_train_tf.collect(), y[train_indices].collect())
+    X_val_tf = transformer.transform(X[val_indices])
+    return model.score(X_val_tf.collect(), y[val_indices].collect(), metric=metric, **metric_params)
+
+
+class CrossValidator:
+    """
+    Fits one model per fold in parallel worker processes and scores it on the fold validation
+    rows. The stateless leading stages of an ``MLPipelineTransformer`` (filters, formatters) are
+    applied once to the whole dataset; only the remaining stages are fitted per fold, through the
+    ``FoldTransformCache``. Folds index the rows of ``X`` and ``y``, so these stages must keep
+    every row.
+    """
+
+    def __init__(self, cache: FoldTransformCache, n_jobs: Optional[int] = None):
+        self._cache = cache
+        self._n_jobs = n_jobs
+
+    def run(
+        self,
+        model: Model,
+        transformer: Transformer,
+        config_digest: str,
+        X: Dataset,
+        y: Dataset,
+        folds: List[Fold],
+        metric: Type[Score],
+        **metric_params: Any,
+    ) -> List[float]:
+        if isinstance(transformer, MLPipelineTransformer):
+            prefix, transformer = transformer.partition_stateless()
+            X = prefix.transform(X)
+        X = X.collect()
+        if X.shape[0] != y.shape[0]:
+            raise MlflowException(ROW_DROPPING_FILTERS_MESSAGE, error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE)
+        dataset_digest = X.hash_dataset
+        tasks = []
+        for fold in folds:
+            key = self._cache.key(dataset_digest, config_digest, fold[0])
+            cached = self._cache.get(key)
+            tasks.append(
+                (
+                    model,
+                    transformer if cached is None else cached,
+                    cached is not None,
+                    fold,
+                    metric,
+                    metric_params,
+                    self._cache.path(key),
+                )
+            )
+        _logger.info(f'Cross-validating on {len(folds)} folds, {sum(t[2] for t in tasks)} cached transformer fits.')
+
+        if self._n_jobs == 1:
+            _init_worker(X, y)
+            return [_run_fold(*copy.deepcopy(task)) for task in tasks]
+        # Polars' thread pool does not survive a fork, hence the spawn context.
+        with ProcessPoolExecutor(
+            max_workers=self._n_jobs,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(X, y),
+        ) as executor:
+            futures = [executor.submit(_run_fold, *task) for task in tasks]
+            return [future.result() for future in futures]
@@ -3,15 +3,22 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, Generic, Protocol, Self, Type, TypeVar
 
 import numpy as np
-from sklearn.base import is_classifier  # type: ignore
 
+from ml_easy.recipes.interfaces.dataset import Dataset
 from ml_easy.recipes.steps.evaluate.score import Score
-from ml_easy.recipes.steps.ingest.datasets import Dataset, PolarsDataset
+from ml_easy.recipes.tracing import traced
 
 U = TypeVar('U')
 
 
 class Model(ABC, Generic[U]):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Implementations of fit and predict are traced without each model having to opt in.
+        for method in ('fit', 'predict'):
+            if method in cls.__dict__:
+                setattr(cls, method, traced(f'{cls.__name__}.{method}', 'model')(cls.__dict__[method]))
+
     def __init__(self, service: U):
         self._service = service
 
@@ -51,15 +58,61 @@ class EstimatorProtocol(Protocol):
 
 
 class ScikitModel(Model[EstimatorProtocol]):
-    def __init__(self, service: EstimatorProtocol):
+    """
+    scikit-learn estimator. Memory-mapped feature matrices are never loaded whole: estimators are
+    fitted on the memory-mapped sparse matrix, or with ``incremental`` and a ``partial_fit`` method
+    on ``batch_size`` rows at a time for ``n_epochs`` passes. Incremental fits only suit estimators
+    whose ``partial_fit`` amounts to more optimization passes (e.g. ``SGDClassifier`` without class
+    weights): count-based ones such as ``MultinomialNB`` would count each row ``n_epochs`` times.
+    Predictions, hence scores, are made ``batch_size`` rows at a time for any dataset.
+    """
+
+    # Defaults of models pickled before batching existed
+    batch_size = 10_000
+    n_epochs = 5
+    incremental = False
+
+    def __init__(
+        self, service: EstimatorProtocol, batch_size: int = 10_000, n_epochs: int = 5, incremental: bool = False
+    ):
         super().__init__(service)
+        self.batch_size = batch_size
+        self.n_epochs = n_epochs
+        self.incremental = incremental
 
     def fit(self, X: Dataset, y: Dataset) -> None:
-        self._service.fit(X.to_numpy(), y.to_numpy().reshape(-1))
+        from ml_easy.recipes.steps.ingest.datasets import MemmapCsrMatrixDataset
+
+        if not isinstance(X, MemmapCsrMatrixDataset):
+            self._service.fit(X.to_numpy(), y.to_numpy().reshape(-1))
+            return
+        targets = y.to_numpy().reshape(-1)
+        if not (self.incremental and hasattr(self._service, 'partial_fit')):
+            self._service.fit(X.service, targets)
+            return
+        from sklearn.base import is_classifier  # type: ignore
+
+        # Every class has to be declared on the first call, as a batch may miss some of them
+        kwargs = {'classes': np.unique(targets)} if is_classifier(self._service) else {}
+        for _ in range(self.n_epochs):
+            for offset, batch in zip(range(0, X.shape[0], self.batch_size), X.iter_batches(self.batch_size)):
+                self._service.partial_fit(batch.service, targets[offset : offset + self.batch_size], **kwargs)
 
     def predict(self, X: Dataset) -> Dataset:
-        yhat: np.ndarray = self._service.predict(X.to_csr())
-        return PolarsDataset.from_numpy(yhat)
+        from ml_easy.recipes.steps.ingest.datasets import (
+            CsrMatrixDataset,
+            PolarsDataset,
+        )
+
+        if X.shape[0] > self.batch_size:
+            predictions = np.concatenate(
+                [
+                    self._service.predict(batch.service if isinstance(batch, CsrMatrixDataset) else batch.to_csr())
+                    for batch in X.iter_batches(self.batch_size)
+                ]
+            )
+            return PolarsDataset.from_numpy(predictions)
+        return PolarsDataset.from_numpy(self._service.predict(X.to_csr()))
 
     @classmethod
     def load_from_library(cls, path: str, params: Dict[str, Any]) -> Self:
@@ -75,6 +128,8 @@ class ScikitModel(Model[EstimatorProtocol]):
         return metric.score(y, self.predict(X), **kwargs)
 
     def get_model_outputs(self) -> Dict[str, Any]:
+        from sklearn.base import is_classifier  # type: ignore
+
         outputs = {
             'model_type': type(self._service).__name__,
             'is_classifier': is_classifier(self._service),
@@ -0,0 +1,168 @@
+from itertools import groupby
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from ml_easy.recipes.enum import MLFlowErrorCode
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.steps.transform.filters import (
+    EqualFilter,
+    Filter,
+    InFilter,
+    LengthFilter,
+    NullFilter,
+    RangeFilter,
+    RegexFilter,
+)
+
+if TYPE_CHECKING:
+    import polars as pl
+
+NULL = 'null'
+IN = 'in'
+RANGE = 'range'
+LENGTH = 'length'
+REGEX = 'regex'
+NEVER = 'never'
+
+# Relative cost of evaluating a predicate on a value, the cheapest ones being applied first
+_COSTS = {NEVER: 0, NULL: 0, IN: 1, RANGE: 1, LENGTH: 2, REGEX: 3}
+
+
+class Predicate(NamedTuple):
+    col: str
+    kind: str
+    args: Tuple[Any, ...] = ()
+    neg: bool = False
+
+    @property
+    def cost(self) -> int:
+        return _COSTS[self.kind]
+
+    def __str__(self) -> str:
+        args = ', '.join(repr(arg) for arg in self.args)
+        return f"{'not ' if self.neg else ''}{self.kind}({self.col}{', ' if args else ''}{args})"
+
+    def to_polars(self) -> 'pl.Expr':
+        import polars as pl
+
+        col = pl.col(self.col)
+        if self.kind == NEVER:
+            return pl.lit(False)
+        if self.kind == NULL:
+            return col.is_not_null() if self.neg else col.is_null()
+        if self.kind == IN:
+            values = list(self.args[0])
+            expr = col == values[0] if len(values) == 1 else col.is_in(values)
+        elif self.kind == REGEX:
+            expr = col.str.contains(self.args[0])
+        else:
+            lower, upper, closed = self.args
+            if self.kind == LENGTH:
+                col = col.str.len_chars()
+            bounds = []
+            if lower is not None:
+                bounds.append(col >= lower if closed else col > lower)
+            if upper is not None:
+                bounds.append(col <= upper if closed else col < upper)
+            expr = pl.all_horizontal(bounds) if bounds else col.is_not_null()
+        return ~expr if self.neg else expr
+
+
+def _sorted_values(values: Set[Any]) -> Tuple[Any, ...]:
+    return tuple(sorted(values, key=lambda value: (type(value).__name__, value)))
+
+
+def _compile_column(col: str, filters: Sequence[Filter]) -> List[Predicate]:
+    included: Optional[Set[Any]] = None
+    excluded: Set[Any] = set()
+    nulls: Set[bool] = set()
+    # Insertion-ordered, so that duplicated predicates are only applied once
+    others: Dict[Predicate, None] = {}
+    for col_filter in filters:
+        if isinstance(col_filter, (EqualFilter, InFilter)):
+            values = {col_filter.value} if isinstance(col_filter, EqualFilter) else set(col_filter.values)
+            if col_filter.neg:
+                excluded |= values
+            else:
+                included = values if included is None else included & values
+        elif isinstance(col_filter, NullFilter):
+            nulls.add(not col_filter.neg)
+        elif isinstance(col_filter, RangeFilter):
+            args = (col_filter.lower, col_filter.upper, col_filter.closed)
+            others[Predicate(col, RANGE, args, col_filter.neg)] = None
+        elif isinstance(col_filter, LengthFilter):
+            args = (col_filter.min_length, col_filter.max_length, True)
+            others[Predicate(col, LENGTH, args, col_filter.neg)] = None
+        elif isinstance(col_filter, RegexFilter):
+            others[Predicate(col, REGEX, (col_filter.pattern,), col_filter.neg)] = None
+        else:
+            raise MlflowException(
+                message=f'Unsupported filter type {col_filter.__class__.__name__}',
+                error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+            )
+
+    predicates: List[Predicate] = []
+    if included is not None:
+        # Equal and in filters fold into a single membership test: the positive ones intersect, the
+        # negated ones are removed from it
+        included -= excluded
+        if not included:
+            return [Predicate(col, NEVER)]
+        predicates.append(Predicate(col, IN, (_sorted_values(included),)))
+    elif excluded:
+        predicates.append(Predicate(col, IN, (_sorted_values(excluded),), neg=True))
+    predicates.extend(others)
+    if True in nulls:
+        # Every other predicate is null, so dropped, on a null value
+        if False in nulls or predicates:
+            return [Predicate(col, NEVER)]
+        predicates.append(Predicate(col, NULL))
+    elif False in nulls and not predicates:
+        # Only needed alone, any other predicate of the column already drops the nulls
+        predicates.append(Predicate(col, NULL, neg=True))
+    return predicates
+
+
+class FilterPlan:
+    """
+    Conjunction of the filters of each column compiled into the fewest predicates: equal and in
+    filters of a column are merged into one membership test, contradictions fold into a predicate
+    that no row satisfies, duplicates are dropped and the cheapest predicates are applied first so
+    that the costly ones (regexes) only see the rows left by the others.
+    """
+
+    def __init__(self, predicates: Sequence[Predicate]):
+        never = [predicate for predicate in predicates if predicate.kind == NEVER]
+        self.predicates: List[Predicate] = never[:1] or sorted(predicates, key=lambda predicate: predicate.cost)
+
+    @classmethod
+    def compile(cls, filters: Mapping[str, Sequence[Filter]]) -> 'FilterPlan':
+        predicates: List[Predicate] = []
+        for col, col_filters in filters.items():
+            predicates.extend(_compile_column(col, col_filters))
+        return cls(predicates)
+
+    def stages(self) -> List[List[Predicate]]:
+        """
+        Predicates grouped by increasing cost, each group to be applied to the rows left by the previous ones.
+        """
+        return [list(group) for _, group in groupby(self.predicates, key=lambda predicate: predicate.cost)]
+
+    def to_polars(self) -> List[List['pl.Expr']]:
+        return [[predicate.to_polars() for predicate in stage] for stage in self.stages()]
+
+    def explain(self) -> str:
+        return '\n'.join(' AND '.join(str(predicate) for predicate in stage) for stage in self.stages())
+
+    def __len__(self) -> int:
+        return len(self.predicates)
@@ -1,5 +1,6 @@
+import re
 from abc import ABC, abstractmethod
-from typing import Any, List, Type, TypeVar
+from typing import Any, List, Optional, Type, TypeVar
 
 from typing_extensions import Generic
 
@@ -40,3 +41,58 @@ class InFilter(Filter[U], Generic[U]):
     def filter(self, x: U) -> bool:
         pos = x in self.values
         return not pos if self.neg else pos
+
+
+class RangeFilter(Filter[U], Generic[U]):
+    def __init__(self, lower: Optional[U] = None, upper: Optional[U] = None, closed: bool = True, neg: bool = False):
+        super().__init__(neg)
+        self.lower = lower
+        self.upper = upper
+        self.closed = closed
+
+    def filter(self, x: U) -> bool:
+        if self.closed:
+            pos = (self.lower is None or x >= self.lower) and (self.upper is None or x <= self.upper)  # type: ignore
+        else:
+            pos = (self.lower is None or x > self.lower) and (self.upper is None or x < self.upper)  # type: ignore
+        return not pos if self.neg else pos
+
+
+class RegexFilter(Filter[str]):
+    def __init__(self, pattern: str, neg: bool = False):
+        super().__init__(neg)
+        self.pattern = pattern
+
+    def filter(self, x: str) -> bool:
+        pos = re.search(self.pattern, x) is not None
+        return not pos if self.neg else pos
+
+
+class NullFilter(Filter[Any]):
+    """
+    Keeps the null values, or with ``neg`` the non-null ones.
+    """
+
+    def __init__(self, neg: bool = False):
+        super().__init__(neg)
+
+    def filter(self, x: Any) -> bool:
+        pos = x is None
+        return not pos if self.neg else pos
+
+
+class LengthFilter(Filter[str]):
+    """
+    Keeps the strings whose number of characters is within the inclusive bounds.
+    """
+
+    def __init__(self, min_length: Optional[int] = None, max_length: Optional[int] = None, neg: bool = False):
+        super().__init__(neg)
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def filter(self, x: str) -> bool:
+        pos = (self.min_length is None or len(x) >= self.min_length) and (
+            self.max_length is None or len(x) <= self.max_length
+        )
+        return not pos if self.neg else pos
@@ -1,12 +1,35 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Any, Dict, List, Sequence
 
-import nltk  # type: ignore
 import regex as re
-from nltk import WordNetLemmatizer, word_tokenize
-from nltk.corpus import wordnet as wn  # type: ignore
 from pydantic import BaseModel
 
+_NLTK_RESOURCES = {
+    'wordnet': 'corpora/wordnet',
+    'punkt': 'tokenizers/punkt',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
+}
+_nltk: Any = None
+
+
+def _load_nltk() -> Any:
+    """
+    Imports NLTK on first use, downloading the resources the lemmatizer needs if they are not
+    installed yet, rather than when this module is imported. Its corpora are still read lazily,
+    on first access or explicitly through ``AvsLemmatizer.warmup``.
+    """
+    global _nltk
+    if _nltk is None:
+        import nltk  # type: ignore
+
+        for resource, path in _NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                nltk.download(resource)
+        _nltk = nltk
+    return _nltk
+
 
 class TextCleanerConfig(BaseModel):
     regex_patterns: Dict[str, str]
@@ -14,6 +37,12 @@ class TextCleanerConfig(BaseModel):
 
 class TextFormatterConfig(BaseModel):
     cleaner: TextCleanerConfig
+    # Format each distinct value once, worth it for columns with repeated texts only
+    dedupe: bool = False
+    # Texts handed at once to the cleaner and lemmatizer
+    batch_size: int = 1024
+    # Processes formatting the batches, one formats them in the calling process
+    n_workers: int = 1
 
 
 class TextCleaner(ABC):
@@ -27,6 +56,9 @@ class TextCleaner(ABC):
     def clean(self, text: str) -> str:
         pass
 
+    def clean_batch(self, texts: Sequence[str]) -> List[str]:
+        return [self.clean(text) for text in texts]
+
 
 class AvsCleaner(TextCleaner):
     def __init__(self, config_settings: TextCleanerConfig) -> None:
@@ -47,26 +79,43 @@ class LemmatizerStrategy(ABC):
     def lemmatize(self, text: str) -> str:
         pass
 
+    def lemmatize_batch(self, texts: Sequence[str]) -> List[str]:
+        return [self.lemmatize(text) for text in texts]
+
 
 class AvsLemmatizer(LemmatizerStrategy):
-    nltk.download('wordnet')
-    nltk.download('punkt')
-    nltk.download('averaged_perceptron_tagger')
 
     def __init__(self):
-        self.wl = WordNetLemmatizer()
+        self.wl = _load_nltk().WordNetLemmatizer()
+
+    def warmup(self) -> None:
+        """
+        Loads the lazily-read NLTK resources (WordNet, tokenizer and tagger models) up front, so
+        that the first call to ``lemmatize`` does not pay for it.
+        """
+        _load_nltk().corpus.wordnet.ensure_loaded()
+        self.lemmatize('warming up the lemmatizer')
 
     def lemmatize(self, text: str) -> str:
-        word_pos_tags = nltk.pos_tag(word_tokenize(text))
-        tokens = [
-            self.wl.lemmatize(word, self.__get_wordnet_pos(pos_tag))
-            for idx, (word, pos_tag) in enumerate(word_pos_tags)
-        ]
+        nltk = _load_nltk()
+        return self._lemmatize_tagged(nltk.pos_tag(nltk.word_tokenize(text)))
+
+    def lemmatize_batch(self, texts: Sequence[str]) -> List[str]:
+        """
+        Lemmatizes ``texts`` with a single call to the tagger over all their sentences.
+        """
+        nltk = _load_nltk()
+        tagged = nltk.pos_tag_sents([nltk.word_tokenize(text) for text in texts])
+        return [self._lemmatize_tagged(word_pos_tags) for word_pos_tags in tagged]
+
+    def _lemmatize_tagged(self, word_pos_tags) -> str:
+        tokens = [self.wl.lemmatize(word, self.__get_wordnet_pos(pos_tag)) for word, pos_tag in word_pos_tags]
         return ' '.join(tokens)
 
     @classmethod
     def __get_wordnet_pos(cls, tag):
         """This is a helper function to map NTLK position tags"""
+        wn = _load_nltk().corpus.wordnet
         if tag.startswith('J'):
             return wn.ADJ
         elif tag.startswith('V'):
@@ -77,3 +126,22 @@ class AvsLemmatizer(LemmatizerStrategy):
             return wn.ADV
         else:
             return wn.NOUN
+
+
+class TextFormatter:
+    """
+    Cleans then lemmatizes batches of texts. Picklable, so that batches can be formatted in worker
+    processes, each loading the lemmatizer resources once through ``warmup``.
+    """
+
+    def __init__(self, cleaner: TextCleaner, lemmatizer: LemmatizerStrategy):
+        self.cleaner = cleaner
+        self.lemmatizer = lemmatizer
+
+    def __call__(self, texts: Sequence[str]) -> List[str]:
+        return self.lemmatizer.lemmatize_batch(self.cleaner.clean_batch(texts))
+
+    def warmup(self) -> None:
+        warmup = getattr(self.lemmatizer, 'warmup', None)
+        if callable(warmup):
+            warmup()
@@ -1,23 +1,51 @@
 import importlib
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Any, Dict, Generic, List, Protocol, Self, Tuple, TypeVar, Union
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Protocol,
+    Self,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
 
 from ml_easy.recipes.classification.v1.config import ClassificationTransformConfig
 from ml_easy.recipes.enum import MLFlowErrorCode
 from ml_easy.recipes.exceptions import MlflowException
 from ml_easy.recipes.interfaces.config import Context
-from ml_easy.recipes.steps.ingest.datasets import CsrMatrixDataset, Dataset
-from ml_easy.recipes.steps.transform.filters import EqualFilter, InFilter
+from ml_easy.recipes.profiling import stage
+from ml_easy.recipes.steps.ingest.datasets import (
+    BlockCsrMatrixDataset,
+    CsrMatrixDataset,
+    Dataset,
+    PolarsDataset,
+)
+from ml_easy.recipes.steps.transform.filter_plan import FilterPlan
+from ml_easy.recipes.steps.transform.filters import Filter
 from ml_easy.recipes.steps.transform.formatter.formatter import (
     AvsCleaner,
     AvsLemmatizer,
+    TextFormatter,
+)
+from ml_easy.recipes.steps.transform.vocabulary import (
+    CompactVocabulary,
+    estimate_nbytes,
 )
 
 U = TypeVar('U')
 
 
 class Transformer(ABC):
+    stage_name = 'transform'
+    #: Whether ``transform`` only chains Polars operations, so that it can be applied to a lazy frame
+    lazy_compatible = False
 
     def __init__(self):
         pass
@@ -34,6 +62,34 @@ class Transformer(ABC):
         self.fit(X)
         return self.transform(X)
 
+    @property
+    def stateless(self) -> bool:
+        """
+        Whether ``fit`` learns nothing from the data, so that ``transform`` gives the same output
+        whatever dataset the transformer was fitted on.
+        """
+        return False
+
+    @property
+    def modified_columns(self) -> Optional[Set[str]]:
+        """
+        Columns whose values ``transform`` rewrites row by row, leaving the rows and the other
+        columns as they are. None when the transformer does more than that, so that no filter can
+        be moved ahead of it.
+        """
+        return None
+
+    def warmup(self) -> None:
+        """
+        Loads any resource the transformer reads lazily, ahead of serving traffic.
+        """
+
+    def get_transformer_outputs(self) -> Dict[str, Any]:
+        """
+        Returns what the transformer reports about its last fit, to be shown in the transform card.
+        """
+        return {}
+
 
 class LibraryTransformer(Transformer, ABC, Generic[U]):
 
@@ -42,14 +98,14 @@ class LibraryTransformer(Transformer, ABC, Generic[U]):
         self._service = service
 
     @classmethod
-    def load_from_library(cls, path: str, params: Dict[str, Any]) -> Self:
+    def load_from_library(cls, path: str, params: Dict[str, Any], **kwargs: Any) -> Self:
         module_path, class_name = path.rsplit('.', 1)
         module = importlib.import_module(module_path)
         model_class = getattr(module, class_name)
         protocol_methods = [method for method in Transformer.__annotations__.keys()]
         if not all(hasattr(model_class, method) for method in protocol_methods):
             raise ValueError(f"scikit-learn {class_name} estimator is not a {Transformer}")
-        return cls(model_class(**params))
+        return cls(model_class(**params), **kwargs)
 
 
 class ScikitService(Protocol):
@@ -57,26 +113,69 @@ class ScikitService(Protocol):
 
     def transform(self, raw_documents): ...
 
+    def get_params(self, deep=True): ...
+
+    def set_params(self, **params): ...
+
 
 class ScikitEmbedder(LibraryTransformer):
-    def __init__(self, service: ScikitService):
+    def __init__(self, service: ScikitService, compact_vocabulary: bool = False, dtype: Optional[Any] = None):
         super().__init__(service)
+        self.compact_vocabulary = compact_vocabulary
+        self.dtype = np.dtype(dtype) if dtype is not None else None
+        self._compaction: Dict[str, Any] = {}
+        # Vectorizers taking a dtype compute the matrix in it directly rather than being cast afterwards.
+        if self.dtype is not None and 'dtype' in service.get_params():
+            service.set_params(dtype=self.dtype.type)
 
     def fit(self, X: Dataset) -> None:
         self._service.fit(X.to_numpy().reshape(-1))
+        if self.compact_vocabulary:
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Shrinks the fitted state of a scikit-learn vectorizer: ``stop_words_``, only kept for
+        introspection, is dropped and the ``vocabulary_`` dict is swapped for a
+        ``CompactVocabulary`` giving the same lookups.
+        """
+        vocabulary = getattr(self._service, 'vocabulary_', None)
+        if vocabulary is None:
+            return
+        stop_words = getattr(self._service, 'stop_words_', None)
+        nbytes_before = estimate_nbytes(vocabulary) + estimate_nbytes(stop_words)
+        if stop_words is not None:
+            delattr(self._service, 'stop_words_')
+        if not isinstance(vocabulary, CompactVocabulary):
+            self._service.vocabulary_ = CompactVocabulary(vocabulary)  # type: ignore
+        self._compaction = {
+            'vocabulary_size': len(vocabulary),
+            'nbytes_before': nbytes_before,
+            'nbytes_after': estimate_nbytes(self._service.vocabulary_),  # type: ignore
+        }
+
+    def get_transformer_outputs(self) -> Dict[str, Any]:
+        return {'vocabulary_compaction': self._compaction} if self._compaction else {}
 
     def transform(self, X: Dataset) -> Dataset:
-        ds_tf = self._service.transform(X.to_numpy().reshape(-1))
-        return CsrMatrixDataset(ds_tf)
+        ds_tf = CsrMatrixDataset(self._service.transform(X.to_numpy().reshape(-1)))
+        return ds_tf.astype(self.dtype) if self.dtype is not None else ds_tf
 
 
 class MultipleTfIdfTransformer(Transformer):
+    stage_name = 'embed'
+
     def __init__(self, conf: ClassificationTransformConfig, context: Context):
         super().__init__()
         self.conf = conf
         self.context = context
         self.embedder = {
-            col: ScikitEmbedder.load_from_library(conf.cols[col].embedder.path, conf.cols[col].embedder.params)  # type: ignore
+            col: ScikitEmbedder.load_from_library(
+                conf.cols[col].embedder.path,  # type: ignore
+                conf.cols[col].embedder.params,  # type: ignore
+                compact_vocabulary=conf.cols[col].embedder.compact_vocabulary,  # type: ignore
+                dtype=context.feature_dtype.value,
+            )
             for col in conf.cols
             if conf.cols[col].embedder
         }
@@ -87,26 +186,47 @@ class MultipleTfIdfTransformer(Transformer):
 
     def transform(self, X: Dataset) -> Dataset:
         tfs_X: List[CsrMatrixDataset] = [
-            CsrMatrixDataset(self.embedder[col].transform(X.select([col])).to_csr())
+            self.embedder[col].transform(X.select([col]))  # type: ignore
             for col in self.conf.cols
             if self.conf.cols[col].embedder
         ]
-        return CsrMatrixDataset.concat(tfs_X, how='horizontal')
+        # Kept as per-column blocks, only stacked into one matrix when a consumer needs it
+        return BlockCsrMatrixDataset(tfs_X)
+
+    def get_transformer_outputs(self) -> Dict[str, Any]:
+        return {col: outputs for col in self.embedder if (outputs := self.embedder[col].get_transformer_outputs())}
 
 
 class FilterTransformer(Transformer):
-    def __init__(self, filters: Dict[str, List[Union[EqualFilter[str], InFilter[str]]]]):
+    stage_name = 'filter'
+    lazy_compatible = True
+
+    def __init__(self, filters: Dict[str, List[Filter]]):
         super().__init__()
         self.filters = filters
+        self._plan: Optional[FilterPlan] = None
+
+    @property
+    def plan(self) -> FilterPlan:
+        # Compiled once; transformers pickled before plans existed compile theirs on first use
+        if getattr(self, '_plan', None) is None:
+            self._plan = FilterPlan.compile(self.filters)
+        return self._plan  # type: ignore
 
     def fit(self, X: Dataset) -> None:
         pass
 
     def transform(self, X: Dataset) -> Dataset:
-        return X.filter(self.filters)
+        return X.filter(self.plan)
+
+    @property
+    def stateless(self) -> bool:
+        return True
 
 
 class FormaterTransformer(Transformer):
+    stage_name = 'format'
+    lazy_compatible = True
 
     def __init__(self, config: ClassificationTransformConfig):
         super().__init__()
@@ -121,50 +241,181 @@ class FormaterTransformer(Transformer):
     def fit(self, X: Dataset) -> None:
         pass
 
+    @property
+    def stateless(self) -> bool:
+        return True
+
+    @property
+    def modified_columns(self) -> Optional[Set[str]]:
+        return {col for col in self.config.cols if self.config.cols[col].formatter}
+
+    def warmup(self) -> None:
+        self.lemmatizer.warmup()
+
     def transform(self, X: Dataset) -> Dataset:
-        # TO DO : Can be optimized take too long time to process
-        def func(col):
-            def _func(x):
-                return self.lemmatizer(self.text_cleaner[col](x))
+        # Columns sharing their batching options are formatted in a single pass
+        groups: Dict[Tuple[bool, int, int], Dict[str, Any]] = {}
+        for col, conf in self.config.cols.items():
+            if conf.formatter:
+                # Configs pickled before these options existed format every row, one at a time, in process
+                options = (
+                    getattr(conf.formatter, 'dedupe', False),
+                    getattr(conf.formatter, 'batch_size', 1),
+                    getattr(conf.formatter, 'n_workers', 1),
+                )
+                groups.setdefault(options, {})[col] = TextFormatter(self.text_cleaner[col], self.lemmatizer)
+        for (dedupe, batch_size, n_workers), udf_map in groups.items():
+            X = X.map_str_batches(udf_map, batch_size=batch_size, dedupe=dedupe, n_workers=n_workers)
+        return X
 
-            return _func
 
-        return X.map_str({col: func(col) for col in self.config.cols if self.config.cols[col].formatter})
+def _move_filters_ahead(transformers: List[Tuple[Transformer, bool]]) -> List[Tuple[Transformer, bool]]:
+    """
+    Moves every filter stage ahead of the stateless stages preceding it that only rewrite columns
+    it does not read, so that they only process the rows the filter keeps.
+    """
+    ordered = list(transformers)
+    for i in range(len(ordered)):
+        if not isinstance(ordered[i][0], FilterTransformer):
+            continue
+        filter_columns = set(ordered[i][0].filters)
+        j = i
+        while j > 0:
+            previous = ordered[j - 1][0]
+            modified = previous.modified_columns
+            if not previous.stateless or modified is None or modified & filter_columns:
+                break
+            ordered[j - 1], ordered[j] = ordered[j], ordered[j - 1]
+            j -= 1
+    return ordered
 
 
 class MLPipelineTransformer(Transformer):
+    """
+    Chains transformers, each flagged with whether it also runs in ``INFER`` mode.
+
+    In ``lazy`` mode filters are moved ahead of the stateless stages they do not depend on, the
+    leading Polars stages run on a single lazy frame collected once, with Polars' streaming engine
+    when ``streaming`` is set, before the first stage needing materialized data.
+    """
+
     class Mode(Enum):
         TRAIN = 'train'
         INFER = 'infer'
 
-    def __init__(self, transformers: List[Tuple[Transformer, bool]], mode: Mode):
+    # Defaults of pipelines pickled before lazy mode existed
+    _lazy = False
+    _streaming = False
+
+    def __init__(
+        self, transformers: List[Tuple[Transformer, bool]], mode: Mode, lazy: bool = False, streaming: bool = False
+    ):
         super().__init__()
-        self._transformers = transformers
+        self._transformers = _move_filters_ahead(transformers) if lazy else transformers
         self._mode = mode
+        self._lazy = lazy
+        self._streaming = streaming
 
     def set_mode(self, mode: Mode) -> None:
         self._mode = mode
 
+    @property
+    def stateless(self) -> bool:
+        return all(transformer[0].stateless for transformer in self._transformers)
+
+    def warmup(self) -> None:
+        for transformer in self._transformers:
+            transformer[0].warmup()
+
+    def get_transformer_outputs(self) -> Dict[str, Any]:
+        outputs: Dict[str, Any] = {}
+        for transformer in self._transformers:
+            outputs.update(transformer[0].get_transformer_outputs())
+        return outputs
+
+    def partition_stateless(self) -> Tuple['MLPipelineTransformer', 'MLPipelineTransformer']:
+        """
+        Splits the pipeline into its leading stateless stages and the remaining stages. The
+        stateless prefix can be applied once to a dataset and shared by every fit of the rest.
+        """
+        n_stateless = 0
+        while n_stateless < len(self._transformers) and self._transformers[n_stateless][0].stateless:
+            n_stateless += 1
+        return (
+            self.__class__(self._transformers[:n_stateless], self._mode, self._lazy, self._streaming),
+            self.__class__(self._transformers[n_stateless:], self._mode, self._lazy, self._streaming),
+        )
+
+    def _active_transformers(self) -> List[Tuple[Transformer, bool]]:
+        if self._mode == self.Mode.TRAIN:
+            return self._transformers
+        elif self._mode == self.Mode.INFER:
+            return [t for t in self._transformers if t[1]]
+        raise MlflowException(
+            f"{self._mode} for {self.__class__.__name__} should be equal to {self.Mode.TRAIN}",
+            error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
+        )
+
+    def _n_lazy(self, transformers: List[Tuple[Transformer, bool]], X: Dataset) -> int:
+        # Number of leading stages run on a lazy frame, none outside of lazy mode
+        if not self._lazy or not isinstance(X, PolarsDataset):
+            return 0
+        n_lazy = 0
+        while n_lazy < len(transformers) and transformers[n_lazy][0].lazy_compatible:
+            n_lazy += 1
+        return n_lazy
+
+    def _collect(self, X: Dataset) -> Dataset:
+        with stage('collect'):
+            return X.collect(streaming=self._streaming)
+
     def fit(self, X: Dataset) -> None:
         if self._mode != self.Mode.TRAIN:
             raise MlflowException(
                 f"{self._mode} for {self.__class__.__name__} should be equal to {self.Mode.TRAIN}",
                 error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
             )
-        for transformer in self._transformers[:-1]:
-            X = transformer[0].fit_transform(X)
-        self._transformers[-1][0].fit(X)
+        if not self._transformers:
+            return
+        n_lazy = self._n_lazy(self._transformers, X)
+        with stage('fit'):
+            if n_lazy:
+                X = X.lazy()  # type: ignore
+            for i, transformer in enumerate(self._transformers[:-1]):
+                with stage(transformer[0].stage_name):
+                    X = transformer[0].fit_transform(X)
+                if i + 1 == n_lazy:
+                    X = self._collect(X)
+            with stage(self._transformers[-1][0].stage_name):
+                self._transformers[-1][0].fit(X)
 
     def transform(self, X: Dataset) -> Dataset:
-        if self._mode == self.Mode.TRAIN:
-            transformers = self._transformers
-        elif self._mode == self.Mode.INFER:
-            transformers = [t for t in self._transformers if t[1]]
-        else:
-            raise MlflowException(
-                f"{self._mode} for {self.__class__.__name__} should be equal to {self.Mode.TRAIN}",
-                error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
-            )
-        for transformer in transformers:
-            X = transformer[0].transform(X)
+        transformers = self._active_transformers()
+        n_lazy = self._n_lazy(transformers, X)
+        with stage('transform'):
+            if n_lazy:
+                X = X.lazy()  # type: ignore
+            for i, transformer in enumerate(transformers):
+                with stage(transformer[0].stage_name):
+                    X = transformer[0].transform(X)
+                if i + 1 == n_lazy:
+                    X = self._collect(X)
         return X
+
+    def explain(self, X: Optional[Dataset] = None) -> str:
+        """
+        Describes the stages run by ``transform`` in their order, and with a Polars dataset ``X``
+        the optimized Polars plan of the stages run lazily on it.
+        """
+        transformers = self._active_transformers()
+        n_lazy = self._n_lazy(transformers, X) if X is not None else 0
+        lines = [
+            f"{i + 1}. {transformer[0].stage_name} ({transformer[0].__class__.__name__})"
+            f"{', lazy' if i < n_lazy else ''}"
+            for i, transformer in enumerate(transformers)
+        ]
+        if n_lazy:
+            for transformer in transformers[:n_lazy]:
+                X = transformer[0].transform(X.lazy())  # type: ignore
+            lines += ['', X.service.explain()]  # type: ignore
+        return '\n'.join(lines)
@@ -0,0 +1,103 @@
+import sys
+import zlib
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+class CompactVocabulary(Mapping[str, int]):
+    """
+    Read-only ``str -> int`` mapping for a fitted vocabulary, as a drop-in replacement of the
+    ``vocabulary_`` dict of scikit-learn vectorizers.
+
+    Terms are stored UTF-8 encoded in one byte array, ordered by feature index, with an offsets
+    array delimiting them. Lookups go through an open-addressing table of feature indices keyed by
+    the CRC32 of the encoded term, with linear probing; the hash is stable across processes so the
+    table is pickled as is. Every piece of state is a numpy array, which keeps the vocabulary to a
+    few tens of bytes per term and lets bundles memory-map it. Vectorizers look terms up one at a
+    time, so the probing, run in Python, makes transforming about twice as slow as with the dict:
+    compaction trades speed for memory and is opt-in (``compact_vocabulary``).
+    """
+
+    def __init__(self, vocabulary: Mapping[str, int]):
+        n_terms = len(vocabulary)
+        terms = [b''] * n_terms
+        for term, index in vocabulary.items():
+            terms[index] = term.encode('utf-8')
+        lengths = np.fromiter((len(t) for t in terms), dtype=np.int64, count=n_terms)
+        self._offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self._offsets[1:])
+        self._blob = np.frombuffer(b''.join(terms), dtype=np.uint8)
+
+        n_slots = 1 << max(1, (2 * n_terms - 1).bit_length())
+        mask = n_slots - 1
+        self._slots = np.full(n_slots, -1, dtype=np.int32 if n_terms < 2**31 else np.int64)
+        for index, term in enumerate(terms):
+            slot = zlib.crc32(term) & mask
+            while self._slots[slot] >= 0:
+                slot = (slot + 1) & mask
+            self._slots[slot] = index
+        self._init_views()
+
+    def _init_views(self) -> None:
+        # Indexing memoryviews returns plain Python ints, several times faster than numpy scalars.
+        self._mask = len(self._slots) - 1
+        self._slots_view = memoryview(self._slots)
+        self._offsets_view = memoryview(self._offsets)
+        self._blob_view = memoryview(self._blob)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'_offsets': self._offsets, '_blob': self._blob, '_slots': self._slots}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_views()
+
+    def __getitem__(self, term: str) -> int:
+        encoded = term.encode('utf-8')
+        slot = zlib.crc32(encoded) & self._mask
+        while (index := self._slots_view[slot]) >= 0:
+            if self._blob_view[self._offsets_view[index] : self._offsets_view[index + 1]] == encoded:
+                return index
+            slot = (slot + 1) & self._mask
+        raise KeyError(term)
+
+    def __contains__(self, term: object) -> bool:
+        if not isinstance(term, str):
+            return False
+        try:
+            self[term]
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def term(self, index: int) -> str:
+        return self._blob_view[self._offsets_view[index] : self._offsets_view[index + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.term(index) for index in range(len(self)))
+
+    def items(self) -> Iterator[Tuple[str, int]]:  # type: ignore
+        return ((self.term(index), index) for index in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        return self._offsets.nbytes + self._blob.nbytes + self._slots.nbytes
+
+
+def estimate_nbytes(obj: Optional[Any]) -> int:
+    """
+    Approximate in-memory size of a vocabulary dict or a stop words set, including its keys and
+    values.
+    """
+    if obj is None:
+        return 0
+    if isinstance(obj, CompactVocabulary):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return size + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in obj.items())
+    return size + sum(sys.getsizeof(item) for item in obj)
@@ -0,0 +1,137 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from ml_easy.recipes.constants import TRACES_SUBDIRECTORY_NAME
+from ml_easy.recipes.env_vars import MLFLOW_RECIPES_TRACE
+
+_logger = logging.getLogger(__name__)
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class Tracer:
+    """
+    Collects complete-duration spans from every thread of the process, written out in the Chrome
+    trace-event format (readable by ``chrome://tracing`` and Perfetto).
+    """
+
+    def __init__(self):
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self.pid = os.getpid()
+
+    def add_span(self, name: str, cat: str, start_ns: int, end_ns: int, args: Dict[str, Any]) -> None:
+        tid = threading.get_ident()
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': (start_ns - self._origin_ns) / 1e3,
+            'dur': (end_ns - start_ns) / 1e3,
+            'pid': self.pid,
+            'tid': tid,
+            'args': args,
+        }
+        with self._lock:
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+            self._events.append(event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            threads = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                for tid, name in self._threads.items()
+            ]
+            return {'traceEvents': threads + self._events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+
+_tracer: Optional[Tracer] = None
+_disabled = nullcontext()
+
+
+@contextmanager
+def _span(tracer: Tracer, name: str, cat: str, args: Dict[str, Any]) -> Iterator[None]:
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        tracer.add_span(name, cat, start_ns, time.perf_counter_ns(), args)
+
+
+def span(name: str, cat: str = 'recipe', **args: Any) -> ContextManager[None]:
+    """
+    Times the block as a span of the traced run. Returns a shared no-op context manager when no
+    run is traced.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _disabled
+    return _span(tracer, name, cat, args)
+
+
+def traced(name: str, cat: str = 'recipe') -> Callable[[F], F]:
+    """
+    Decorates a function so that each call is a span of the traced run.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            with _span(tracer, name, cat, {}):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+@contextmanager
+def trace_run(execution_directory: str, name: str) -> Iterator[Optional[Tracer]]:
+    """
+    Traces the block when ``MLFLOW_RECIPES_TRACE`` is set, writing the spans to a new file of the
+    ``traces`` directory of ``execution_directory`` once it exits. Runs nested in a traced run
+    add their spans to it.
+    """
+    global _tracer
+    if _tracer is not None or not MLFLOW_RECIPES_TRACE.get():
+        yield _tracer
+        return
+    tracer = _tracer = Tracer()
+    try:
+        with _span(tracer, name, 'recipe', {}):
+            yield tracer
+    finally:
+        _tracer = None
+        path = os.path.join(
+            execution_directory,
+            TRACES_SUBDIRECTORY_NAME,
+            f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{tracer.pid}.json",
+        )
+        tracer.write(path)
+        _logger.info(f"Trace of {name} written to {path}")
@@ -1,9 +1,10 @@
 import hashlib
 import importlib
 import os
-from typing import Any, Tuple, Type
-
-from typeguard import TypeCheckError, check_type
+import sys
+import threading
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Optional, Tuple, Type
 
 from ml_easy.recipes.constants import (
     EXT_PY,
@@ -15,13 +16,15 @@ from ml_easy.recipes.constants import (
 from ml_easy.recipes.enum import MLFlowErrorCode, ScoreType
 from ml_easy.recipes.env_vars import MLFLOW_RECIPES_EXECUTION_DIRECTORY
 from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.dataset import Dataset
 from ml_easy.recipes.steps.evaluate.score import Score
-from ml_easy.recipes.steps.ingest.datasets import Dataset
-from ml_easy.recipes.steps.register.mlflow_source.sql_table_dataset_source import (
-    DatasetSourceWrapper,
-)
 from ml_easy.recipes.steps.steps_config import SourceConfig
 
+if TYPE_CHECKING:
+    from ml_easy.recipes.steps.register.mlflow_source.sql_table_dataset_source import (
+        DatasetSourceWrapper,
+    )
+
 
 def get_recipe_name(recipe_root_path: str) -> str:
     """
@@ -71,23 +74,77 @@ def get_fully_qualified_module_name_for_step(recipe_root_path: str, step_dir: st
     return fully_qualified_item
 
 
-def load_step_function(file_path: str, function_name: str) -> Any:
-    if not os.path.exists(file_path):
+class _StepModule(NamedTuple):
+    mtime_ns: int
+    size: int
+    digest: str
+    module: ModuleType
+
+
+_step_modules: Dict[str, _StepModule] = {}
+_step_modules_lock = threading.Lock()
+
+
+def _step_module_name(file_path: str) -> str:
+    # Step files of different recipes share their names (ingest.py, ...), so the module name is
+    # qualified by a digest of the directory holding the file
+    directory, file_name = os.path.split(file_path)
+    return f'ml_easy_steps_{hashlib.sha256(directory.encode()).hexdigest()[:16]}_{os.path.splitext(file_name)[0]}'
+
+
+def load_step_module(file_path: str) -> ModuleType:
+    """
+    Imports the step file ``file_path`` as a module, executing it only once for a given content:
+    the module is cached under its absolute path and executed again once the modification time
+    and content hash of the file change.
+    """
+    file_path = os.path.abspath(file_path)
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
         raise MlflowException(
             f"File {file_path} not found.",
             error_code=MLFlowErrorCode.INVALID_PARAMETER_VALUE,
-        )
-
-    module_name = os.path.splitext(os.path.basename(file_path))[0]
-    spec = importlib.util.spec_from_file_location(module_name, file_path)
-    if spec is None or spec.loader is None:
-        raise MlflowException(
-            f"Could not load function {function_name} into a module", error_code=MLFlowErrorCode.INTERNAL_ERROR
-        )
-    else:
+        ) from None
+    with _step_modules_lock:
+        cached: Optional[_StepModule] = _step_modules.get(file_path)
+        if cached is not None and (cached.mtime_ns, cached.size) == (stat.st_mtime_ns, stat.st_size):
+            return cached.module
+        with open(file_path, 'rb') as f:
+            source = f.read()
+        digest = hashlib.sha256(source).hexdigest()
+        if cached is not None and cached.digest == digest:
+            _step_modules[file_path] = cached._replace(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            return cached.module
+
+        module_name = _step_module_name(file_path)
+        spec = importlib.util.spec_from_file_location(module_name, file_path)
+        if spec is None or spec.loader is None:
+            raise MlflowException(
+                f"Could not load {file_path} into a module", error_code=MLFlowErrorCode.INTERNAL_ERROR
+            )
         module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+        try:
+            # Compiled from the source just hashed rather than a __pycache__ entry, which is only
+            # invalidated by whole-second modification times
+            exec(compile(source, file_path, 'exec'), module.__dict__)
+        except BaseException:
+            sys.modules.pop(module_name, None)
+            raise
+        _step_modules[file_path] = _StepModule(stat.st_mtime_ns, stat.st_size, digest, module)
+        return module
+
 
+def clear_step_modules() -> None:
+    with _step_modules_lock:
+        for file_path in _step_modules:
+            sys.modules.pop(_step_module_name(file_path), None)
+        _step_modules.clear()
+
+
+def load_step_function(file_path: str, function_name: str) -> Any:
+    module = load_step_module(file_path)
     try:
         return getattr(module, function_name)
     except AttributeError:
@@ -164,6 +221,8 @@ def _get_step_output_directory_path(execution_directory_path: str, step_name: st
 
 
 def is_instance_for_generic(obj: Any, _class: Any) -> bool:
+    from typeguard import TypeCheckError, check_type
+
     try:
         check_type(obj, _class)
         return True
@@ -247,5 +306,9 @@ def get_features_target(dataset: Dataset, target_col: str) -> Tuple[Dataset, Dat
     return X, y
 
 
-def resolve_dataset_source(conf: SourceConfig) -> DatasetSourceWrapper:
+def resolve_dataset_source(conf: SourceConfig) -> 'DatasetSourceWrapper':
+    from ml_easy.recipes.steps.register.mlflow_source.sql_table_dataset_source import (
+        DatasetSourceWrapper,
+    )
+
     return DatasetSourceWrapper.load_from_path(SOURCE_TO_MODULE[conf.type])(**conf.get_config.model_dump())
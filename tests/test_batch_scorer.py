@@ -0,0 +1,95 @@
+import os
+from typing import Iterator
+
+import numpy as np
+import polars as pl
+import pytest
+from sklearn.linear_model import LogisticRegression  # type: ignore
+
+from ml_easy.recipes.enum import PredictionSinkType
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.config import Context, Experiment
+from ml_easy.recipes.steps.ingest.datasets import Dataset, PolarsDataset
+from ml_easy.recipes.steps.predict.scorer import BatchScorer
+from ml_easy.recipes.steps.steps_config import (
+    BasePredictConfig,
+    PredictionSinkConfig,
+    SQLCredentialsConfig,
+)
+from ml_easy.recipes.steps.train.models import ScikitModel
+from ml_easy.recipes.steps.transform.transformer import Transformer
+
+
+class FeatureTransformer(Transformer):
+    def __init__(self, drop_rows: bool = False):
+        super().__init__()
+        self.drop_rows = drop_rows
+
+    def fit(self, X: Dataset) -> None:
+        pass
+
+    def transform(self, X: Dataset) -> Dataset:
+        df = X.get_dataframe.select('x')
+        return PolarsDataset(df.head(1) if self.drop_rows else df)
+
+
+class FrameScorer(BatchScorer):
+    def __init__(self, df: pl.DataFrame, transformer: Transformer, model: ScikitModel, path: str):
+        conf = BasePredictConfig(
+            predict_fn='predict',
+            run_id='run',
+            artifact_path='model',
+            table_name='inputs',
+            credentials=SQLCredentialsConfig(
+                username='user', password='pass', hostname='localhost', port='5432', database_name='db'
+            ),
+            sink=PredictionSinkConfig(type=PredictionSinkType.PARQUET, path=path),
+            id_cols=['id'],
+            chunk_size=40,
+            queue_size=1,
+        )
+        context = Context(
+            recipe_root_path='.',
+            target_col='y',
+            experiment=Experiment(product_name='product', name='experiment', tracking_uri='file:///tmp/mlruns'),
+        )
+        super().__init__(conf, context)
+        self.df = df
+        self.transformer = transformer
+        self.model = model
+
+    def load(self):
+        return self.transformer, self.model
+
+    def read_chunks(self) -> Iterator[PolarsDataset]:
+        return PolarsDataset(self.df).iter_batches(self.conf.chunk_size)
+
+
+@pytest.fixture
+def model():
+    x = np.random.default_rng(0).normal(size=200)
+    model = ScikitModel(LogisticRegression())
+    model.fit(PolarsDataset(pl.DataFrame({'x': x})), PolarsDataset(pl.DataFrame({'y': (x > 0).astype(np.int64)})))
+    return model
+
+
+def test_scores_a_table_into_parquet_parts(model, tmp_path):
+    df = pl.DataFrame({'id': range(100), 'x': np.linspace(-1, 1, 100)})
+    path = str(tmp_path / 'predictions')
+    scorer = FrameScorer(df, FeatureTransformer(), model, path)
+    writer = scorer.score()
+    assert writer.uri == path
+    assert sorted(os.listdir(path)) == ['part-00000.parquet', 'part-00001.parquet', 'part-00002.parquet']
+    predictions = pl.read_parquet(os.path.join(path, '*.parquet'))
+    expected = model.predict(PolarsDataset(df.select('x'))).to_numpy().reshape(-1)
+    assert predictions.columns == ['id', 'y']
+    assert predictions['id'].to_list() == list(range(100))
+    assert np.array_equal(predictions['y'].to_numpy(), expected)
+    assert scorer.n_rows == 100 and scorer.rows_per_sec > 0
+
+
+def test_stage_failures_are_raised(model, tmp_path):
+    df = pl.DataFrame({'id': range(100), 'x': np.linspace(-1, 1, 100)})
+    scorer = FrameScorer(df, FeatureTransformer(drop_rows=True), model, str(tmp_path / 'predictions'))
+    with pytest.raises(MlflowException, match='changed the number of rows'):
+        scorer.score()
@@ -0,0 +1,19 @@
+from benchmarks.corpus import CorpusConfig, generate_corpus
+from benchmarks.run import BENCHMARKS, compare, run
+
+
+def test_corpus_is_seeded():
+    conf = CorpusConfig(n_rows=50, vocabulary_size=500, n_classes=3, seed=1)
+    corpus = generate_corpus(conf)
+    assert corpus.shape == (50, 3)
+    assert corpus.equals(generate_corpus(conf))
+    assert not corpus.equals(generate_corpus(conf.model_copy(update={'seed': 2})))
+    assert set(corpus['label'].unique()) <= {0, 1, 2}
+
+
+def test_benchmarks_run_at_small_scale():
+    results = run([200], repeat=1, verbose=False)
+    assert {r['name'] for r in results['results']} == set(BENCHMARKS)
+    assert all(r['status'] in ('ok', 'skipped') for r in results['results'])
+    ratios = compare(results, results)
+    assert ratios and all(row['ratio'] == 1 for row in ratios)
@@ -0,0 +1,56 @@
+import pickle
+
+import numpy as np
+import pytest
+from scipy.sparse import hstack
+from scipy.sparse import random as sparse_random
+
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.steps.ingest.datasets import (
+    BlockCsrMatrixDataset,
+    CsrMatrixDataset,
+)
+
+
+@pytest.fixture
+def blocks():
+    return [
+        sparse_random(30, width, density=0.3, format='csr', dtype=np.float32, random_state=seed)
+        for seed, width in enumerate([4, 7, 3])
+    ]
+
+
+def _equal(left, right) -> bool:
+    return left.shape == right.shape and (left != right).nnz == 0
+
+
+def test_block_operations_do_not_assemble(blocks):
+    ds = BlockCsrMatrixDataset(blocks)
+    assert ds.shape == (30, 14)
+    assert ds.nnz == sum(block.nnz for block in blocks)
+    selected = ds.select(list(range(4, 14)))
+    assert selected.blocks[0] is ds.blocks[1] and selected.blocks[1] is ds.blocks[2]
+    rows = ds[[5, 1, 1]].slice(1, 2)
+    stacked = BlockCsrMatrixDataset.concat([ds, ds], how='vertical')
+    joined = BlockCsrMatrixDataset.concat([ds, CsrMatrixDataset(blocks[0])], how='horizontal')
+    assert len(joined.blocks) == 4 and stacked.shape == (60, 14)
+    assert all(item._assembled is None for item in (ds, selected, rows, stacked, joined))
+    assembled = hstack(blocks, format='csr')
+    assert _equal(rows.service, assembled[[1, 1]])
+    assert _equal(stacked.service[30:], assembled)
+    assert _equal(ds.select([13, 0, 1, 5]).service, assembled[:, [13, 0, 1, 5]])
+
+
+def test_service_is_assembled_once(blocks):
+    ds = BlockCsrMatrixDataset(blocks)
+    assert _equal(ds.service, hstack(blocks, format='csr'))
+    assert ds.service is ds.service
+    assert ds.service.indices.dtype == np.int32
+    assert pickle.loads(pickle.dumps(ds))._assembled is None
+
+
+def test_blocks_must_have_the_same_rows_and_dtype(blocks):
+    with pytest.raises(MlflowException):
+        BlockCsrMatrixDataset([blocks[0], blocks[1][:10]])
+    with pytest.raises(MlflowException):
+        BlockCsrMatrixDataset([blocks[0], blocks[1].astype(np.float64)])
@@ -0,0 +1,94 @@
+import json
+import mmap
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+from scipy.sparse import random as sparse_random
+
+from ml_easy.recipes.constants import BUNDLE_MANIFEST_FILE_NAME
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.io.bundle import is_bundle, load_bundle, save_bundle
+from ml_easy.recipes.steps.register.loader import fetch_bundle
+from ml_easy.recipes.steps.register.registry import Registry
+
+
+def _mapped(array: np.ndarray) -> bool:
+    base = array
+    while base is not None:
+        if isinstance(base, mmap.mmap):
+            return True
+        base = base.obj if isinstance(base, memoryview) else getattr(base, 'base', None)
+    return False
+
+
+@pytest.fixture
+def objects():
+    return {
+        'coef': np.random.default_rng(0).normal(size=(50, 1000)),
+        'idf': np.arange(10, dtype=np.float32),
+        'matrix': sparse_random(2000, 500, density=0.05, format='csr', random_state=0),
+        'name': 'model',
+    }
+
+
+def test_bundle_round_trip_maps_large_buffers(objects, tmp_path):
+    path = str(tmp_path / 'model.bundle')
+    manifest = save_bundle(path, objects)
+    # The small idf vector and the indptr array stay inside the pickle stream
+    assert len(manifest['segments']) == 3
+    assert all(segment['offset'] % 64 == 0 for segment in manifest['segments'])
+    loaded = load_bundle(path)
+    assert loaded['name'] == 'model'
+    assert np.array_equal(loaded['coef'], objects['coef']) and np.array_equal(loaded['idf'], objects['idf'])
+    assert (loaded['matrix'] != objects['matrix']).nnz == 0
+    assert _mapped(loaded['coef']) and not loaded['coef'].flags.writeable
+    assert loaded['coef'].ctypes.data % 64 == 0
+    assert not _mapped(loaded['idf'])
+
+
+def test_bundle_rejects_unknown_versions(objects, tmp_path):
+    path = str(tmp_path / 'model.bundle')
+    save_bundle(path, objects)
+    manifest_path = os.path.join(path, BUNDLE_MANIFEST_FILE_NAME)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    with open(manifest_path, 'w') as f:
+        json.dump({**manifest, 'format_version': 99}, f)
+    with pytest.raises(MlflowException, match='Unsupported bundle format version 99'):
+        load_bundle(path)
+
+
+def test_concurrent_fetches_publish_one_complete_bundle(objects, tmp_path):
+    local_path = str(tmp_path / 'cache' / 'run' / 'inference.bundle')
+    barrier = threading.Barrier(8)
+    results, errors = [], []
+
+    def download(dst_path: str) -> str:
+        path = os.path.join(dst_path, 'inference.bundle')
+        save_bundle(path, objects)
+        time.sleep(0.01)
+        return path
+
+    def fetch() -> None:
+        barrier.wait()
+        try:
+            results.append(fetch_bundle(local_path, download))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors and results == [local_path] * 8
+    assert is_bundle(local_path) and np.array_equal(load_bundle(local_path)['coef'], objects['coef'])
+    assert os.listdir(os.path.dirname(local_path)) == ['inference.bundle']
+
+
+def test_registry_methods_are_abstract():
+    with pytest.raises(TypeError):
+        Registry()  # type: ignore
@@ -0,0 +1,76 @@
+import json
+import mmap
+import os
+
+import numpy as np
+import pytest
+
+from ml_easy.recipes.constants import BUNDLE_MANIFEST_FILE_NAME
+from ml_easy.recipes.enum import CompressionCodec
+from ml_easy.recipes.interfaces.config import CompressionConfig
+from ml_easy.recipes.io.bundle import BUNDLE_FORMAT_VERSION, load_bundle, save_bundle
+from ml_easy.recipes.io.compression import detect_codec, open_reader, open_writer
+
+_PACKAGES = {CompressionCodec.LZ4: 'lz4', CompressionCodec.ZSTD: 'zstandard'}
+CODECS = list(CompressionCodec)
+
+
+def _require(codec: CompressionCodec) -> None:
+    if codec in _PACKAGES:
+        pytest.importorskip(_PACKAGES[codec])
+
+
+def _mapped(array: np.ndarray) -> bool:
+    base = array
+    while base is not None:
+        if isinstance(base, mmap.mmap):
+            return True
+        base = base.obj if isinstance(base, memoryview) else getattr(base, 'base', None)
+    return False
+
+
+@pytest.fixture
+def objects():
+    rng = np.random.default_rng(0)
+    return {'coef': rng.integers(0, 4, size=(200, 1000)).astype(np.float64), 'name': 'model' * 1000}
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_streams_round_trip_and_are_detected(codec, tmp_path):
+    _require(codec)
+    path = str(tmp_path / 'stream')
+    chunks = [bytes(range(256)) * 100, b'', b'tail' * 5000]
+    with open_writer(path, codec) as f:
+        for chunk in chunks:
+            f.write(chunk)
+    assert detect_codec(path) == codec
+    with open_reader(path) as f:
+        assert f.read() == b''.join(chunks)
+
+
+@pytest.mark.parametrize('codec', CODECS)
+@pytest.mark.parametrize('compress_segments', [False, True])
+def test_bundles_round_trip_with_every_codec(codec, compress_segments, objects, tmp_path):
+    _require(codec)
+    path = str(tmp_path / 'model.bundle')
+    manifest = save_bundle(path, objects, CompressionConfig(codec=codec, compress_segments=compress_segments))
+    assert manifest['format_version'] == BUNDLE_FORMAT_VERSION == 2
+    assert manifest['compression']['codec'] == codec.value
+    if codec != CompressionCodec.NONE:
+        assert manifest['compression']['stored_nbytes'] < manifest['compression']['raw_nbytes']
+    loaded = load_bundle(path)
+    assert loaded['name'] == objects['name'] and np.array_equal(loaded['coef'], objects['coef'])
+    # Raw segments are memory-mapped, compressed ones are decompressed in memory
+    assert _mapped(loaded['coef']) != (compress_segments and codec != CompressionCodec.NONE)
+
+
+def test_version_1_bundles_still_load(objects, tmp_path):
+    path = str(tmp_path / 'model.bundle')
+    save_bundle(path, objects)
+    manifest_path = os.path.join(path, BUNDLE_MANIFEST_FILE_NAME)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    del manifest['compression']
+    with open(manifest_path, 'w') as f:
+        json.dump({**manifest, 'format_version': 1}, f)
+    assert np.array_equal(load_bundle(path)['coef'], objects['coef'])
@@ -0,0 +1,54 @@
+import json
+
+from ml_easy.recipes.interfaces.recipe import RecipeFactory
+from ml_easy.recipes.steps.steps_config import RecipePathsConfig
+
+RECIPE_YAML = '''recipe: "scoring/v1"
+context:
+  recipe_root_path: "{{ ROOT }}"
+  target_col: "label"
+  experiment: {product_name: p, name: n, tracking_uri: "file:///tmp/mlruns"}
+steps:
+  predict:
+    predict_fn: predict_fn
+    run_id: "{{ RUN_ID }}"
+    artifact_path: model
+    table_name: t
+    credentials: {username: u, password: p, hostname: h, port: "1", database_name: d}
+    sink: {type: parquet, path: "{{ 'SINK_PATH' | env }}"}
+    chunk_size: {{ ('chunk.json' | from_json)['chunk_size'] }}
+'''
+
+
+def _write_recipe(root, run_id='run-1', chunk_size=10):
+    (root / 'profiles').mkdir(exist_ok=True)
+    (root / 'recipe.yaml').write_text(RECIPE_YAML)
+    (root / 'profiles' / 'local.yaml').write_text(f'ROOT: "{root}"\nRUN_ID: "{run_id}"\n')
+    (root / 'chunk.json').write_text(json.dumps({'chunk_size': chunk_size}))
+
+
+def test_read_config_is_cached_until_an_input_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('SINK_PATH', 'a.parquet')
+    _write_recipe(tmp_path)
+    RecipeFactory.clear_config_cache()
+    paths = RecipePathsConfig(recipe_root_path=str(tmp_path), profile='local')
+    renders = []
+    validate_config = RecipeFactory._validate_config
+    monkeypatch.setattr(RecipeFactory, '_validate_config', lambda reader: renders.append(1) or validate_config(reader))
+
+    config = RecipeFactory.read_config(paths)
+    assert config.steps.predict.run_id == 'run-1'
+    config.steps.predict.run_id = 'mutated'
+    assert RecipeFactory.read_config(paths).steps.predict.run_id == 'run-1'
+    assert len(renders) == 1
+
+    _write_recipe(tmp_path, run_id='run-2')
+    assert RecipeFactory.read_config(paths).steps.predict.run_id == 'run-2'
+
+    _write_recipe(tmp_path, run_id='run-2', chunk_size=20)
+    assert RecipeFactory.read_config(paths).steps.predict.chunk_size == 20
+
+    monkeypatch.setenv('SINK_PATH', 'b.parquet')
+    assert RecipeFactory.read_config(paths).steps.predict.sink.path == 'b.parquet'
+    assert len(renders) == 4
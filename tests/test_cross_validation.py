@@ -0,0 +1,93 @@
+import logging
+import os
+
+import numpy as np
+import polars as pl
+import pytest
+from sklearn.linear_model import LogisticRegression  # type: ignore
+
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.steps.evaluate.score import AccuracyScore
+from ml_easy.recipes.steps.ingest.datasets import Dataset, PolarsDataset
+from ml_easy.recipes.steps.split.splitter import DatasetSplitter
+from ml_easy.recipes.steps.train.cross_validation import (
+    CrossValidator,
+    FoldTransformCache,
+)
+from ml_easy.recipes.steps.train.models import ScikitModel
+from ml_easy.recipes.steps.transform.filters import RangeFilter
+from ml_easy.recipes.steps.transform.transformer import (
+    FilterTransformer,
+    MLPipelineTransformer,
+    Transformer,
+)
+
+
+class CenterTransformer(Transformer):
+    def __init__(self):
+        super().__init__()
+        self.mean = None
+
+    def fit(self, X: Dataset) -> None:
+        self.mean = X.get_dataframe['x'].mean()
+
+    def transform(self, X: Dataset) -> Dataset:
+        return PolarsDataset(X.get_dataframe.select(pl.col('x') - self.mean))
+
+
+def _dataset(n_rows: int = 60):
+    x = np.random.default_rng(0).normal(size=n_rows)
+    return PolarsDataset(pl.DataFrame({'x': x})), PolarsDataset(pl.DataFrame({'y': (x > 0).astype(np.int64)}))
+
+
+def test_folds_partition_the_indices():
+    _, y = _dataset()
+    splitter = DatasetSplitter(val_prop=0.2, test_prop=0.2, n_folds=4, seed=0)
+    train, val, _ = splitter.split_indices(y)
+    indices = train + val
+    folds = splitter.folds(y, indices)
+    assert len(folds) == 4
+    val_folds = [val_indices for _, val_indices in folds]
+    assert sorted(np.concatenate(val_folds).tolist()) == sorted(indices)
+    for train_indices, val_indices in folds:
+        assert not set(train_indices) & set(val_indices)
+        assert sorted(np.concatenate([train_indices, val_indices]).tolist()) == sorted(indices)
+    assert DatasetSplitter(val_prop=0.2, test_prop=0.2).folds(y, indices) == []
+
+
+def test_cross_validation_reuses_cached_fits(tmp_path, caplog):
+    X, y = _dataset()
+    folds = DatasetSplitter(val_prop=0.0, test_prop=0.0, n_folds=3, seed=0).folds(y, list(range(60)))
+    validator = CrossValidator(FoldTransformCache(str(tmp_path)), n_jobs=1)
+
+    def run():
+        model = ScikitModel(LogisticRegression())
+        return validator.run(model, CenterTransformer(), 'config', X, y, folds, AccuracyScore)
+
+    with caplog.at_level(logging.INFO):
+        scores = run()
+        assert '0 cached transformer fits' in caplog.text
+        assert len(os.listdir(tmp_path)) == 3
+        caplog.clear()
+        assert run() == scores
+        assert '3 cached transformer fits' in caplog.text
+    assert all(0.5 < score <= 1.0 for score in scores)
+
+
+def test_cross_validation_rejects_row_dropping_filters(tmp_path):
+    X, y = _dataset()
+    folds = DatasetSplitter(val_prop=0.0, test_prop=0.0, n_folds=3, seed=0).folds(y, list(range(60)))
+    validator = CrossValidator(FoldTransformCache(str(tmp_path)), n_jobs=1)
+
+    def pipeline(filter_transformer: FilterTransformer) -> MLPipelineTransformer:
+        return MLPipelineTransformer(
+            [(filter_transformer, True), (CenterTransformer(), True)], MLPipelineTransformer.Mode.TRAIN
+        )
+
+    keep_all = FilterTransformer({'x': [RangeFilter(lower=-100.0)]})
+    scores = validator.run(ScikitModel(LogisticRegression()), pipeline(keep_all), 'all', X, y, folds, AccuracyScore)
+    assert len(scores) == 3
+    drop_negatives = FilterTransformer({'x': [RangeFilter(lower=0.0)]})
+    with pytest.raises(MlflowException, match='not supported with n_folds'):
+        validator.run(ScikitModel(LogisticRegression()), pipeline(drop_negatives), 'pos', X, y, folds, AccuracyScore)
+    assert len(os.listdir(tmp_path)) == 3
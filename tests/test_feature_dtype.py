@@ -0,0 +1,48 @@
+import numpy as np
+import polars as pl
+import pytest
+from scipy.sparse import random as sparse_random
+from sklearn.feature_extraction.text import TfidfVectorizer  # type: ignore
+
+from ml_easy.recipes.enum import FeatureDtype
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.config import Context, Experiment
+from ml_easy.recipes.steps.ingest.datasets import CsrMatrixDataset, PolarsDataset
+from ml_easy.recipes.steps.transform.transformer import ScikitEmbedder
+
+
+def _int32(ds: CsrMatrixDataset) -> bool:
+    return ds.service.indices.dtype == np.int32 and ds.service.indptr.dtype == np.int32
+
+
+@pytest.fixture
+def ds():
+    matrix = sparse_random(40, 8, density=0.3, format='csr', dtype=np.float32, random_state=0)
+    return CsrMatrixDataset(matrix).astype(np.float32)
+
+
+def test_indices_stay_int32(ds):
+    assert _int32(ds)
+    assert _int32(CsrMatrixDataset.concat([ds, ds], how='vertical'))
+    assert _int32(CsrMatrixDataset.concat([ds, ds], how='horizontal'))
+    assert _int32(ds.select([1, 5, 2]))
+    assert _int32(ds[[3, 1, 1]])
+    assert _int32(ds.slice(5, 10))
+    assert ds.astype(np.float32).service.data is ds.service.data
+
+
+def test_mixed_dtypes_cannot_be_concatenated(ds):
+    with pytest.raises(MlflowException, match='different dtypes'):
+        CsrMatrixDataset.concat([ds, ds.astype(np.float64)])
+
+
+def test_embedder_builds_float32_features_by_default():
+    context = Context(
+        recipe_root_path='.',
+        target_col='y',
+        experiment=Experiment(product_name='product', name='experiment', tracking_uri='file:///tmp/mlruns'),
+    )
+    assert context.feature_dtype == FeatureDtype.FLOAT32
+    embedder = ScikitEmbedder(TfidfVectorizer(), dtype=context.feature_dtype.value)
+    features = embedder.fit_transform(PolarsDataset(pl.DataFrame({'text': ['a cat', 'a dog', 'the cat sat']})))
+    assert features.dtype == np.float32 and _int32(features)
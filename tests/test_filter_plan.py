@@ -0,0 +1,34 @@
+import polars as pl
+
+from ml_easy.recipes.steps.ingest.datasets import PolarsDataset
+from ml_easy.recipes.steps.transform.filter_plan import FilterPlan
+from ml_easy.recipes.steps.transform.filters import (
+    EqualFilter,
+    InFilter,
+    LengthFilter,
+    NullFilter,
+    RangeFilter,
+    RegexFilter,
+)
+
+
+def test_filter_plan_merges_and_orders_predicates():
+    filters = {
+        'a': [InFilter(['x', 'y', 'z'], neg=False), EqualFilter('x', neg=True), EqualFilter('q', neg=True)],
+        'b': [RangeFilter(1, 3)],
+        'c': [RegexFilter('^h'), LengthFilter(min_length=2), RegexFilter('^h'), NullFilter(neg=True)],
+    }
+    plan = FilterPlan.compile(filters)
+    assert [predicate.kind for predicate in plan.predicates] == ['in', 'range', 'length', 'regex']
+    assert plan.predicates[0].args == (('y', 'z'),)
+
+    df = pl.DataFrame({'a': ['x', 'y', 'z', None, 'y'], 'b': [1, 2, 3, 2, None], 'c': ['hey', 'hi', 'h', 'ho', 'hu']})
+    expected = df.filter(pl.col('a').is_in(['y', 'z']) & pl.col('b').is_between(1, 3) & pl.col('c').str.contains('^h.'))
+    assert PolarsDataset(df).filter(plan).service.equals(expected)
+    assert PolarsDataset(df.lazy()).filter(filters).collect().service.equals(expected)
+
+
+def test_filter_plan_folds_contradictions():
+    assert FilterPlan.compile({'a': [EqualFilter('x', neg=False), EqualFilter('y', neg=False)]}).explain() == 'never(a)'
+    assert FilterPlan.compile({'a': [NullFilter(), NullFilter(neg=True)]}).explain() == 'never(a)'
+    assert FilterPlan.compile({'a': [NullFilter(), RegexFilter('x')]}).explain() == 'never(a)'
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = ['mlflow', 'sklearn', 'scipy', 'pandas', 'polars', 'nltk', 'sqlalchemy', 'typeguard']
+IMPORT_TIME_CAP_SECONDS = 1.5
+
+
+def _import_times(code: str):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:') :].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_core_import_is_light():
+    times = _import_times(
+        'from ml_easy.recipes.interfaces.recipe import RecipeFactory\n'
+        "RecipeFactory.load_class('ml_easy.recipes.classification.v1.ConfigImpl')\n"
+        "RecipeFactory.load_class('ml_easy.recipes.classification.v1.RecipeImpl')\n"
+        "RecipeFactory.load_class('ml_easy.recipes.classification.v1.steps.ClassificationTrainStep')"
+    )
+    assert not [module for module in HEAVY_MODULES if module in times]
+    assert times['ml_easy.recipes.interfaces.recipe'] < IMPORT_TIME_CAP_SECONDS
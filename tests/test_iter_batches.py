@@ -0,0 +1,73 @@
+import hashlib
+
+import numpy as np
+import polars as pl
+import pytest
+from scipy.sparse import random as sparse_random
+
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.steps.ingest.datasets import (
+    BlockCsrMatrixDataset,
+    CsrMatrixDataset,
+    MemmapCsrMatrixDataset,
+    PolarsDataset,
+)
+
+
+@pytest.fixture
+def matrix():
+    return sparse_random(50, 6, density=0.4, format='csr', dtype=np.float32, random_state=0)
+
+
+def test_polars_batches_are_views():
+    df = pl.DataFrame({'a': list(range(50)), 'b': [str(i) if i % 3 else None for i in range(50)]})
+    batches = list(PolarsDataset(df).iter_batches(20))
+    assert [batch.shape[0] for batch in batches] == [20, 20, 10]
+    assert pl.concat([batch.get_dataframe for batch in batches]).equals(df)
+    lazy_batches = list(PolarsDataset(df.lazy()).iter_batches(20, columns=['b']))
+    assert [batch.columns for batch in lazy_batches] == [['b']] * 3
+    with pytest.raises(MlflowException):
+        next(PolarsDataset(df).iter_batches(0))
+
+
+def test_csr_batches_share_the_matrix_buffers(matrix):
+    ds = CsrMatrixDataset(matrix)
+    batches = list(ds.iter_batches(16))
+    assert [batch.shape for batch in batches] == [(16, 6), (16, 6), (16, 6), (2, 6)]
+    assert all(np.shares_memory(batch.service.data, matrix.data) for batch in batches if batch.nnz)
+    for i, batch in enumerate(batches):
+        assert (batch.service != matrix[16 * i : 16 * (i + 1)]).nnz == 0
+    selected = next(BlockCsrMatrixDataset([matrix[:, :2], matrix[:, 2:]]).iter_batches(16, columns=['1', '4']))
+    assert (selected.service != matrix[:16][:, [1, 4]]).nnz == 0
+
+
+def test_batched_digests_are_unchanged(matrix):
+    df = pl.DataFrame({'a': list(range(100)), 'b': [f'row {i}' for i in range(100)]})
+    hasher = hashlib.sha256()
+    for row_hash in df.hash_rows(seed=42):
+        hasher.update(row_hash.to_bytes(64, 'little'))
+    assert PolarsDataset(df).hash_dataset == hasher.hexdigest()
+    assert CsrMatrixDataset(matrix).hash_dataset == hashlib.sha256(matrix.data.tobytes()).hexdigest()
+    assert BlockCsrMatrixDataset([matrix[:, :2], matrix[:, 2:]]).hash_dataset == CsrMatrixDataset(matrix).hash_dataset
+
+
+@pytest.mark.parametrize('offset, length', [(-2, None), (-10, 3), (-10, None), (7, 2), (-2, 1), (2, -1), (60, None)])
+def test_csr_slices_follow_polars(matrix, tmp_path, offset, length):
+    expected = PolarsDataset(pl.DataFrame({'row': range(50)})).slice(offset, length).service['row'].to_list()
+    datasets = [
+        CsrMatrixDataset(matrix),
+        BlockCsrMatrixDataset([matrix[:, :2], matrix[:, 2:]]),
+        MemmapCsrMatrixDataset.write([matrix], str(tmp_path / 'X')),
+    ]
+    for ds in datasets:
+        rows = ds.slice(offset, length)
+        assert rows.shape == (len(expected), 6)
+        assert np.array_equal(rows.to_numpy(), matrix[expected].toarray())
+
+
+def test_csr_rows_are_bounds_checked(matrix, tmp_path):
+    for ds in (CsrMatrixDataset(matrix), MemmapCsrMatrixDataset.write([matrix], str(tmp_path / 'X'))):
+        with pytest.raises(MlflowException, match='out of the bounds'):
+            ds._rows(-2, 50)
+        with pytest.raises(MlflowException, match='out of the bounds'):
+            ds._rows(10, 51)
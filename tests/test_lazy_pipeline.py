@@ -0,0 +1,67 @@
+from typing import Optional, Set
+
+import polars as pl
+
+from ml_easy.recipes.steps.ingest.datasets import Dataset, PolarsDataset
+from ml_easy.recipes.steps.transform.filters import EqualFilter, LengthFilter
+from ml_easy.recipes.steps.transform.transformer import (
+    FilterTransformer,
+    MLPipelineTransformer,
+    Transformer,
+)
+
+
+class UpperTransformer(Transformer):
+    stage_name = 'upper'
+    lazy_compatible = True
+
+    def __init__(self, col: str):
+        super().__init__()
+        self.col = col
+        self.calls = 0
+
+    def _upper(self, x: str) -> str:
+        self.calls += 1
+        return x.upper()
+
+    def fit(self, X: Dataset) -> None:
+        pass
+
+    def transform(self, X: Dataset) -> Dataset:
+        return X.map_str({self.col: self._upper})
+
+    @property
+    def stateless(self) -> bool:
+        return True
+
+    @property
+    def modified_columns(self) -> Optional[Set[str]]:
+        return {self.col}
+
+
+def _pipeline(lazy: bool) -> MLPipelineTransformer:
+    return MLPipelineTransformer(
+        [
+            (UpperTransformer('title'), True),
+            (FilterTransformer({'body': [EqualFilter('drop', neg=True)]}), False),
+            (FilterTransformer({'title': [LengthFilter(min_length=3)]}), False),
+        ],
+        MLPipelineTransformer.Mode.TRAIN,
+        lazy=lazy,
+    )
+
+
+def test_lazy_pipeline_filters_before_udfs():
+    df = pl.DataFrame({'title': ['ab', 'abc', 'abcd', 'xyz'], 'body': ['keep', 'keep', 'drop', 'drop']})
+    eager, lazy = _pipeline(lazy=False), _pipeline(lazy=True)
+    expected = eager.fit_transform(PolarsDataset(df))
+    result = lazy.fit_transform(PolarsDataset(df))
+    assert isinstance(result.service, pl.DataFrame)
+    assert result.service.equals(expected.collect().service)
+    assert result.service['title'].to_list() == ['ABC']
+
+    upper = lazy._transformers[1][0]
+    assert isinstance(upper, UpperTransformer) and upper.calls == 2
+    explained = lazy.explain(PolarsDataset(df))
+    assert explained.startswith('1. filter (FilterTransformer), lazy\n2. upper (UpperTransformer), lazy')
+    assert 'FILTER' in explained
@@ -0,0 +1,89 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import polars as pl
+import pyarrow as pa
+import pytest
+
+from ml_easy.recipes import parallel
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.profiling import record_step
+from ml_easy.recipes.steps.ingest.datasets import PolarsDataset
+
+
+class Suffix:
+    def __init__(self, suffix: str):
+        self.suffix = suffix
+        self.warmups = 0
+
+    def warmup(self) -> None:
+        self.warmups += 1
+
+    def __call__(self, value: str) -> str:
+        return f'{value}{self.suffix}{self.warmups}'
+
+
+def crash(values):
+    os._exit(1)
+
+
+def test_map_str_dedupe_calls_udf_once_per_value():
+    calls = []
+
+    def udf(value: str) -> str:
+        calls.append(value)
+        return value.upper()
+
+    df = pl.DataFrame({'text': ['a', 'b', 'a', None, 'a', 'b'], 'other': [1, 2, 3, 4, 5, 6]})
+    with record_step() as recorder:
+        result = PolarsDataset(df.lazy()).map_str({'text': udf}, dedupe=True).collect()
+    assert result.service.equals(PolarsDataset(df).map_str({'text': str.upper}).service)
+    assert sorted(calls) == ['a', 'b']
+    assert recorder.counters['map_str/text/rows'] == 5
+    assert recorder.counters['map_str/text/unique_values'] == 2
+
+
+def test_map_str_batches_keeps_nulls_in_place():
+    batches = []
+
+    def udf(texts):
+        batches.append(len(texts))
+        return [text.upper() for text in texts]
+
+    df = pl.DataFrame({'text': ['a', None, 'b', 'c', None, 'd', 'e']})
+    result = PolarsDataset(df.lazy()).map_str_batches({'text': udf}, batch_size=2).collect()
+    assert result.service['text'].to_list() == ['A', None, 'B', 'C', None, 'D', 'E']
+    assert batches == [2, 2, 1]
+
+
+def test_map_str_in_worker_processes_matches_serial():
+    df = pl.DataFrame({'text': ['a', None, 'b', 'c', 'a', None, 'd'] * 50})
+    expected = PolarsDataset(df).map_str({'text': str.upper}).service
+    for dedupe in (False, True):
+        result = PolarsDataset(df.lazy()).map_str({'text': str.upper}, dedupe=dedupe, n_workers=2).collect()
+        assert result.service.equals(expected)
+
+
+def test_map_str_in_worker_processes_requires_picklable_udf():
+    df = pl.DataFrame({'text': ['a', 'b']})
+    with pytest.raises(MlflowException, match='cannot be sent to worker processes'):
+        PolarsDataset(df).map_str({'text': lambda text: text.upper()}, n_workers=2).collect()
+
+
+def test_parallel_mappings_share_one_pool_per_size():
+    parallel.shutdown_pools()
+    array = pa.array([str(i) for i in range(200)])
+    for suffix in ('-a', '-b', '-a'):
+        mapped = parallel.map_strings_parallel(array, Suffix(suffix), n_workers=2, chunk_size=10)
+        # Each worker warms each function up once, however many chunks it maps
+        assert mapped.to_pylist() == [f'{i}{suffix}1' for i in range(200)]
+    assert list(parallel._pools) == [2]
+
+
+def test_broken_pools_are_replaced():
+    parallel.shutdown_pools()
+    array = pa.array(['a', 'b', 'c'])
+    with pytest.raises(BrokenProcessPool):
+        parallel.map_strings_parallel(array, crash, n_workers=2, batched=True)
+    assert not parallel._pools
+    assert parallel.map_strings_parallel(array, str.upper, n_workers=2).to_pylist() == ['A', 'B', 'C']
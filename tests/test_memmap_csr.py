@@ -0,0 +1,112 @@
+import mmap
+import os
+import pickle
+
+import numpy as np
+import polars as pl
+import pytest
+from scipy.sparse import random as sparse_random
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.steps.ingest.datasets import (
+    CsrMatrixDataset,
+    CsrMatrixWriter,
+    MemmapCsrMatrixDataset,
+    PolarsDataset,
+    derived_matrix_directory,
+)
+from ml_easy.recipes.steps.train.models import ScikitModel
+
+
+def _is_mapped(array) -> bool:
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+@pytest.fixture
+def matrix():
+    return sparse_random(50, 20, density=0.2, format='csr', dtype=np.float32, random_state=0)
+
+
+@pytest.fixture
+def ds(matrix, tmp_path):
+    return MemmapCsrMatrixDataset.write(
+        (matrix[offset : offset + 16] for offset in range(0, 50, 16)), str(tmp_path / 'X')
+    )
+
+
+def test_written_matrix_is_memory_mapped(matrix, ds):
+    assert ds.service.indices.dtype == np.int32
+    assert _is_mapped(ds.service.data)
+    assert (ds.service != matrix).nnz == 0
+    assert ds.hash_dataset == CsrMatrixDataset(matrix).hash_dataset
+
+
+def test_row_operations(matrix, ds, tmp_path):
+    view = ds.slice(10, 15)
+    assert _is_mapped(view.service.data) and _is_mapped(view.service.indices)
+    assert (view.service != matrix[10:25]).nnz == 0
+    rows = [3, 40, 7, 7]
+    taken = ds[rows]
+    assert isinstance(taken, MemmapCsrMatrixDataset) and taken.path.startswith(str(tmp_path))
+    assert (taken.service != matrix[rows]).nnz == 0
+    stacked = MemmapCsrMatrixDataset.concat([view, CsrMatrixDataset(matrix[:5])])
+    assert (stacked.service != matrix[list(range(10, 25)) + list(range(5))]).nnz == 0
+    batches = list(ds.iter_batches(32))
+    assert [batch.shape[0] for batch in batches] == [32, 18]
+    reopened = pickle.loads(pickle.dumps(view))
+    assert reopened.row_offset == 10 and (reopened.service != view.service).nnz == 0
+
+
+def test_derived_matrices_replace_their_previous_writes(matrix, ds, tmp_path):
+    rows = [3, 40, 7]
+    first = ds[rows]
+    second = ds[rows]
+    assert second.path == first.path and ds[[1, 2]].path != first.path
+    # The first dataset still maps the files the second replaced
+    assert (first.service != matrix[rows]).nnz == 0 and (second.service != matrix[rows]).nnz == 0
+    stacked = [MemmapCsrMatrixDataset.concat([first, CsrMatrixDataset(matrix[:5])]) for _ in range(2)]
+    assert stacked[0].path == stacked[1].path
+    # The source, two row selections and one stack, with no leftover staging directories
+    assert len(os.listdir(tmp_path)) == 4
+    split_dir = str(tmp_path / 'split' / 'features')
+    with derived_matrix_directory(split_dir):
+        taken = ds[rows]
+    assert os.path.dirname(taken.path) == split_dir and (taken.service != matrix[rows]).nnz == 0
+    assert pickle.loads(pickle.dumps(taken)).path == taken.path
+
+
+def test_writer_rejects_mismatched_blocks(matrix, tmp_path):
+    with CsrMatrixWriter(str(tmp_path / 'X')) as writer:
+        writer.append(matrix)
+        with pytest.raises(MlflowException):
+            writer.append(matrix.astype(np.float64))
+
+
+@pytest.fixture
+def y(matrix):
+    return PolarsDataset(pl.DataFrame({'label': (np.asarray(matrix.sum(axis=1)).reshape(-1) > 1).astype(int)}))
+
+
+@pytest.mark.parametrize(
+    'estimator, attribute',
+    [(MultinomialNB, 'class_count_'), (lambda: SGDClassifier(class_weight='balanced', random_state=0), 'coef_')],
+)
+def test_scikit_model_fits_memory_mapped_matrix_like_in_memory(estimator, attribute, matrix, ds, y):
+    model = ScikitModel(estimator(), batch_size=16)
+    model.fit(ds, y)
+    in_memory = estimator().fit(matrix, y.to_numpy().reshape(-1))
+    assert np.array_equal(getattr(model.service, attribute), getattr(in_memory, attribute))
+    assert np.array_equal(model.predict(ds).to_numpy().reshape(-1), in_memory.predict(matrix))
+
+
+def test_scikit_model_fits_memory_mapped_matrix_in_batches_when_incremental(matrix, ds, y):
+    model = ScikitModel(SGDClassifier(random_state=0), batch_size=16, incremental=True)
+    model.fit(ds, y)
+    assert model.service.t_ > 50 * model.n_epochs
+    assert model.predict(ds).shape == (50, 1)
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+
+import numpy as np
+import polars as pl
+import pytest
+from scipy.sparse import random as sparse_random
+
+from ml_easy.recipes.enum import MLFlowErrorCode, StepStatus
+from ml_easy.recipes.exceptions import MlflowException
+from ml_easy.recipes.interfaces.step import StepExecutionState
+from ml_easy.recipes.profiling import (
+    MemoryMonitor,
+    add_counter,
+    bound_counter,
+    check_memory_budget,
+    dataset_sizes,
+    record_step,
+    stage,
+)
+from ml_easy.recipes.steps.ingest.datasets import CsrMatrixDataset, PolarsDataset
+
+
+def test_stages_nest_and_counters_add_up():
+    with record_step() as recorder:
+        for _ in range(2):
+            with stage('embed'):
+                with stage('fit'):
+                    time.sleep(0.01)
+                    add_counter('rows', 3)
+        add_to_recorder = bound_counter()
+        thread = threading.Thread(target=add_to_recorder, args=('rows', 4))
+        thread.start()
+        thread.join()
+    assert set(recorder.stages) == {'embed', 'embed/fit'}
+    assert recorder.stages['embed'].calls == 2 and recorder.stages['embed/fit'].calls == 2
+    assert recorder.stages['embed'].wall_seconds >= recorder.stages['embed/fit'].wall_seconds >= 0.02
+    assert recorder.counters == {'rows': 10}
+    assert recorder.wall_seconds >= recorder.stages['embed'].wall_seconds
+    # Outside of a recorded step, stages and counters do nothing
+    with stage('ignored'):
+        add_counter('rows', 1)
+    bound_counter()('rows', 1)
+    assert recorder.counters == {'rows': 10}
+
+
+def test_metrics_measure_the_datasets():
+    X = PolarsDataset(pl.DataFrame({'a': range(10), 'b': range(10)}))
+    features = CsrMatrixDataset(sparse_random(10, 5, density=0.4, format='csr', dtype=np.float32, random_state=0))
+    with record_step() as recorder:
+        time.sleep(0.01)
+    metrics = recorder.to_metrics(inputs=[X], outputs=[features])
+    assert (metrics.input_rows, metrics.input_cols) == (10, 2)
+    assert (metrics.output_rows, metrics.output_cols, metrics.output_nnz) == (10, 5, features.nnz)
+    assert metrics.rows_per_sec == 10 / metrics.wall_seconds
+    assert dataset_sizes([PolarsDataset(X.service.lazy())]) == (None, 2, None)
+    assert dataset_sizes([]) == (None, None, None)
+
+
+def test_execution_state_round_trips_through_json():
+    with record_step() as recorder:
+        with stage('fit'):
+            add_counter('rows', 1)
+    state = StepExecutionState(StepStatus.SUCCEEDED, 123.0, None, recorder.to_metrics())
+    loaded = StepExecutionState.from_dict(json.loads(json.dumps(state.to_dict())))
+    assert loaded.status == StepStatus.SUCCEEDED and loaded.last_updated_timestamp == 123.0
+    assert loaded.stack_trace is None and loaded.metrics == state.metrics
+    failed = StepExecutionState.from_dict(StepExecutionState(StepStatus.FAILED, 1.0, 'trace').to_dict())
+    assert failed.status == StepStatus.FAILED and failed.stack_trace == 'trace' and failed.metrics is None
+
+
+def test_memory_monitor_measures_the_peak_growth():
+    with MemoryMonitor('step', trace_allocations=True, interval=0.01) as monitor:
+        block = np.ones(64 << 20, dtype=np.uint8)
+        time.sleep(0.05)
+        del block
+    metrics = monitor.to_metrics()
+    assert metrics.rss_start_bytes > 0 and metrics.peak_rss_bytes >= metrics.rss_start_bytes
+    assert metrics.peak_rss_delta_bytes >= 32 << 20
+    assert metrics.traced_peak_bytes >= 64 << 20 and metrics.top_allocations
+
+
+def _exceed_budget(interval: float = 0.01) -> MemoryMonitor:
+    # Any process is already past a 1 MB budget, so the first sample breaches it
+    monitor = MemoryMonitor('step', budget_mb=1, interval=interval)
+    monitor.__enter__()
+    while monitor.exceeded_bytes is None:
+        time.sleep(interval)
+    return monitor
+
+
+def test_memory_budget_is_raised_at_the_next_stage():
+    entered = []
+    monitor = _exceed_budget()
+    with pytest.raises(MlflowException, match='exceeded its memory budget of 1 MB') as error:
+        with monitor, record_step():
+            with stage('fit'):
+                entered.append('fit')
+    assert error.value.error_code == MLFlowErrorCode.RESOURCE_EXHAUSTED
+    assert entered == [] and monitor.exceeded_bytes > 1 << 20
+    assert monitor.to_metrics() is not None
+    # Outside of the monitored block, stages no longer check the budget
+    with stage('fit'):
+        check_memory_budget()
+
+
+def test_memory_budget_is_raised_when_the_block_ends():
+    errors = []
+
+    def run() -> None:
+        try:
+            with _exceed_budget():
+                pass
+        except MlflowException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1
+    with pytest.raises(MlflowException, match='exceeded its memory budget') as error:
+        with _exceed_budget():
+            raise ValueError('failure')
+    assert isinstance(error.value.__context__, ValueError)
@@ -0,0 +1,115 @@
+import numpy as np
+import polars as pl
+import pytest
+from mlflow.tracking import MlflowClient  # type:ignore
+from sklearn.linear_model import LogisticRegression
+
+from ml_easy.recipes.constants import BLOB_REF_TAG_PREFIX
+from ml_easy.recipes.enum import ScoreType
+from ml_easy.recipes.interfaces.config import Context, Experiment
+from ml_easy.recipes.io.bundle import save_bundle
+from ml_easy.recipes.steps.cards_config import (
+    EvaluateCard,
+    Metric,
+    SplitCard,
+    StepMessage,
+    TrainCard,
+    TransformCard,
+)
+from ml_easy.recipes.steps.ingest.datasets import CsrMatrixDataset, PolarsDataset
+from ml_easy.recipes.steps.register.loader import MlflowRunLoader
+from ml_easy.recipes.steps.register.registry import MlflowRegistry
+from ml_easy.recipes.steps.steps_config import (
+    BaseRegisterConfig,
+    BaseTransformConfig,
+    Score,
+)
+from ml_easy.recipes.steps.train.models import ScikitModel
+
+
+def _message(tmp_path) -> StepMessage:
+    rng = np.random.default_rng(0)
+    X = CsrMatrixDataset.from_numpy(rng.random((40, 5)))
+    y = PolarsDataset(pl.DataFrame({'label': rng.integers(0, 2, 40)}))
+    model = ScikitModel(LogisticRegression())
+    model.fit(X, y)
+    transformer_path = tmp_path / 'transformer.bundle'
+    bundle_path = tmp_path / 'inference.bundle'
+    save_bundle(str(transformer_path), {'transformer': None})
+    save_bundle(str(bundle_path), {'model': model})
+    return StepMessage(
+        transform=TransformCard(
+            step_output_path=str(tmp_path),
+            tf_dataset=(X, y),
+            config=BaseTransformConfig(transformer_fn='transformer_fn'),
+            transformer_path=str(transformer_path),
+        ),
+        split=SplitCard(step_output_path=str(tmp_path), train_val_test=((X, y), (X, y), (X, y))),
+        train=TrainCard(step_output_path=str(tmp_path), mod=model, cv_metrics=[0.5, 0.7], bundle_path=str(bundle_path)),
+        evaluate=EvaluateCard(
+            step_output_path=str(tmp_path),
+            metrics_eval=[Metric(name=Score(name=ScoreType.F1Score, params={}), value=0.75)],
+        ),
+    )
+
+
+def _registry(tmp_path, **conf) -> MlflowRegistry:
+    context = Context(
+        recipe_root_path=str(tmp_path),
+        target_col='label',
+        experiment=Experiment(product_name='product', name='experiment', tracking_uri=(tmp_path / 'mlruns').as_uri()),
+    )
+    register_conf = BaseRegisterConfig(
+        register_fn='register_fn',
+        artifact_path='model',
+        registered_model_name=None,
+        source={
+            'type': 'sql_alchemy_based',
+            'config': {'hostname': 'h', 'port': '1', 'user': 'u', 'database_name': 'd', 'table_name': 't'},
+        },
+        **conf,
+    )
+    return MlflowRegistry(register_conf, context)
+
+
+@pytest.mark.parametrize('async_logging', [False, True])
+def test_mlflow_registry_logs_run(tmp_path, async_logging):
+    tracking_uri = (tmp_path / 'mlruns').as_uri()
+    registry = _registry(tmp_path, async_logging=async_logging)
+    registry.log_model(_message(tmp_path))
+
+    client = MlflowClient(tracking_uri=tracking_uri)
+    run = client.get_run(registry._run_id)
+    assert run.info.status == 'FINISHED'
+    assert run.data.params == {'transformer_fn': 'transformer_fn'}
+    assert run.data.metrics == {'f1_score': 0.75, 'cv_val_metric_mean': 0.6, 'cv_val_metric_std': pytest.approx(0.1)}
+    assert run.data.tags['product_name'] == 'product'
+    assert len(run.inputs.dataset_inputs) == 2
+    artifacts = {a.path for a in client.list_artifacts(run.info.run_id)}
+    assert {'transformer', 'bundle', 'model'} <= artifacts
+    assert {a.path for a in client.list_artifacts(run.info.run_id, 'bundle/inference.bundle')} == {
+        'bundle/inference.bundle/manifest.json',
+        'bundle/inference.bundle/objects.pkl',
+        'bundle/inference.bundle/segments.bin',
+    }
+
+
+def test_mlflow_registry_deduplicates_blobs(tmp_path):
+    tracking_uri = (tmp_path / 'mlruns').as_uri()
+    blob_dir = tmp_path / 'blobs'
+    message = _message(tmp_path)
+    run_ids, blob_paths, n_blobs = [], [], []
+    for _ in range(2):
+        registry = _registry(tmp_path, blob_store_uri=str(blob_dir))
+        registry.log_model(message)
+        tags = MlflowClient(tracking_uri=tracking_uri).get_run(registry._run_id).data.tags
+        run_ids.append(registry._run_id)
+        blob_paths.append({k: v for k, v in tags.items() if k.startswith(BLOB_REF_TAG_PREFIX)})
+        n_blobs.append(len(list(blob_dir.glob('*/*'))))
+
+    assert n_blobs[0] == n_blobs[1]
+    assert blob_paths[0] == blob_paths[1]
+    assert set(blob_paths[0]) == {BLOB_REF_TAG_PREFIX + 'transformer', BLOB_REF_TAG_PREFIX + 'bundle'}
+    assert not MlflowClient(tracking_uri=tracking_uri).list_artifacts(run_ids[1], 'bundle')
+    loader = MlflowRunLoader(tracking_uri, run_ids[1], cache_dir=str(tmp_path / 'cache'))
+    assert isinstance(loader.load_model('model'), ScikitModel)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from ml_easy.recipes.serving import app as serving_app
+from ml_easy.recipes.serving.batcher import MicroBatcher, ServingStats
+from ml_easy.recipes.serving.config import ServingConfig
+
+
+class DoublePipeline:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def warmup(self) -> None:
+        pass
+
+    def __call__(self, records):
+        self.batch_sizes.append(len(records))
+        if any('bad' in record for record in records):
+            raise ValueError('bad record')
+        return [record['x'] * 2 for record in records]
+
+
+async def _serve(pipeline, records, max_batch_size=4, max_wait_ms=50.0):
+    stats = ServingStats(window=100)
+    batcher = MicroBatcher(pipeline, max_batch_size, max_wait_ms, stats)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(*(batcher.submit(record) for record in records), return_exceptions=True)
+    finally:
+        await batcher.stop()
+    return results, stats.snapshot()
+
+
+def test_batcher_coalesces_concurrent_requests():
+    pipeline = DoublePipeline()
+    results, stats = asyncio.run(_serve(pipeline, [{'x': i} for i in range(10)]))
+    assert results == [2 * i for i in range(10)]
+    assert pipeline.batch_sizes == [4, 4, 2]
+    assert stats['requests'] == 10 and stats['batches'] == 3
+    assert stats['batch_size_histogram'] == {'2-2': 1, '3-4': 2}
+    assert set(stats['latency_ms']) == {'p50', 'p90', 'p99', 'p999', 'max'}
+
+
+def test_batcher_dispatches_partial_batches_after_max_wait():
+    pipeline = DoublePipeline()
+    start = time.perf_counter()
+    results, _ = asyncio.run(_serve(pipeline, [{'x': 1}], max_batch_size=32, max_wait_ms=50.0))
+    assert results == [2] and pipeline.batch_sizes == [1]
+    assert time.perf_counter() - start >= 0.04
+
+
+def test_batcher_isolates_failing_records():
+    pipeline = DoublePipeline()
+    results, stats = asyncio.run(_serve(pipeline, [{'x': 1}, {'x': 2, 'bad': True}, {'x': 3}]))
+    assert results[0] == 2 and results[2] == 6
+    assert isinstance(results[1], ValueError)
+    assert pipeline.batch_sizes == [3, 1, 1, 1]
+    assert stats['requests'] == 2
+
+
+def test_app_rejects_malformed_bodies(monkeypatch):
+    monkeypatch.setattr(serving_app.InferencePipeline, 'load', classmethod(lambda cls, config: DoublePipeline()))
+    app = serving_app.create_app(ServingConfig(tracking_uri='file:///tmp/mlruns', run_id='run', artifact_path='model'))
+    with TestClient(app) as client:
+        assert client.post('/predict', content=b'{"x": ').status_code == 400
+        assert client.post('/predict', json=[{'x': 1}]).status_code == 400
+        response = client.post('/predict', json={'x': 21})
+        assert response.status_code == 200 and response.json() == {'prediction': 42}
+        assert client.get('/metrics').json()['requests'] == 1
+
+
+@pytest.mark.parametrize('body', [b'\xff\xfe', b''])
+def test_app_rejects_undecodable_bodies(monkeypatch, body):
+    monkeypatch.setattr(serving_app.InferencePipeline, 'load', classmethod(lambda cls, config: DoublePipeline()))
+    app = serving_app.create_app(ServingConfig(tracking_uri='file:///tmp/mlruns', run_id='run', artifact_path='model'))
+    with TestClient(app) as client:
+        assert client.post('/predict', content=body).status_code == 400
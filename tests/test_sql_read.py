@@ -0,0 +1,35 @@
+import sqlite3
+
+import polars as pl
+import pytest
+
+from ml_easy.recipes.enum import SqlReadEngine
+from ml_easy.recipes.steps.ingest.datasets import PolarsDataset
+
+_ROWS = [(1, 'first text', 0.5), (2, None, 1.5), (3, 'third text', None)]
+
+
+@pytest.fixture
+def sqlite_uri(tmp_path):
+    path = tmp_path / 'data.db'
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE texts (id INTEGER, body TEXT, score REAL)')
+        connection.executemany('INSERT INTO texts VALUES (?, ?, ?)', _ROWS)
+    return f'sqlite:///{path}'
+
+
+def _expected() -> pl.DataFrame:
+    return pl.DataFrame(_ROWS, schema={'id': pl.Int64, 'body': pl.Utf8, 'score': pl.Float64}, orient='row')
+
+
+def test_read_sql_without_pandas(sqlite_uri):
+    ds = PolarsDataset.read_sql('SELECT * FROM texts ORDER BY id', sqlite_uri, SqlReadEngine.SQLALCHEMY)
+    assert ds.service.equals(_expected())
+    pandas_ds = PolarsDataset.read_sql('SELECT * FROM texts ORDER BY id', sqlite_uri, SqlReadEngine.PANDAS)
+    assert pandas_ds.service.equals(_expected())
+
+
+def test_read_sql_adbc(sqlite_uri):
+    pytest.importorskip('adbc_driver_sqlite')
+    ds = PolarsDataset.read_sql('SELECT * FROM texts ORDER BY id', sqlite_uri, SqlReadEngine.ADBC)
+    assert ds.service.equals(_expected())
@@ -0,0 +1,27 @@
+import os
+
+from ml_easy.recipes.utils import load_step_function, load_step_module
+
+
+def _write_step(root, value):
+    (root / 'steps').mkdir(parents=True, exist_ok=True)
+    path = root / 'steps' / 'ingest.py'
+    path.write_text(f'def ingest_fn():\n    return {value!r}\n')
+    return str(path)
+
+
+def test_step_modules_are_cached_per_file_and_content(tmp_path):
+    first = _write_step(tmp_path / 'first', 'a')
+    second = _write_step(tmp_path / 'second', 'b')
+
+    module = load_step_module(first)
+    assert load_step_module(first) is module
+    assert load_step_function(first, 'ingest_fn')() == 'a'
+    assert load_step_function(second, 'ingest_fn')() == 'b'
+    assert load_step_module(second).__name__ != module.__name__
+
+    os.utime(first, ns=(0, 0))
+    assert load_step_module(first) is module
+
+    _write_step(tmp_path / 'first', 'c')
+    assert load_step_function(first, 'ingest_fn')() == 'c'
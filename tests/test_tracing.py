@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+
+from ml_easy.recipes.constants import TRACES_SUBDIRECTORY_NAME
+from ml_easy.recipes.env_vars import MLFLOW_RECIPES_TRACE
+from ml_easy.recipes.steps.train.models import Model
+from ml_easy.recipes.tracing import span, trace_run, traced
+
+
+class ConstantModel(Model[int]):
+    def fit(self, X, y):
+        with span('inner', rows=len(X)):
+            self.fitted = True
+
+    def predict(self, X):
+        return [self.service] * len(X)
+
+    def score(self, X, y, metric, **kwargs):
+        return 1.0
+
+    def get_model_outputs(self):
+        return {}
+
+
+def _spans(tracer):
+    return [event for event in tracer.to_dict()['traceEvents'] if event['ph'] == 'X']
+
+
+def test_spans_are_no_ops_outside_a_traced_run(tmp_path, monkeypatch):
+    monkeypatch.delenv(MLFLOW_RECIPES_TRACE.name, raising=False)
+    with trace_run(str(tmp_path), 'run') as tracer:
+        assert tracer is None
+        assert span('a') is span('b')
+        assert traced('f')(lambda x: x + 1)(1) == 2
+    assert not os.path.exists(tmp_path / TRACES_SUBDIRECTORY_NAME)
+
+
+def test_traced_run_writes_a_chrome_trace(tmp_path, monkeypatch):
+    monkeypatch.setenv(MLFLOW_RECIPES_TRACE.name, 'true')
+    with trace_run(str(tmp_path), 'run') as tracer:
+        with trace_run(str(tmp_path), 'nested') as nested:
+            assert nested is tracer
+        with span('outer', cat='step', rows=3):
+            thread = threading.Thread(target=traced('work')(lambda: None), name='worker')
+            thread.start()
+            thread.join()
+    spans = {event['name']: event for event in _spans(tracer)}
+    assert set(spans) == {'run', 'outer', 'work'}
+    assert spans['outer']['cat'] == 'step' and spans['outer']['args'] == {'rows': 3}
+    assert spans['work']['tid'] != spans['outer']['tid']
+    assert spans['run']['dur'] >= spans['outer']['dur'] >= spans['work']['dur'] >= 0
+    (name,) = os.listdir(tmp_path / TRACES_SUBDIRECTORY_NAME)
+    with open(tmp_path / TRACES_SUBDIRECTORY_NAME / name) as f:
+        trace = json.load(f)
+    threads = {event['args']['name'] for event in trace['traceEvents'] if event['ph'] == 'M'}
+    assert {'MainThread', 'worker'} <= threads
+    # Spans started after the run has exited are dropped
+    with span('late'):
+        pass
+    assert len(_spans(tracer)) == 3
+
+
+def test_model_methods_are_traced(tmp_path, monkeypatch):
+    monkeypatch.setenv(MLFLOW_RECIPES_TRACE.name, 'true')
+    model = ConstantModel(7)
+    with trace_run(str(tmp_path), 'run') as tracer:
+        assert model.fit_predict([1, 2], [0, 0]) == [7, 7]
+    spans = [(event['name'], event['cat']) for event in _spans(tracer)]
+    assert spans == [
+        ('inner', 'recipe'),
+        ('ConstantModel.fit', 'model'),
+        ('ConstantModel.predict', 'model'),
+        ('run', 'recipe'),
+    ]
+    assert hasattr(ConstantModel.fit, '__wrapped__') and not hasattr(ConstantModel.score, '__wrapped__')
@@ -0,0 +1,36 @@
+import pickle
+
+import polars as pl
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer  # type: ignore
+
+from ml_easy.recipes.steps.ingest.datasets import PolarsDataset
+from ml_easy.recipes.steps.transform.transformer import ScikitEmbedder
+from ml_easy.recipes.steps.transform.vocabulary import CompactVocabulary
+
+TEXTS = ['the cat sat', 'le chat était assis', 'a dog ran', 'the dog sat', 'naïve café crème', 'cat and dog']
+
+
+def test_compact_vocabulary_matches_the_dict():
+    vocabulary = TfidfVectorizer().fit(TEXTS).vocabulary_
+    compact = CompactVocabulary(vocabulary)
+    assert len(compact) == len(vocabulary)
+    assert dict(compact.items()) == vocabulary
+    assert all(compact[term] == index for term, index in vocabulary.items())
+    assert 'café' in compact and 'bird' not in compact and 1 not in compact
+    with pytest.raises(KeyError):
+        compact['bird']
+    assert dict(pickle.loads(pickle.dumps(compact)).items()) == vocabulary
+
+
+def test_compacted_embedder_transforms_identically():
+    X = PolarsDataset(pl.DataFrame({'text': TEXTS}))
+    plain = ScikitEmbedder(TfidfVectorizer(ngram_range=(1, 2)))
+    compacted = ScikitEmbedder(TfidfVectorizer(ngram_range=(1, 2)), compact_vocabulary=True)
+    expected, result = plain.fit_transform(X), compacted.fit_transform(X)
+    assert isinstance(compacted._service.vocabulary_, CompactVocabulary)
+    assert (expected.service != result.service).nnz == 0
+    unseen = PolarsDataset(pl.DataFrame({'text': ['the bird sat', 'café dog']}))
+    assert (plain.transform(unseen).service != compacted.transform(unseen).service).nnz == 0
+    outputs = compacted.get_transformer_outputs()['vocabulary_compaction']
+    assert outputs['nbytes_after'] < outputs['nbytes_before']